@@ -1,54 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import uuid
 from app.database import get_db
 from app.models.models import Project, Activity, User
 from app.schemas.schemas import Activity as ActivitySchema, ActivityCreate
 from app.auth import get_current_user
+from app.services.analysis_cache import analysis_cache
+from app.services.activity_import import StreamingImport, import_registry, parse_csv_rows, parse_json_rows, validate_rows
+from app.services.dependencies import add_dependencies, dependents_query, remove_dependencies, set_dependencies
 
 router = APIRouter()
 
 @router.get("/{project_id}/activities", response_model=List[ActivitySchema])
 async def get_activities(
     project_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all activities for a project"""
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
     return activities
 
 @router.post("/{project_id}/activities", response_model=ActivitySchema)
 async def create_activity(
     project_id: str, 
     activity: ActivityCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new activity for a project"""
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Check if activity ID already exists
-    existing = db.query(Activity).filter(
-        Activity.projectId == project_id,
-        Activity.activityId == activity.activityId
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Activity ID already exists")
-    
     db_activity = Activity(
         projectId=project_id,
         activityId=activity.activityId,
@@ -63,35 +61,212 @@ async def create_activity(
         crashCost=activity.crashCost
     )
     db.add(db_activity)
-    db.commit()
-    db.refresh(db_activity)
+    # The unique (projectId, activityId) index rejects a duplicate ID, also
+    # one created concurrently
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Activity ID already exists")
+    await add_dependencies(db, project_id, [(activity.activityId, activity.predecessors)])
+    await db.commit()
+    analysis_cache.invalidate(project_id)
+    await db.refresh(db_activity)
     return db_activity
 
+@router.post("/{project_id}/activities/bulk")
+async def bulk_import_activities(
+    project_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import many activities in one transaction. The body is JSON (a list of
+    activities or {"activities": [...]}) or, with Content-Type text/csv, CSV
+    with a header row of activity field names.
+    
+    The whole batch is validated first; if any row is invalid nothing is
+    imported and the response lists every row error.
+    """
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    body = await request.body()
+    try:
+        if "csv" in request.headers.get("content-type", ""):
+            rows = parse_csv_rows(body)
+        else:
+            rows = parse_json_rows(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not rows:
+        raise HTTPException(status_code=400, detail="No activities to import")
+    
+    existing = dict(
+        (await db.execute(select(Activity.activityId, Activity.predecessors).where(Activity.projectId == project_id))).all()
+    )
+    activities, errors = validate_rows(rows, existing)
+    if errors:
+        return JSONResponse(status_code=400, content={
+            "detail": f"{len(errors)} error(s) in {len(rows)} rows; nothing was imported",
+            "errors": errors
+        })
+    
+    # One transaction; the rows go out as batched multi-row INSERTs
+    try:
+        await db.execute(insert(Activity), [
+            {'projectId': project_id, **activity.model_dump()} for activity in activities
+        ])
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Activity IDs were added concurrently; nothing was imported")
+    await add_dependencies(db, project_id, [(activity.activityId, activity.predecessors) for activity in activities])
+    await db.commit()
+    analysis_cache.invalidate(project_id)
+    return {"imported": len(activities)}
+
+async def write_imported(db: AsyncSession, project_id: str, rows: List[dict]):
+    """Insert one chunk of validated import rows and their dependency edges"""
+    await db.execute(insert(Activity), rows)
+    await add_dependencies(db, project_id, [(row['activityId'], row['predecessors']) for row in rows])
+
+@router.post("/{project_id}/activities/import")
+async def stream_import_activities(
+    project_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    importId: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream a large CSV or NDJSON upload into the project. Rows are parsed
+    and validated as the body arrives and inserted in chunks, all in one
+    transaction that is only committed if every row is valid.
+    
+    The format is taken from `format` or the Content-Type (text/csv or
+    application/x-ndjson). Progress can be polled under `importId`
+    (generated if not given) while the upload runs.
+    """
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    content_type = request.headers.get("content-type", "")
+    if format is None:
+        format = "csv" if "csv" in content_type else "ndjson" if "ndjson" in content_type else None
+    if format is None:
+        raise HTTPException(status_code=400, detail="Specify format=csv or format=ndjson, or a matching Content-Type")
+    total_bytes = request.headers.get("content-length")
+    
+    existing = dict(
+        (await db.execute(select(Activity.activityId, Activity.predecessors).where(Activity.projectId == project_id))).all()
+    )
+    try:
+        ingest = StreamingImport(project_id, format, existing, int(total_bytes) if total_bytes else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    importId = importId or str(uuid.uuid4())
+    if not import_registry.register(project_id, importId, ingest):
+        raise HTTPException(status_code=409, detail="An import with this ID is still running")
+    ingest.progress['importId'] = importId
+    
+    try:
+        async for data in request.stream():
+            for rows in ingest.feed(data):
+                if rows:
+                    await write_imported(db, project_id, rows)
+                    ingest.written(len(rows))
+        rows = ingest.finish()
+        if rows:
+            await write_imported(db, project_id, rows)
+            ingest.written(len(rows))
+        if ingest.needs_cycle_check and not ingest.progress['errorCount']:
+            ingest.check_cycles(dict(
+                (await db.execute(select(Activity.activityId, Activity.predecessors).where(Activity.projectId == project_id))).all()
+            ))
+    except ValueError as e:
+        await db.rollback()
+        ingest.error(None, None, str(e))
+        ingest.close("failed")
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError:
+        await db.rollback()
+        ingest.close("failed")
+        raise HTTPException(status_code=409, detail="Activity IDs were added concurrently; nothing was imported")
+    except Exception:
+        await db.rollback()
+        ingest.close("failed")
+        raise
+    
+    if ingest.progress['errorCount']:
+        await db.rollback()
+        ingest.close("failed")
+        return JSONResponse(status_code=400, content={
+            "detail": f"{ingest.progress['errorCount']} error(s) in {ingest.progress['rowsRead']} rows; nothing was imported",
+            **ingest.report()
+        })
+    
+    await db.commit()
+    analysis_cache.invalidate(project_id)
+    ingest.close("completed")
+    return ingest.report()
+
+@router.get("/{project_id}/activities/import/{import_id}")
+async def get_import_progress(
+    project_id: str,
+    import_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a streamed import: bytes and rows read, rows written, errors"""
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    ingest = import_registry.get(project_id, import_id)
+    if ingest is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return ingest.report()
+
 @router.put("/{project_id}/activities/{activity_id}", response_model=ActivitySchema)
 async def update_activity(
     project_id: str,
     activity_id: str,
     activity_update: ActivityCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update an activity"""
     # Verify project ownership
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    db_activity = db.query(Activity).filter(
+    db_activity = await db.scalar(select(Activity).where(
         Activity.projectId == project_id,
         Activity.id == activity_id
-    ).first()
+    ))
     
     if not db_activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    if db_activity.predecessors != activity_update.predecessors:
+        await set_dependencies(db, project_id, db_activity.activityId, activity_update.predecessors)
     db_activity.name = activity_update.name
     db_activity.predecessors = activity_update.predecessors
     db_activity.duration = activity_update.duration
@@ -102,33 +277,69 @@ async def update_activity(
     db_activity.crashTime = activity_update.crashTime
     db_activity.crashCost = activity_update.crashCost
     
-    db.commit()
-    db.refresh(db_activity)
+    await db.commit()
+    analysis_cache.invalidate(project_id)
+    await db.refresh(db_activity)
     return db_activity
 
 @router.delete("/{project_id}/activities/{activity_id}")
 async def delete_activity(
     project_id: str,
     activity_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an activity"""
     # Verify project ownership
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    db_activity = db.query(Activity).filter(
+    db_activity = await db.scalar(select(Activity).where(
         Activity.projectId == project_id,
         Activity.id == activity_id
-    ).first()
+    ))
     
     if not db_activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    db.delete(db_activity)
-    db.commit()
+    await remove_dependencies(db, project_id, db_activity.activityId)
+    await db.delete(db_activity)
+    await db.commit()
+    analysis_cache.invalidate(project_id)
     return {"message": "Activity deleted successfully"}
+
+@router.get("/{project_id}/activities/{activity_id}/dependents", response_model=List[ActivitySchema])
+async def get_dependents(
+    project_id: str,
+    activity_id: str,
+    transitive: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Activities that depend on an activity: its direct successors, or with
+    transitive=true every activity downstream of it
+    """
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    db_activity = await db.scalar(select(Activity).where(
+        Activity.projectId == project_id,
+        Activity.id == activity_id
+    ))
+    
+    if not db_activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    
+    dependents = dependents_query(project_id, db_activity.activityId, transitive)
+    return (await db.scalars(select(Activity).where(
+        Activity.projectId == project_id,
+        Activity.activityId.in_(dependents)
+    ))).all()
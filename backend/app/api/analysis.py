@@ -1,40 +1,263 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import Boolean, Float, String, bindparam, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.models import Project, Activity, User
-from app.schemas.schemas import ProjectAnalysisResponse, ProbabilityRequest, ProbabilityResponse, AdhocAnalysisRequest, AdhocProbabilityRequest
-from app.services.pert_cpm import PERTCPMEngine, calculate_probability
+from app.schemas.schemas import ProjectAnalysisResponse, ProbabilityRequest, ProbabilityResponse, AdhocAnalysisRequest, AdhocProbabilityRequest, ProbabilitySweepRequest, AdhocProbabilitySweepRequest, SimulationRequest, AdhocSimulationRequest
+from app.services.pert_cpm import calculate_probability, probability_sweep
 from app.services.crashing_engine import CrashingEngine
-from app.services.pdf_export import generate_pdf_export
+from app.services.monte_carlo import simulate_schedule
+from app.services.time_cost import check_time_cost_size
+from app.services.analysis_cache import analysis_cache, adhoc_cache, activity_set_hash
+from app.services.analysis_tasks import (
+    analyze_activities, analyze_schedule, crashing_options, crashing_scheme, export_results, longest_paths,
+    render_diagram, render_pdf, time_cost_curve
+)
+from app.services.cpu_pool import CPU_RENDER_TIMEOUT, CPU_TASK_TIMEOUT, PoolSaturated, PoolUnavailable, cpu_pool
+from app.services.artifact_cache import artifact_cache, artifact_key
+from app.services.network_diagram import diagram_key
+from app.services.pdf_export import DIAGRAM_RENDERERS
+from app.services.dependencies import load_predecessor_lists
 from app.auth import get_current_user
 import json
+import time
+from typing import Dict, List, Optional, Tuple
 from io import BytesIO
 from datetime import datetime
 
 router = APIRouter()
 
-@router.post("/analyze-adhoc", response_model=ProjectAnalysisResponse)
-async def analyze_adhoc(request: AdhocAnalysisRequest):
-    """Analyze activities without saving (guest mode)"""
-    activities_data = []
-    for activity in request.activities:
-        activities_data.append({
+# Critical paths included in exports; the total count is always reported
+EXPORT_MAX_CRITICAL_PATHS = 100
+
+# Upper bound for k in the longest paths query and for maxPaths in analyses
+MAX_PATHS_K = 1000
+
+# Seconds clients are asked to wait before retrying when the CPU pool is full
+RETRY_AFTER_SECONDS = 5
+
+async def offload(fn, *args, **kwargs):
+    """
+    Run an engine or renderer task in the CPU pool. A full pool is answered
+    with 429 and an unavailable pool or a task over its time limit with 503,
+    both with Retry-After; errors of the task itself are re-raised.
+    """
+    try:
+        return await cpu_pool.run(fn, *args, **kwargs)
+    except PoolSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    except (PoolUnavailable, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+# Export metadata set to the time of the request, left out of the report's
+# cache key so that a repeated export is served from the cache (its report
+# then shows the time it was first rendered)
+EXPORT_TIMESTAMPS = ('exportDate', 'createdAt', 'updatedAt')
+
+def report_key(export_data: Dict, diagram: str) -> str:
+    metadata = {k: v for k, v in export_data['metadata'].items() if k not in EXPORT_TIMESTAMPS}
+    return artifact_key('pdf-report-v2', {**export_data, 'metadata': metadata}, {'diagram': diagram})
+
+async def rendered_report(export_data: Dict, diagram: str = "raster") -> bytes:
+    """
+    The PDF report of an export with a 'raster' or 'vector' network diagram,
+    rendered in the CPU pool unless the same report is cached
+    """
+    if diagram not in DIAGRAM_RENDERERS:
+        raise HTTPException(status_code=400, detail=f"diagram must be one of: {', '.join(DIAGRAM_RENDERERS)}")
+    key = await run_in_threadpool(report_key, export_data, diagram)
+    pdf = await run_in_threadpool(artifact_cache.get, key, 'pdf')
+    if pdf is None:
+        pdf = await offload(render_pdf, export_data, diagram, timeout=CPU_RENDER_TIMEOUT)
+        await run_in_threadpool(artifact_cache.put, key, 'pdf', pdf)
+    return pdf
+
+# Media types of the streaming endpoints, by `format` query value
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson"
+}
+
+# Streams run the engine in the threadpool, outside the CPU pool's queue and
+# time limit, so they are bounded here instead: by project size (larger
+# projects can queue a crashingAnalysis job) and by CPU_TASK_TIMEOUT seconds
+STREAM_MAX_ACTIVITIES = 5000
+
+async def stream_events(events, format: str) -> StreamingResponse:
+    """
+    Stream (kind, payload) events from an engine as Server-Sent Events
+    (`event: kind`) or NDJSON (`{"type": kind, ...}` per line).
+
+    The first event is computed before the response starts, so invalid
+    input still fails with a regular error status; a failure later in the
+    run is reported as a final `error` event. The engine runs in the
+    threadpool (as Starlette iterates the rest of the body), not on the
+    event loop, and is stopped with an `error` event once the run exceeds
+    CPU_TASK_TIMEOUT seconds.
+    """
+    def encode(kind: str, payload) -> str:
+        if format == "sse":
+            return f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"type": kind, **payload}) + "\n"
+
+    deadline = time.monotonic() + CPU_TASK_TIMEOUT
+    first = await run_in_threadpool(next, events)
+
+    def body():
+        yield encode(*first)
+        try:
+            for kind, payload in events:
+                yield encode(kind, payload)
+                if time.monotonic() > deadline:
+                    events.close()
+                    yield encode("error", {"detail": f"Stream exceeded its {CPU_TASK_TIMEOUT:g}s time limit"})
+                    return
+        except Exception as e:
+            yield encode("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Rows per bulk UPDATE statement when writing computed schedules back
+SCHEDULE_WRITE_BATCH = 5000
+
+# Computed schedule columns, by analysis result key
+SCHEDULE_COLUMNS = {'es': 'ES', 'ef': 'EF', 'ls': 'LS', 'lf': 'LF', 'slack': 'slack', 'isCritical': 'isCritical'}
+
+async def write_schedule(db: AsyncSession, activities: List[Activity], result: Dict) -> List[Dict]:
+    """
+    Persist the computed schedule of the loaded `activities` and return them
+    as response rows built in memory, so nothing is re-read afterwards.
+
+    Only rows whose stored schedule differs are written, all in one bulk
+    statement per SCHEDULE_WRITE_BATCH rows: UPDATE ... FROM (VALUES ...) on
+    PostgreSQL, a single executemany elsewhere.
+    """
+    rows, changed = [], []
+    for activity in activities:
+        computed = result['activities'].get(activity.activityId, {})
+        schedule = {name: computed.get(key) for name, key in SCHEDULE_COLUMNS.items()}
+        schedule['isCritical'] = bool(schedule['isCritical'])
+        if any(getattr(activity, name) != value for name, value in schedule.items()):
+            changed.append({'activity_id': activity.id, **schedule})
+        rows.append({
+            'id': activity.id,
+            'projectId': activity.projectId,
             'activityId': activity.activityId,
             'name': activity.name,
-            'predecessors': activity.predecessors or '',
+            'predecessors': activity.predecessors,
             'duration': activity.duration,
             'optimistic': activity.optimistic,
             'mostLikely': activity.mostLikely,
             'pessimistic': activity.pessimistic,
             'cost': activity.cost,
             'crashTime': activity.crashTime,
-            'crashCost': activity.crashCost
+            'crashCost': activity.crashCost,
+            **schedule
         })
+    
+    table = Activity.__table__
+    for start in range(0, len(changed), SCHEDULE_WRITE_BATCH):
+        batch = changed[start:start + SCHEDULE_WRITE_BATCH]
+        if db.bind.dialect.name == "postgresql":
+            computed = values(
+                column('activity_id', String), column('es', Float), column('ef', Float), column('ls', Float),
+                column('lf', Float), column('slack', Float), column('isCritical', Boolean),
+                name='computed'
+            ).data([tuple(row.values()) for row in batch])
+            await db.execute(
+                update(table)
+                .where(table.c.id == computed.c.activity_id)
+                .values({name: computed.c[name] for name in SCHEDULE_COLUMNS})
+            )
+        else:
+            await db.execute(
+                update(table)
+                .where(table.c.id == bindparam('activity_id'))
+                .values({name: bindparam(name) for name in SCHEDULE_COLUMNS}),
+                batch
+            )
+    return rows
+
+async def uncached_predecessors(db: AsyncSession, project_id: str, digest: str,
+                                kind) -> Optional[Dict[str, List[str]]]:
+    """
+    The project's dependency edges for building its network, or None if the
+    analysis cache already holds `kind` for this content and nothing runs
+    """
+    if analysis_cache.contains(project_id, digest, kind):
+        return None
+    return await load_predecessor_lists(db, project_id)
+
+class AdhocResults:
+    """
+    Engine results for one ad-hoc (guest mode) payload, computed in the CPU
+    pool. They are memoized in adhoc_cache under a hash of the
+    activities, so every ad-hoc endpoint sent the same activities shares
+    them: a probability or export call after an analyze call reuses its
+    engine run. Works with any ad-hoc request model, only its `activities`
+    are read.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.payload = [activity.model_dump() for activity in request.activities]
+        self.digest = activity_set_hash(self.payload)
+
+    def activities_data(self) -> List[Dict]:
+        """Engine input, only built when a result has to be computed"""
+        activities_data = []
+        for activity in self.request.activities:
+            activities_data.append({
+                'activityId': activity.activityId,
+                'name': activity.name,
+                'predecessors': activity.predecessors or '',
+                'duration': activity.duration,
+                'optimistic': activity.optimistic,
+                'mostLikely': activity.mostLikely,
+                'pessimistic': activity.pessimistic,
+                'cost': activity.cost,
+                'crashTime': activity.crashTime,
+                'crashCost': activity.crashCost
+            })
+        return activities_data
+
+    async def get(self, kind, fn, *args):
+        """The cached result of `kind`, or of fn(activities_data, *args) run in the CPU pool"""
+        result, _ = await adhoc_cache.get_or_compute_async(
+            None, self.payload, kind, lambda: offload(fn, self.activities_data(), *args), digest=self.digest
+        )
+        return result
+
+    async def analysis(self, max_paths: int = EXPORT_MAX_CRITICAL_PATHS) -> Tuple[Dict, Dict]:
+        """
+        The analyze() result and up to max_paths critical paths. Listing the
+        paths costs little next to the analysis, so the default run includes
+        as many as an export and serves every endpoint.
+        """
+        kind = 'analysis' if max_paths == EXPORT_MAX_CRITICAL_PATHS else ('analysis', max_paths)
+        return await self.get(kind, analyze_activities, None, max_paths)
+
+    async def crashing_options(self) -> Dict:
+        return await self.get('crashing', crashing_options)
+
+@router.post("/analyze-adhoc", response_model=ProjectAnalysisResponse)
+async def analyze_adhoc(request: AdhocAnalysisRequest, allPaths: bool = False, maxPaths: int = 100):
+    """Analyze activities without saving (guest mode)"""
+    if allPaths and not 1 <= maxPaths <= MAX_PATHS_K:
+        raise HTTPException(status_code=400, detail=f"maxPaths must be between 1 and {MAX_PATHS_K}")
+    results = AdhocResults(request)
 
     try:
-        engine = PERTCPMEngine(activities_data)
-        result = engine.analyze()
+        if allPaths:
+            result, critical_paths = await results.analysis(maxPaths)
+        else:
+            result, critical_paths = (await results.analysis())[0], None
 
         activities = []
         for activity in request.activities:
@@ -64,8 +287,12 @@ async def analyze_adhoc(request: AdhocAnalysisRequest):
             projectDuration=result['projectDuration'],
             criticalPath=result['criticalPath'],
             activities=activities,
-            projectVariance=result['projectVariance']
+            projectVariance=result['projectVariance'],
+            criticalPaths=critical_paths['paths'] if critical_paths else None,
+            criticalPathCount=critical_paths['count'] if critical_paths else None
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Adhoc analysis failed: {str(e)}")
 
@@ -75,6 +302,46 @@ async def calculate_adhoc_probability(request: AdhocProbabilityRequest):
     if request.method != "PERT":
         raise HTTPException(status_code=400, detail="Probability analysis only available for PERT projects")
 
+    results = AdhocResults(request)
+
+    try:
+        result, _ = await results.analysis()
+        project_duration = result['projectDuration']
+        project_variance = result['projectVariance'] or 0
+        calc = calculate_probability(project_duration, project_variance, request.deadline)
+        return ProbabilityResponse(**calc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Probability calculation failed: {str(e)}")
+
+@router.post("/analyze-adhoc/probability/sweep")
+async def sweep_adhoc_probability(request: AdhocProbabilitySweepRequest):
+    """Probabilities for many deadlines, and deadlines for confidence levels, in one call (guest mode)"""
+    if request.method != "PERT":
+        raise HTTPException(status_code=400, detail="Probability analysis only available for PERT projects")
+
+    results = AdhocResults(request)
+
+    try:
+        result, _ = await results.analysis()
+        return probability_sweep(
+            result['projectDuration'],
+            result['projectVariance'] or 0,
+            deadlines=request.deadlines,
+            confidence_levels=request.confidenceLevels,
+            points=request.points
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Probability calculation failed: {str(e)}")
+
+@router.post("/analyze-adhoc/simulate")
+async def simulate_adhoc(request: AdhocSimulationRequest):
+    """Monte Carlo schedule risk simulation for adhoc analysis (guest mode)"""
     activities_data = []
     for activity in request.activities:
         activities_data.append({
@@ -84,25 +351,42 @@ async def calculate_adhoc_probability(request: AdhocProbabilityRequest):
             'duration': activity.duration,
             'optimistic': activity.optimistic,
             'mostLikely': activity.mostLikely,
-            'pessimistic': activity.pessimistic,
-            'cost': activity.cost,
-            'crashTime': activity.crashTime,
-            'crashCost': activity.crashCost
+            'pessimistic': activity.pessimistic
         })
 
     try:
-        engine = PERTCPMEngine(activities_data)
-        result = engine.analyze()
-        project_duration = result['projectDuration']
-        project_variance = result['projectVariance'] or 0
-        calc = calculate_probability(project_duration, project_variance, request.deadline)
-        return ProbabilityResponse(**calc)
+        return await offload(
+            simulate_schedule,
+            activities_data,
+            iterations=request.iterations,
+            distribution=request.distribution,
+            seed=request.seed,
+            deadline=request.deadline,
+            bins=request.bins
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Probability calculation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
 
 @router.post("/analyze-adhoc/crashing")
 async def analyze_adhoc_crashing(request: AdhocAnalysisRequest):
     """Calculate crashing options for adhoc analysis (guest mode)"""
+    results = AdhocResults(request)
+
+    try:
+        return await results.crashing_options()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Crashing analysis failed: {str(e)}")
+
+@router.post("/analyze-adhoc/crashing-full")
+async def analyze_adhoc_crashing_full(request: AdhocAnalysisRequest, target_duration: float = None,
+                                      include_snapshots: bool = False):
+    """Comprehensive crashing analysis with iterative scheme"""
     activities_data = []
     for activity in request.activities:
         activities_data.append({
@@ -110,24 +394,27 @@ async def analyze_adhoc_crashing(request: AdhocAnalysisRequest):
             'name': activity.name,
             'predecessors': activity.predecessors or '',
             'duration': activity.duration,
-            'optimistic': activity.optimistic,
-            'mostLikely': activity.mostLikely,
-            'pessimistic': activity.pessimistic,
             'cost': activity.cost,
             'crashTime': activity.crashTime,
             'crashCost': activity.crashCost
         })
 
     try:
-        engine = PERTCPMEngine(activities_data)
-        result = engine.calculate_crashing_options()
-        return result
+        return await offload(crashing_scheme, activities_data, None, target_duration, include_snapshots)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Crashing analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Comprehensive crashing analysis failed: {str(e)}")
+
+@router.post("/analyze-adhoc/crashing-full/stream")
+async def stream_adhoc_crashing_full(request: AdhocAnalysisRequest, target_duration: float = None,
+                                     format: str = "sse"):
+    """Crashing scheme streamed step by step (SSE or NDJSON)"""
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    if len(request.activities) > STREAM_MAX_ACTIVITIES:
+        raise HTTPException(status_code=400, detail=f"Streaming is limited to {STREAM_MAX_ACTIVITIES} activities")
 
-@router.post("/analyze-adhoc/crashing-full")
-async def analyze_adhoc_crashing_full(request: AdhocAnalysisRequest, target_duration: float = None):
-    """Comprehensive crashing analysis with iterative scheme"""
     activities_data = []
     for activity in request.activities:
         activities_data.append({
@@ -142,14 +429,45 @@ async def analyze_adhoc_crashing_full(request: AdhocAnalysisRequest, target_dura
 
     try:
         engine = CrashingEngine(activities_data)
-        result = engine.calculate_crashing_scheme(target_duration)
-        return result
+        return await stream_events(engine.iter_crashing_scheme(target_duration), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Comprehensive crashing analysis failed: {str(e)}")
 
-@router.post("/export-adhoc")
-async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "json"):
-    """Export analysis for guest users without authentication"""
+@router.post("/analyze-adhoc/crashing-curve")
+async def analyze_adhoc_crashing_curve(request: AdhocAnalysisRequest):
+    """Exact time-cost tradeoff curve with the crash plan at every breakpoint"""
+    activities_data = []
+    for activity in request.activities:
+        activities_data.append({
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        })
+
+    try:
+        check_time_cost_size(activities_data)
+        return await offload(time_cost_curve, activities_data)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Time-cost analysis failed: {str(e)}")
+
+@router.post("/analyze-adhoc/crashing-curve/stream")
+async def stream_adhoc_crashing_curve(request: AdhocAnalysisRequest, format: str = "sse"):
+    """Time-cost curve streamed breakpoint by breakpoint (SSE or NDJSON)"""
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    if len(request.activities) > STREAM_MAX_ACTIVITIES:
+        raise HTTPException(status_code=400, detail=f"Streaming is limited to {STREAM_MAX_ACTIVITIES} activities")
+
     activities_data = []
     for activity in request.activities:
         activities_data.append({
@@ -157,18 +475,28 @@ async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "js
             'name': activity.name,
             'predecessors': activity.predecessors or '',
             'duration': activity.duration,
-            'optimistic': activity.optimistic,
-            'mostLikely': activity.mostLikely,
-            'pessimistic': activity.pessimistic,
             'cost': activity.cost,
             'crashTime': activity.crashTime,
             'crashCost': activity.crashCost
         })
 
     try:
-        # Perform analysis
-        engine = PERTCPMEngine(activities_data)
-        analysis_result = engine.analyze()
+        check_time_cost_size(activities_data)
+        engine = CrashingEngine(activities_data)
+        return await stream_events(engine.iter_time_cost_curve(), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Time-cost analysis failed: {str(e)}")
+
+@router.post("/export-adhoc")
+async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "json", diagram: str = "raster"):
+    """Export analysis for guest users without authentication (diagram: 'raster' or 'vector', for PDFs)"""
+    results = AdhocResults(request)
+
+    try:
+        # Perform analysis, or reuse the one of an earlier ad-hoc call
+        analysis_result, critical_paths = await results.analysis()
         
         # Build export data structure
         export_data = {
@@ -209,6 +537,8 @@ async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "js
                 "projectDuration": analysis_result['projectDuration'],
                 "projectVariance": analysis_result['projectVariance'],
                 "criticalPath": analysis_result['criticalPath'],
+                "criticalPaths": critical_paths['paths'],
+                "criticalPathCount": critical_paths['count'],
                 "activities": [
                     {
                         "activityId": act_id,
@@ -236,8 +566,9 @@ async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "js
         
         # Try to get crashing analysis if available
         try:
-            crashing_result = engine.calculate_crashing_options()
-            export_data["solution"]["crashing"] = crashing_result
+            export_data["solution"]["crashing"] = await results.crashing_options()
+        except HTTPException:
+            raise
         except:
             pass
         
@@ -245,16 +576,18 @@ async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "js
         if format.lower() == "pdf":
             # Generate PDF
             try:
-                pdf_buffer = generate_pdf_export(export_data)
+                pdf = await rendered_report(export_data, diagram)
                 filename = f"guest_project_analysis_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
                 
                 return StreamingResponse(
-                    pdf_buffer,
+                    BytesIO(pdf),
                     media_type="application/pdf",
                     headers={
                         "Content-Disposition": f"attachment; filename={filename}"
                     }
                 )
+            except HTTPException:
+                raise
             except Exception as pdf_error:
                 # If PDF generation fails, return error with details
                 import traceback
@@ -272,6 +605,8 @@ async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "js
                 }
             )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -284,18 +619,27 @@ async def export_adhoc_analysis(request: AdhocAnalysisRequest, format: str = "js
 @router.get("/{project_id}/analyze", response_model=ProjectAnalysisResponse)
 async def analyze_project(
     project_id: str,
-    db: Session = Depends(get_db),
+    allPaths: bool = False,
+    maxPaths: int = 100,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Analyze a project and calculate PERT/CPM values"""
-    project = db.query(Project).filter(
+    """
+    Analyze a project and calculate PERT/CPM values.
+    With allPaths=true every critical path is enumerated (up to maxPaths)
+    and the total number of critical paths is reported.
+    """
+    if allPaths and not 1 <= maxPaths <= MAX_PATHS_K:
+        raise HTTPException(status_code=400, detail=f"maxPaths must be between 1 and {MAX_PATHS_K}")
+    
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
     if not activities:
         raise HTTPException(status_code=400, detail="Project has no activities")
     
@@ -316,62 +660,125 @@ async def analyze_project(
         }
         activities_data.append(activity_dict)
     
+    kind = ('analyze', maxPaths if allPaths else None)
+    digest = activity_set_hash(activities_data)
+    predecessors = await uncached_predecessors(db, project_id, digest, kind)
+    
     try:
-        # Perform analysis
-        engine = PERTCPMEngine(activities_data)
-        result = engine.analyze()
-        
-        # Update database with calculated values
-        for activity_id, activity_data in result['activities'].items():
-            db_activity = db.query(Activity).filter(
-                Activity.projectId == project_id,
-                Activity.activityId == activity_id
-            ).first()
-            
-            if db_activity:
-                db_activity.es = activity_data.get('ES')
-                db_activity.ef = activity_data.get('EF')
-                db_activity.ls = activity_data.get('LS')
-                db_activity.lf = activity_data.get('LF')
-                db_activity.slack = activity_data.get('slack')
-                db_activity.isCritical = activity_data.get('isCritical', False)
+        # The worker re-propagates only edited activities when it still holds
+        # the previous schedule of this project
+        (result, critical_paths), cached = await analysis_cache.get_or_compute_async(
+            project_id, activities_data, kind,
+            lambda: offload(analyze_schedule, project_id, activities_data, predecessors, maxPaths if allPaths else None),
+            digest=digest
+        )
         
-        db.commit()
+        # Nothing was re-propagated for a cached result
+        changed = [] if cached else result['changedActivities']
         
-        # Fetch updated activities
-        updated_activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+        # Update database with calculated values in bulk, even for a cached
+        # result: the cache is per process, so another server process may
+        # have stored the schedule of different activity values since. Only
+        # rows that differ are written, and the response rows come from memory.
+        try:
+            updated_activities = await write_schedule(db, activities, result)
+            await db.commit()
+        except Exception:
+            analysis_cache.invalidate(project_id)
+            raise
         
         return ProjectAnalysisResponse(
             projectDuration=result['projectDuration'],
             criticalPath=result['criticalPath'],
             activities=updated_activities,
-            projectVariance=result['projectVariance']
+            projectVariance=result['projectVariance'],
+            changedActivities=changed,
+            criticalPaths=critical_paths['paths'] if critical_paths else None,
+            criticalPathCount=critical_paths['count'] if critical_paths else None
         )
     
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.get("/{project_id}/paths")
+async def get_longest_paths(
+    project_id: str,
+    k: int = 10,
+    maxSlack: float = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The k longest start-to-end paths with their float margin (slack), i.e.
+    the critical and near-critical paths. maxSlack drops paths with more float.
+    """
+    if not 1 <= k <= MAX_PATHS_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {MAX_PATHS_K}")
+    
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
+    if not activities:
+        raise HTTPException(status_code=400, detail="Project has no activities")
+    
+    activities_data = []
+    for activity in activities:
+        activities_data.append({
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'optimistic': activity.optimistic,
+            'mostLikely': activity.mostLikely,
+            'pessimistic': activity.pessimistic,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        })
+    
+    predecessors = await load_predecessor_lists(db, project_id)
+    
+    try:
+        project_duration, paths = await offload(longest_paths, project_id, activities_data, predecessors, k, maxSlack)
+        return {
+            'projectDuration': project_duration,
+            'paths': paths
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Path analysis failed: {str(e)}")
+
 @router.post("/{project_id}/probability", response_model=ProbabilityResponse)
 async def calculate_project_probability(
     project_id: str,
     request: ProbabilityRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Calculate probability of completing by deadline"""
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     if project.method != "PERT":
         raise HTTPException(status_code=400, detail="Probability analysis only available for PERT projects")
     
-    activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
     if not activities:
         raise HTTPException(status_code=400, detail="Project has no activities")
     
@@ -392,70 +799,114 @@ async def calculate_project_probability(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Probability calculation failed: {str(e)}")
 
-@router.get("/{project_id}/crashing")
-async def get_crashing_analysis(
+@router.post("/{project_id}/probability/sweep")
+async def sweep_project_probability(
     project_id: str,
-    db: Session = Depends(get_db),
+    request: ProbabilitySweepRequest,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Calculate project crashing options (time-cost tradeoff)"""
-    project = db.query(Project).filter(
+    """Probabilities for many deadlines, deadlines for confidence levels and the full CDF curve"""
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+    if project.method != "PERT":
+        raise HTTPException(status_code=400, detail="Probability analysis only available for PERT projects")
+    
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
     if not activities:
         raise HTTPException(status_code=400, detail="Project has no activities")
     
-    # Convert activities to dict format for engine
+    # Same duration and critical-path variance as the single-deadline endpoint
+    project_duration = max((a.ef for a in activities if a.ef is not None), default=0)
+    project_variance = 0
+    for activity in activities:
+        if activity.isCritical and activity.pessimistic is not None and activity.optimistic is not None:
+            project_variance += ((activity.pessimistic - activity.optimistic) / 6.0) ** 2
+    
+    try:
+        return probability_sweep(
+            project_duration,
+            project_variance,
+            deadlines=request.deadlines,
+            confidence_levels=request.confidenceLevels,
+            points=request.points
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Probability calculation failed: {str(e)}")
+
+@router.post("/{project_id}/simulate")
+async def simulate_project(
+    project_id: str,
+    request: SimulationRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Monte Carlo simulation of the completion time under duration uncertainty"""
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
+    if not activities:
+        raise HTTPException(status_code=400, detail="Project has no activities")
+
     activities_data = []
     for activity in activities:
-        activity_dict = {
+        activities_data.append({
             'activityId': activity.activityId,
             'name': activity.name,
             'predecessors': activity.predecessors or '',
             'duration': activity.duration,
             'optimistic': activity.optimistic,
             'mostLikely': activity.mostLikely,
-            'pessimistic': activity.pessimistic,
-            'cost': activity.cost,
-            'crashTime': activity.crashTime,
-            'crashCost': activity.crashCost
-        }
-        activities_data.append(activity_dict)
-    
+            'pessimistic': activity.pessimistic
+        })
+
+    predecessors = await load_predecessor_lists(db, project_id)
+
     try:
-        engine = PERTCPMEngine(activities_data)
-        result = engine.calculate_crashing_options()
-        return result
+        return await offload(
+            simulate_schedule,
+            activities_data,
+            iterations=request.iterations,
+            distribution=request.distribution,
+            seed=request.seed,
+            deadline=request.deadline,
+            bins=request.bins,
+            predecessors=predecessors
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Crashing analysis failed: {str(e)}")
-
+        raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
 
-@router.get("/{project_id}/export")
-async def export_analysis(
+@router.get("/{project_id}/crashing")
+async def get_crashing_analysis(
     project_id: str,
-    format: str = "json",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Export complete project analysis including problem definition and solution
-    
-    Args:
-        project_id: The project ID to export
-        format: Export format - 'json' or 'pdf' (default: 'json')
-    """
-    project = db.query(Project).filter(
+    """Calculate project crashing options (time-cost tradeoff)"""
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
     if not activities:
         raise HTTPException(status_code=400, detail="Project has no activities")
     
@@ -476,90 +927,246 @@ async def export_analysis(
         }
         activities_data.append(activity_dict)
     
+    digest = activity_set_hash(activities_data)
+    predecessors = await uncached_predecessors(db, project_id, digest, 'crashing')
+    
     try:
-        # Perform analysis
-        engine = PERTCPMEngine(activities_data)
-        analysis_result = engine.analyze()
-        
-        # Build export data structure
-        export_data = {
-            "metadata": {
-                "projectId": project.id,
-                "projectName": project.name,
-                "method": project.method,
+        result, _ = await analysis_cache.get_or_compute_async(
+            project_id, activities_data, 'crashing',
+            lambda: offload(crashing_options, activities_data, predecessors),
+            digest=digest
+        )
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Crashing analysis failed: {str(e)}")
+
+
+async def project_export_data(db: AsyncSession, project: Project, activities: List[Activity]) -> Dict:
+    """
+    The export document of a project: problem definition, analysis with its
+    critical paths, and crashing options when available. Built for the
+    export endpoint and for export jobs.
+    """
+    # Convert activities to dict format for engine
+    activities_data = []
+    for activity in activities:
+        activity_dict = {
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'optimistic': activity.optimistic,
+            'mostLikely': activity.mostLikely,
+            'pessimistic': activity.pessimistic,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        }
+        activities_data.append(activity_dict)
+    
+    digest = activity_set_hash(activities_data)
+    predecessors = await uncached_predecessors(db, project.id, digest, 'export')
+    
+    # Perform analysis, unless this project content was exported recently
+    (analysis_result, critical_paths, crashing_result), _ = await analysis_cache.get_or_compute_async(
+        project.id, activities_data, 'export',
+        lambda: offload(export_results, activities_data, predecessors, EXPORT_MAX_CRITICAL_PATHS),
+        digest=digest
+    )
+    
+    # Build export data structure
+    export_data = {
+        "metadata": {
+            "projectId": project.id,
+            "projectName": project.name,
+            "method": project.method,
+            "timeUnit": project.timeUnit,
+            "exportDate": datetime.utcnow().isoformat(),
+            "createdAt": project.createdAt.isoformat(),
+            "updatedAt": project.updatedAt.isoformat()
+        },
+        "problem": {
+            "description": f"Project scheduling using {project.method} method",
+            "activities": [
+                {
+                    "activityId": a.activityId,
+                    "name": a.name,
+                    "predecessors": a.predecessors or "None",
+                    "duration": a.duration,
+                    "optimistic": a.optimistic,
+                    "mostLikely": a.mostLikely,
+                    "pessimistic": a.pessimistic,
+                    "cost": a.cost,
+                    "crashTime": a.crashTime,
+                    "crashCost": a.crashCost
+                }
+                for a in activities
+            ],
+            "objectives": [
+                "Determine project completion time",
+                "Identify critical path",
+                "Calculate activity slack times",
+                "Optimize resource allocation"
+            ]
+        },
+        "solution": {
+            "projectDuration": analysis_result['projectDuration'],
+            "projectVariance": analysis_result['projectVariance'],
+            "criticalPath": analysis_result['criticalPath'],
+            "criticalPaths": critical_paths['paths'],
+            "criticalPathCount": critical_paths['count'],
+            "activities": [
+                {
+                    "activityId": act_id,
+                    "ES": act_data['ES'],
+                    "EF": act_data['EF'],
+                    "LS": act_data['LS'],
+                    "LF": act_data['LF'],
+                    "slack": act_data['slack'],
+                    "isCritical": act_data['isCritical'],
+                    "duration": act_data.get('duration', 0),
+                    "variance": act_data.get('variance', 0)
+                }
+                for act_id, act_data in analysis_result['activities'].items()
+            ],
+            "criticalActivitiesCount": len([a for a in analysis_result['activities'].values() if a['isCritical']]),
+            "totalActivities": len(activities),
+            "analysis": {
+                "method": project.method,
                 "timeUnit": project.timeUnit,
-                "exportDate": datetime.utcnow().isoformat(),
-                "createdAt": project.createdAt.isoformat(),
-                "updatedAt": project.updatedAt.isoformat()
-            },
-            "problem": {
-                "description": f"Project scheduling using {project.method} method",
-                "activities": [
-                    {
-                        "activityId": a.activityId,
-                        "name": a.name,
-                        "predecessors": a.predecessors or "None",
-                        "duration": a.duration,
-                        "optimistic": a.optimistic,
-                        "mostLikely": a.mostLikely,
-                        "pessimistic": a.pessimistic,
-                        "cost": a.cost,
-                        "crashTime": a.crashTime,
-                        "crashCost": a.crashCost
-                    }
-                    for a in activities
-                ],
-                "objectives": [
-                    "Determine project completion time",
-                    "Identify critical path",
-                    "Calculate activity slack times",
-                    "Optimize resource allocation"
-                ]
-            },
-            "solution": {
-                "projectDuration": analysis_result['projectDuration'],
-                "projectVariance": analysis_result['projectVariance'],
-                "criticalPath": analysis_result['criticalPath'],
-                "activities": [
-                    {
-                        "activityId": act_id,
-                        "ES": act_data['ES'],
-                        "EF": act_data['EF'],
-                        "LS": act_data['LS'],
-                        "LF": act_data['LF'],
-                        "slack": act_data['slack'],
-                        "isCritical": act_data['isCritical'],
-                        "duration": act_data.get('duration', 0),
-                        "variance": act_data.get('variance', 0)
-                    }
-                    for act_id, act_data in analysis_result['activities'].items()
-                ],
-                "criticalActivitiesCount": len([a for a in analysis_result['activities'].values() if a['isCritical']]),
-                "totalActivities": len(activities),
-                "analysis": {
-                    "method": project.method,
-                    "timeUnit": project.timeUnit,
-                    "criticalPathLength": len(analysis_result['criticalPath']),
-                    "standardDeviation": (analysis_result['projectVariance'] ** 0.5) if analysis_result['projectVariance'] else None
+                "criticalPathLength": len(analysis_result['criticalPath']),
+                "standardDeviation": (analysis_result['projectVariance'] ** 0.5) if analysis_result['projectVariance'] else None
+            }
+        }
+    }
+    
+    # Include crashing analysis if available
+    if crashing_result is not None:
+        export_data["solution"]["crashing"] = crashing_result
+    return export_data
+
+async def crashing_export_data(db: AsyncSession, project: Project, activities: List[Activity],
+                               target_duration: Optional[float] = None) -> Dict:
+    """
+    The crashing export document of a project: problem definition and the
+    comprehensive crashing scheme, for the endpoint and for export jobs
+    """
+    # Convert activities to dict format for engine
+    activities_data = []
+    for activity in activities:
+        activity_dict = {
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        }
+        activities_data.append(activity_dict)
+    
+    kind = ('crashingScheme', target_duration)
+    digest = activity_set_hash(activities_data)
+    predecessors = await uncached_predecessors(db, project.id, digest, kind)
+    
+    # Perform comprehensive crashing analysis
+    crashing_result, _ = await analysis_cache.get_or_compute_async(
+        project.id, activities_data, kind,
+        lambda: offload(crashing_scheme, activities_data, predecessors, target_duration),
+        digest=digest
+    )
+    
+    # Build export data structure
+    export_data = {
+        "metadata": {
+            "projectId": project.id,
+            "projectName": project.name,
+            "method": "Crashing",  # Set method for PDF generator
+            "analysisType": "Project Crashing",
+            "timeUnit": project.timeUnit,
+            "costUnit": getattr(project, 'costUnit', 'NRs.'),  # Include cost unit
+            "exportDate": datetime.utcnow().isoformat(),
+            "createdAt": project.createdAt.isoformat(),
+            "updatedAt": project.updatedAt.isoformat()
+        },
+        "problem": {
+            "description": "Project Crashing - Time-Cost Tradeoff Analysis",
+            "activities": [
+                {
+                    "activityId": a.activityId,
+                    "name": a.name,
+                    "predecessors": a.predecessors or "None",
+                    "duration": a.duration if a.duration else 0,
+                    "normalTime": a.duration if a.duration else 0,
+                    "crashTime": a.crashTime if a.crashTime else 0,
+                    "cost": a.cost if a.cost else 0,
+                    "normalCost": a.cost if a.cost else 0,
+                    "crashCost": a.crashCost if a.crashCost else 0,
+                    "crashSlope": ((a.crashCost or 0) - (a.cost or 0)) / ((a.duration or 1) - (a.crashTime or 0)) if a.duration and a.crashTime and a.duration != a.crashTime else 0
                 }
+                for a in activities if a.duration is not None
+            ],
+            "objectives": [
+                "Determine optimal project acceleration scheme",
+                "Calculate time-cost tradeoff",
+                "Identify activities to crash",
+                "Minimize total project cost"
+            ]
+        },
+        "solution": {
+            **crashing_result,
+            # Add legacy fields for network diagram compatibility
+            "projectDuration": crashing_result.get('finalDuration', crashing_result.get('finalAnalysis', {}).get('projectDuration', 0)),
+            "criticalPath": crashing_result.get('finalCriticalPath', []),
+            "activities": crashing_result.get('finalAnalysis', {}).get('activities', []),
+            "totalActivities": len(activities),
+            "criticalActivitiesCount": len([a for a in crashing_result.get('finalAnalysis', {}).get('activities', []) if a.get('isCritical', False)]),
+            "analysis": {
+                "criticalPathLength": len(crashing_result.get('finalCriticalPath', []))
             }
         }
-        
-        # Try to get crashing analysis if available
-        try:
-            crashing_result = engine.calculate_crashing_options()
-            export_data["solution"]["crashing"] = crashing_result
-        except:
-            pass
+    }
+    return export_data
+
+@router.get("/{project_id}/export")
+async def export_analysis(
+    project_id: str,
+    format: str = "json",
+    diagram: str = "raster",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Export complete project analysis including problem definition and solution
+    
+    Args:
+        project_id: The project ID to export
+        format: Export format - 'json' or 'pdf' (default: 'json')
+        diagram: Network diagram of PDFs - 'raster' (PNG image) or 'vector' (default: 'raster')
+    """
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
+    if not activities:
+        raise HTTPException(status_code=400, detail="Project has no activities")
+    
+    try:
+        export_data = await project_export_data(db, project, activities)
         
         # Return based on format
         if format.lower() == "pdf":
             # Generate PDF
-            pdf_buffer = generate_pdf_export(export_data)
+            pdf = await rendered_report(export_data, diagram)
             filename = f"project_analysis_{project.name.replace(' ', '_')}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
             
             return StreamingResponse(
-                pdf_buffer,
+                BytesIO(pdf),
                 media_type="application/pdf",
                 headers={
                     "Content-Disposition": f"attachment; filename={filename}"
@@ -576,28 +1183,116 @@ async def export_analysis(
                 }
             )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
 
+# Media types of the diagram endpoint, by `format` query value
+DIAGRAM_MEDIA_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png"
+}
+
+@router.get("/{project_id}/diagram")
+async def get_network_diagram(
+    project_id: str,
+    format: str = "svg",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """AON network diagram of a project, as in its PDF report
+    
+    Args:
+        project_id: The project ID
+        format: 'svg' (vector shapes, default) or 'png' (raster image)
+    """
+    format = format.lower()
+    if format not in DIAGRAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(DIAGRAM_MEDIA_TYPES)}")
+    
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
+    if not activities:
+        raise HTTPException(status_code=400, detail="Project has no activities")
+    
+    # Convert activities to dict format for engine
+    activities_data = []
+    for activity in activities:
+        activity_dict = {
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'optimistic': activity.optimistic,
+            'mostLikely': activity.mostLikely,
+            'pessimistic': activity.pessimistic,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        }
+        activities_data.append(activity_dict)
+    
+    digest = activity_set_hash(activities_data)
+    predecessors = await uncached_predecessors(db, project_id, digest, 'export')
+    
+    try:
+        # The analysis of exports, so the diagram matches the report's
+        (analysis_result, critical_paths, _), _ = await analysis_cache.get_or_compute_async(
+            project_id, activities_data, 'export',
+            lambda: offload(export_results, activities_data, predecessors, EXPORT_MAX_CRITICAL_PATHS),
+            digest=digest
+        )
+        
+        # Schedule values on each activity; every critical path highlighted
+        diagram_activities = [
+            {**activity, **analysis_result['activities'][activity['activityId']]}
+            for activity in activities_data
+        ]
+        critical_activities = list(dict.fromkeys(
+            activity_id for path in critical_paths['paths'] for activity_id in path
+        )) or analysis_result['criticalPath']
+        
+        key = await run_in_threadpool(diagram_key, diagram_activities, critical_activities, 'aon', format)
+        content = await run_in_threadpool(artifact_cache.get, key, format)
+        if content is None:
+            content = await offload(render_diagram, diagram_activities, critical_activities, format,
+                                    timeout=CPU_RENDER_TIMEOUT)
+        return Response(content=content, media_type=DIAGRAM_MEDIA_TYPES[format])
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Diagram generation failed: {str(e)}")
+
 @router.post("/{project_id}/crashing-analysis")
 async def analyze_project_crashing(
     project_id: str,
     target_duration: float = None,
-    db: Session = Depends(get_db),
+    include_snapshots: bool = False,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Comprehensive crashing analysis for authenticated project"""
-    project = db.query(Project).filter(
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
     if not activities:
         raise HTTPException(status_code=400, detail="Project has no activities")
     
@@ -615,44 +1310,95 @@ async def analyze_project_crashing(
         }
         activities_data.append(activity_dict)
     
+    predecessors = await load_predecessor_lists(db, project_id)
+    
     try:
-        engine = CrashingEngine(activities_data)
-        result = engine.calculate_crashing_scheme(target_duration)
-        return result
+        return await offload(crashing_scheme, activities_data, predecessors, target_duration, include_snapshots)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Crashing analysis failed: {str(e)}")
 
 
-@router.get("/{project_id}/export/crashing")
-async def export_crashing_analysis(
+@router.post("/{project_id}/crashing-analysis/stream")
+async def stream_project_crashing(
     project_id: str,
-    format: str = "json",
     target_duration: float = None,
-    db: Session = Depends(get_db),
+    format: str = "sse",
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Export comprehensive crashing analysis for a project
+    """
+    Crashing analysis streamed as it runs: an `initial` event, one `step`
+    event per crashing step, then a `final` event (SSE or NDJSON)
+    """
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
     
-    Args:
-        project_id: The project ID to export
-        format: Export format - 'json' or 'pdf' (default: 'json')
-        target_duration: Optional target duration for optimized crashing
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
+    if not activities:
+        raise HTTPException(status_code=400, detail="Project has no activities")
+    if len(activities) > STREAM_MAX_ACTIVITIES:
+        raise HTTPException(status_code=400, detail=f"Streaming is limited to {STREAM_MAX_ACTIVITIES} activities; queue a crashingAnalysis job instead")
+    
+    activities_data = []
+    for activity in activities:
+        activities_data.append({
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        })
+    
+    try:
+        engine = CrashingEngine(activities_data, await load_predecessor_lists(db, project_id))
+        return await stream_events(engine.iter_crashing_scheme(target_duration), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Crashing analysis failed: {str(e)}")
+
+
+@router.get("/{project_id}/crashing-curve/stream")
+async def stream_crashing_curve(
+    project_id: str,
+    format: str = "sse",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Time-cost curve streamed as the solver confirms each breakpoint: a
+    `curve` event with the normal duration and cost, then `breakpoint` events
     """
-    project = db.query(Project).filter(
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    
+    project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    activities = db.query(Activity).filter(Activity.projectId == project_id).all()
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
     if not activities:
         raise HTTPException(status_code=400, detail="Project has no activities")
+    if len(activities) > STREAM_MAX_ACTIVITIES:
+        raise HTTPException(status_code=400, detail=f"Streaming is limited to {STREAM_MAX_ACTIVITIES} activities")
     
-    # Convert activities to dict format for engine
     activities_data = []
     for activity in activities:
-        activity_dict = {
+        activities_data.append({
             'activityId': activity.activityId,
             'name': activity.name,
             'predecessors': activity.predecessors or '',
@@ -660,70 +1406,103 @@ async def export_crashing_analysis(
             'cost': activity.cost,
             'crashTime': activity.crashTime,
             'crashCost': activity.crashCost
-        }
-        activities_data.append(activity_dict)
+        })
     
     try:
-        # Perform comprehensive crashing analysis
-        engine = CrashingEngine(activities_data)
-        crashing_result = engine.calculate_crashing_scheme(target_duration)
-        
-        # Build export data structure
-        export_data = {
-            "metadata": {
-                "projectId": project.id,
-                "projectName": project.name,
-                "method": "Crashing",  # Set method for PDF generator
-                "analysisType": "Project Crashing",
-                "timeUnit": project.timeUnit,
-                "costUnit": getattr(project, 'costUnit', 'NRs.'),  # Include cost unit
-                "exportDate": datetime.utcnow().isoformat(),
-                "createdAt": project.createdAt.isoformat(),
-                "updatedAt": project.updatedAt.isoformat()
-            },
-            "problem": {
-                "description": "Project Crashing - Time-Cost Tradeoff Analysis",
-                "activities": [
-                    {
-                        "activityId": a.activityId,
-                        "name": a.name,
-                        "predecessors": a.predecessors or "None",
-                        "duration": a.duration if a.duration else 0,
-                        "normalTime": a.duration if a.duration else 0,
-                        "crashTime": a.crashTime if a.crashTime else 0,
-                        "cost": a.cost if a.cost else 0,
-                        "normalCost": a.cost if a.cost else 0,
-                        "crashCost": a.crashCost if a.crashCost else 0,
-                        "crashSlope": ((a.crashCost or 0) - (a.cost or 0)) / ((a.duration or 1) - (a.crashTime or 0)) if a.duration and a.crashTime and a.duration != a.crashTime else 0
-                    }
-                    for a in activities if a.duration is not None
-                ],
-                "objectives": [
-                    "Determine optimal project acceleration scheme",
-                    "Calculate time-cost tradeoff",
-                    "Identify activities to crash",
-                    "Minimize total project cost"
-                ]
-            },
-            "solution": {
-                **crashing_result,
-                # Add legacy fields for network diagram compatibility
-                "projectDuration": crashing_result.get('finalDuration', crashing_result.get('finalAnalysis', {}).get('projectDuration', 0)),
-                "criticalPath": crashing_result.get('finalCriticalPath', []),
-                "activities": crashing_result.get('finalAnalysis', {}).get('activities', []),
-                "totalActivities": len(activities),
-                "criticalActivitiesCount": len([a for a in crashing_result.get('finalAnalysis', {}).get('activities', []) if a.get('isCritical', False)]),
-                "analysis": {
-                    "criticalPathLength": len(crashing_result.get('finalCriticalPath', []))
-                }
-            }
-        }
+        predecessors = await load_predecessor_lists(db, project_id)
+        check_time_cost_size(activities_data, predecessors)
+        engine = CrashingEngine(activities_data, predecessors)
+        return await stream_events(engine.iter_time_cost_curve(), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Time-cost analysis failed: {str(e)}")
+
+
+@router.get("/{project_id}/crashing-curve")
+async def get_crashing_curve(
+    project_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exact time-cost tradeoff curve: every breakpoint from the normal to the
+    shortest achievable duration, with its cost and crash plan
+    """
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
+    if not activities:
+        raise HTTPException(status_code=400, detail="Project has no activities")
+    
+    activities_data = []
+    for activity in activities:
+        activities_data.append({
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        })
+    
+    predecessors = await load_predecessor_lists(db, project_id)
+    
+    try:
+        check_time_cost_size(activities_data, predecessors)
+        return await offload(time_cost_curve, activities_data, predecessors)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Time-cost analysis failed: {str(e)}")
+
+
+@router.get("/{project_id}/export/crashing")
+async def export_crashing_analysis(
+    project_id: str,
+    format: str = "json",
+    target_duration: float = None,
+    diagram: str = "raster",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Export comprehensive crashing analysis for a project
+    
+    Args:
+        project_id: The project ID to export
+        format: Export format - 'json' or 'pdf' (default: 'json')
+        target_duration: Optional target duration for optimized crashing
+        diagram: Network diagram of PDFs - 'raster' (PNG image) or 'vector' (default: 'raster')
+    """
+    project = await db.scalar(select(Project).where(
+        Project.id == project_id,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project_id))).all()
+    if not activities:
+        raise HTTPException(status_code=400, detail="Project has no activities")
+    
+    try:
+        export_data = await crashing_export_data(db, project, activities, target_duration)
         
         # Return based on format
         if format.lower() == "pdf":
             # Generate PDF
             try:
-                pdf_buffer = generate_pdf_export(export_data)
+                pdf = await rendered_report(export_data, diagram)
+            except HTTPException:
+                raise
             except Exception as pdf_error:
                 print(f"PDF Generation Error: {str(pdf_error)}")
                 print(f"Error type: {type(pdf_error)}")
@@ -734,7 +1513,7 @@ async def export_crashing_analysis(
             filename = f"crashing_analysis_{project.name.replace(' ', '_')}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
             
             return StreamingResponse(
-                pdf_buffer,
+                BytesIO(pdf),
                 media_type="application/pdf",
                 headers={
                     "Content-Disposition": f"attachment; filename={filename}"
@@ -751,6 +1530,8 @@ async def export_crashing_analysis(
                 }
             )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
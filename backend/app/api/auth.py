@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.models import User
 from app.schemas import schemas
@@ -8,10 +10,10 @@ from app.auth import get_password_hash, verify_password, create_access_token, ge
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/signup", response_model=schemas.Token, status_code=status.HTTP_201_CREATED)
-def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -19,15 +21,15 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username already exists
-    existing_username = db.query(User).filter(User.username == user_data.username).first()
+    existing_username = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user; bcrypt is slow on purpose, so it runs off the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     new_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -35,8 +37,8 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create access token
     access_token = create_access_token(data={"sub": new_user.id})
@@ -48,12 +50,12 @@ def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=schemas.Token)
-def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
     """Login with username and password"""
     # Find user by username
-    user = db.query(User).filter(User.username == credentials.username).first()
+    user = await db.scalar(select(User).where(User.username == credentials.username))
     
-    if not user or not verify_password(credentials.password, user.hashedPassword):
+    if not user or not await run_in_threadpool(verify_password, credentials.password, user.hashedPassword):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -70,6 +72,6 @@ def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.get("/me", response_model=schemas.User)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current authenticated user information"""
     return current_user
@@ -0,0 +1,200 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List
+from datetime import datetime
+import asyncio
+import json
+import os
+from app.database import get_db
+from app.models.models import Project, Activity, Job, User
+from app.schemas.schemas import Job as JobSchema, JobCreate
+from app.auth import get_current_user
+from app.api.analysis import crashing_export_data, offload, project_export_data, rendered_report
+from app.services.analysis_tasks import crashing_scheme
+from app.services.dependencies import load_predecessor_lists
+from app.services.jobs import JobArtifact, job_runner
+from app.services.pdf_export import DIAGRAM_RENDERERS
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+EXPORT_FORMATS = ("json", "pdf")
+MAX_JOB_LISTING = 100
+
+@router.post("", response_model=JobSchema, status_code=202)
+async def create_job(
+    job: JobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue an export or a crashing analysis of a project. Poll GET /jobs/{id}
+    for its progress and download GET /jobs/{id}/result once it succeeded.
+    """
+    if job.kind not in job_runner.handlers:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(job_runner.handlers)}")
+    if job.format.lower() not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if job.diagram not in DIAGRAM_RENDERERS:
+        raise HTTPException(status_code=400, detail=f"diagram must be one of: {', '.join(DIAGRAM_RENDERERS)}")
+
+    project = await db.scalar(select(Project).where(
+        Project.id == job.projectId,
+        Project.userId == current_user.id
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    db_job = Job(
+        userId=current_user.id,
+        projectId=project.id,
+        kind=job.kind,
+        params=json.dumps({
+            'format': job.format.lower(),
+            'diagram': job.diagram,
+            'targetDuration': job.targetDuration,
+            'includeSnapshots': job.includeSnapshots
+        })
+    )
+    db.add(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    job_runner.notify()
+    return db_job
+
+@router.get("", response_model=List[JobSchema])
+async def get_jobs(
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The current user's most recent jobs, newest first"""
+    if not 1 <= limit <= MAX_JOB_LISTING:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_JOB_LISTING}")
+    jobs = await db.scalars(
+        select(Job)
+        .where(Job.userId == current_user.id)
+        .order_by(Job.createdAt.desc())
+        .limit(limit)
+    )
+    return jobs.all()
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Status and progress of a job"""
+    job = await db.scalar(select(Job).where(Job.id == job_id, Job.userId == current_user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download the result of a succeeded job"""
+    job = await db.scalar(select(Job).where(Job.id == job_id, Job.userId == current_user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == 'failed':
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != 'succeeded':
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if not job.resultPath or not await asyncio.to_thread(os.path.exists, job.resultPath):
+        raise HTTPException(status_code=410, detail="Job result is no longer available")
+
+    return FileResponse(job.resultPath, media_type=job.resultType, filename=job.resultName)
+
+@router.delete("/{job_id}")
+async def delete_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete a job and its result. A running job finishes, but its result is discarded."""
+    job = await db.scalar(select(Job).where(Job.id == job_id, Job.userId == current_user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    path = job.resultPath
+    await db.delete(job)
+    await db.commit()
+    if path:
+        await asyncio.to_thread(job_runner.remove_result, path)
+    return {"message": "Job deleted successfully"}
+
+
+# Job handlers: run by the job runner, not in a request
+
+async def load_job_project(db: AsyncSession, job: Job):
+    """The job's project and its activities, still owned by the job's user"""
+    project = await db.scalar(select(Project).where(
+        Project.id == job.projectId,
+        Project.userId == job.userId
+    ))
+    if not project:
+        raise ValueError("Project not found")
+
+    activities = (await db.scalars(select(Activity).where(Activity.projectId == project.id))).all()
+    if not activities:
+        raise ValueError("Project has no activities")
+    return project, activities
+
+async def export_artifact(export_data: Dict, params: Dict, file_prefix: str, project: Project, progress) -> JobArtifact:
+    """The export document as a JSON file, or rendered as a PDF report"""
+    filename = f"{file_prefix}_{project.name.replace(' ', '_')}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    if params.get('format', 'json') == "pdf":
+        await progress(0.5, 'rendering')
+        pdf = await rendered_report(export_data, params.get('diagram', 'raster'))
+        return JobArtifact(pdf, "application/pdf", f"{filename}.pdf")
+    content = json.dumps(export_data, ensure_ascii=False, allow_nan=False).encode("utf-8")
+    return JobArtifact(content, "application/json", f"{filename}.json")
+
+@job_runner.handler("export")
+async def run_export(db: AsyncSession, job: Job, params: Dict, progress) -> JobArtifact:
+    await progress(0.05, 'loading')
+    project, activities = await load_job_project(db, job)
+    await progress(0.1, 'analyzing')
+    export_data = await project_export_data(db, project, activities)
+    return await export_artifact(export_data, params, "project_analysis", project, progress)
+
+@job_runner.handler("crashingExport")
+async def run_crashing_export(db: AsyncSession, job: Job, params: Dict, progress) -> JobArtifact:
+    await progress(0.05, 'loading')
+    project, activities = await load_job_project(db, job)
+    await progress(0.1, 'analyzing')
+    export_data = await crashing_export_data(db, project, activities, params.get('targetDuration'))
+    return await export_artifact(export_data, params, "crashing_analysis", project, progress)
+
+@job_runner.handler("crashingAnalysis")
+async def run_crashing_analysis(db: AsyncSession, job: Job, params: Dict, progress) -> JobArtifact:
+    await progress(0.05, 'loading')
+    project, activities = await load_job_project(db, job)
+
+    # Convert activities to dict format for engine
+    activities_data = []
+    for activity in activities:
+        activity_dict = {
+            'activityId': activity.activityId,
+            'name': activity.name,
+            'predecessors': activity.predecessors or '',
+            'duration': activity.duration,
+            'cost': activity.cost,
+            'crashTime': activity.crashTime,
+            'crashCost': activity.crashCost
+        }
+        activities_data.append(activity_dict)
+
+    predecessors = await load_predecessor_lists(db, project.id)
+
+    await progress(0.1, 'analyzing')
+    result = await offload(crashing_scheme, activities_data, predecessors,
+                           params.get('targetDuration'), params.get('includeSnapshots', False))
+    filename = f"crashing_scheme_{project.name.replace(' ', '_')}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
+    return JobArtifact(json.dumps(result, allow_nan=False).encode("utf-8"), "application/json", filename)
@@ -1,26 +1,110 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Optional
+from datetime import datetime
+import base64
+import binascii
+import json
 from app.database import get_db
-from app.models.models import Project, User
-from app.schemas.schemas import Project as ProjectSchema, ProjectCreate
+from app.models.models import Project, Activity, Dependency, Job, User
+from app.schemas.schemas import Project as ProjectSchema, ProjectCreate, ProjectPage
 from app.auth import get_current_user
+from app.services.analysis_cache import analysis_cache
 
 router = APIRouter()
 
-@router.get("", response_model=List[ProjectSchema])
+# Columns the project listing can be sorted by
+PROJECT_SORT_COLUMNS = {
+    'updatedAt': Project.updatedAt,
+    'createdAt': Project.createdAt,
+    'name': Project.name
+}
+MAX_PROJECT_PAGE = 100
+
+def encode_cursor(value, project_id: str) -> str:
+    """Opaque keyset cursor: the sort value and ID of the last project on a page"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, project_id]).encode()).decode()
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        value, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort != 'name':
+            value = datetime.fromisoformat(value)
+        return value, str(project_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+@router.get("", response_model=ProjectPage)
 async def get_projects(
-    db: Session = Depends(get_db),
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "updatedAt",
+    order: str = "desc",
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all projects for the current user"""
-    projects = db.query(Project).filter(Project.userId == current_user.id).all()
-    return projects
+    """
+    Summaries of the current user's projects (activity count and last
+    analyzed duration, no activities), one page at a time. Pass the returned
+    nextCursor as `cursor` with the same sort and order for the next page.
+    """
+    if not 1 <= limit <= MAX_PROJECT_PAGE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PROJECT_PAGE}")
+    if sort not in PROJECT_SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(PROJECT_SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    
+    sort_column = PROJECT_SORT_COLUMNS[sort]
+    # One query. The aggregates are correlated subqueries over the
+    # (projectId, activityId) index, evaluated only for the projects on the
+    # page, where a GROUP BY join would aggregate every project first.
+    activity_count = (
+        select(func.count(Activity.id)).where(Activity.projectId == Project.id).scalar_subquery()
+    )
+    last_duration = (
+        select(func.max(Activity.ef)).where(Activity.projectId == Project.id).scalar_subquery()
+    )
+    query = (
+        select(
+            Project.id, Project.name, Project.method, Project.timeUnit, Project.createdAt, Project.updatedAt,
+            activity_count.label('activityCount'),
+            last_duration.label('lastDuration')
+        )
+        .where(Project.userId == current_user.id)
+    )
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        key = tuple_(sort_column, Project.id)
+        query = query.where(key < tuple_(*after) if order == "desc" else key > tuple_(*after))
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), Project.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Project.id.asc())
+    
+    # One extra row tells whether another page follows
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], sort), rows[-1].id)
+    return {
+        "items": [row._asdict() for row in rows],
+        "nextCursor": next_cursor
+    }
 
 @router.post("", response_model=ProjectSchema)
 async def create_project(
     project: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new project for the current user"""
@@ -31,21 +115,23 @@ async def create_project(
         userId=current_user.id
     )
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
+    # A new project has no activities; record that so serialization needs no lazy load
+    set_committed_value(db_project, "activities", [])
     return db_project
 
 @router.get("/{project_id}", response_model=ProjectSchema)
 async def get_project(
     project_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific project"""
-    project = db.query(Project).filter(
+    """Get a specific project with its activities"""
+    project = await db.scalar(select(Project).options(selectinload(Project.activities)).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
@@ -54,38 +140,45 @@ async def get_project(
 async def update_project(
     project_id: str,
     project_update: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a project"""
-    db_project = db.query(Project).filter(
+    db_project = await db.scalar(select(Project).options(selectinload(Project.activities)).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     db_project.name = project_update.name
     db_project.method = project_update.method
     db_project.timeUnit = project_update.timeUnit
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    analysis_cache.invalidate(project_id)
+    await db.refresh(db_project, ["updatedAt"])
     return db_project
 
 @router.delete("/{project_id}")
 async def delete_project(
     project_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a project"""
-    db_project = db.query(Project).filter(
+    db_project = await db.scalar(select(Project).where(
         Project.id == project_id,
         Project.userId == current_user.id
-    ).first()
+    ))
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    db.delete(db_project)
-    db.commit()
+    # Bulk deletes: the ORM cascade would load every activity and edge first
+    await db.execute(delete(Dependency).where(Dependency.projectId == project_id))
+    await db.execute(delete(Activity).where(Activity.projectId == project_id))
+    await db.delete(db_project)
+    # The project's jobs and result files go with the next job cleanup
+    await db.execute(update(Job).where(Job.projectId == project_id).values(expiresAt=datetime.utcnow()))
+    await db.commit()
+    analysis_cache.invalidate(project_id)
     return {"message": "Project deleted successfully"}
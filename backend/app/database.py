@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -6,6 +8,34 @@ import os
 # For development, use SQLite. In production, use PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./projectpath.db")
 
+# Async drivers used by the request handlers for each backend
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "postgres": "asyncpg"
+}
+
+def async_database_url(url: str) -> str:
+    """The same database with its async driver (asyncpg / aiosqlite)"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return url.set(drivername=f"{'postgresql' if backend == 'postgres' else backend}+{ASYNC_DRIVERS[backend]}") \
+        .render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
+# Connection pool of the async engine. Connections are checked before use
+# (pre-ping) and replaced after DB_POOL_RECYCLE seconds, so ones dropped by
+# the server or a proxy are never handed to a request.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+# Synchronous engine and sessions, used at startup for table creation and
+# migrations and by scripts; request handlers use the async engine below
 if "sqlite" in DATABASE_URL:
     engine = create_engine(
         DATABASE_URL, connect_args={"check_same_thread": False}
@@ -15,11 +45,21 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True
+)
+
+# Objects stay loaded after commit: an expired attribute would need a lazy
+# load, which async sessions cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
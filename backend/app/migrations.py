@@ -0,0 +1,85 @@
+"""
+Versioned schema migrations, applied in order at startup.
+
+Base.metadata.create_all() only creates missing tables; changes to existing
+tables and data backfills go here instead. Applied versions are recorded in
+the schema_version table, and each migration runs in one transaction with
+its record, so a failed migration is retried on the next start.
+"""
+from typing import Callable, List, Tuple
+from datetime import datetime
+import logging
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from app.models.models import Activity, Dependency, Project
+from app.services.dependencies import backfill_dependencies
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("appliedAt", DateTime, nullable=False)
+)
+
+
+def create_dependencies(connection: Connection):
+    Dependency.__table__.create(connection, checkfirst=True)
+    backfill_dependencies(connection)
+
+
+def index_activity_lookups(connection: Connection):
+    duplicates = connection.execute(
+        select(Activity.projectId, Activity.activityId, func.count())
+        .group_by(Activity.projectId, Activity.activityId)
+        .having(func.count() > 1)
+        .limit(20)
+    ).all()
+    if duplicates:
+        described = ', '.join(f"'{activity_id}' x{count} in project {project_id}"
+                              for project_id, activity_id, count in duplicates)
+        raise RuntimeError(
+            f"Cannot make activity IDs unique per project, duplicates exist: {described}. "
+            "Rename or delete the duplicates and restart."
+        )
+    for table in (Activity.__table__, Project.__table__):
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# (version, description, migration) in the order they are applied
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Dependency edge table backfilled from activity predecessors", create_dependencies),
+    (2, "Unique (projectId, activityId) index on activities, index on projects.userId", index_activity_lookups),
+]
+
+
+def current_version(engine: Engine) -> int:
+    """Latest applied migration version, 0 for a fresh database"""
+    metadata.create_all(engine)
+    with engine.connect() as connection:
+        versions = list(connection.scalars(select(schema_version.c.version)))
+    return max(versions, default=0)
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply every migration newer than the recorded version; returns the versions applied"""
+    version = current_version(engine)
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        logger.info("Applying migration %d: %s", number, description)
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(insert(schema_version).values(
+                version=number,
+                description=description,
+                appliedAt=datetime.utcnow()
+            ))
+        applied.append(number)
+    return applied
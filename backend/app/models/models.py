@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Boolean, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -22,11 +22,12 @@ class Project(Base):
     name = Column(String, nullable=False)
     method = Column(String, nullable=False)  # CPM, PERT, or Crashing
     timeUnit = Column(String, nullable=False)  # days, weeks, months
-    userId = Column(String, ForeignKey("users.id"), nullable=False)
+    userId = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     activities = relationship("Activity", back_populates="project", cascade="all, delete-orphan")
+    dependencies = relationship("Dependency", cascade="all, delete-orphan")
     user = relationship("User", back_populates="projects")
 
 class Activity(Base):
@@ -60,3 +61,71 @@ class Activity(Base):
     isCritical = Column(Boolean, default=False)
 
     project = relationship("Project", back_populates="activities")
+
+    # Activity IDs are unique within a project. The index also serves every
+    # lookup of a project's activities, being led by projectId.
+    __table_args__ = (
+        Index("uq_activities_project_activity", "projectId", "activityId", unique=True),
+    )
+
+class Dependency(Base):
+    """
+    One edge of the project network: `successorId` depends on `predecessorId`.
+    Both are user-defined activity IDs, mirroring Activity.predecessors, which
+    stays the source text shown in the API; `position` keeps its order.
+    """
+    __tablename__ = "dependencies"
+
+    projectId = Column(String, ForeignKey("projects.id"), primary_key=True)
+    successorId = Column(String, primary_key=True)
+    position = Column(Integer, primary_key=True)
+    predecessorId = Column(String, nullable=False)
+
+    # The primary key serves graph loading and "what does X depend on" in
+    # listed order; this index serves "what depends on X"
+    __table_args__ = (
+        Index("ix_dependencies_project_predecessor", "projectId", "predecessorId"),
+        # Rows are stored in primary key order on SQLite, so loading a
+        # project's graph is one range scan with no per-row table lookups
+        {"sqlite_with_rowid": False},
+    )
+
+class Job(Base):
+    """
+    A background job (an export or a long analysis) queued in the database.
+    Any server process may claim a queued job; while it runs, the heartbeat
+    renews its lease, and a job whose lease lapsed (its server stopped) is
+    queued again.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    userId = Column(String, ForeignKey("users.id"), nullable=False)
+    projectId = Column(String, nullable=False)  # no foreign key: a deleted project's jobs expire, and are removed with their files
+    kind = Column(String, nullable=False)  # export, crashingExport or crashingAnalysis
+    params = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    progress = Column(Float, nullable=False, default=0.0)  # 0 to 1
+    stage = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    workerId = Column(String, nullable=True)  # runner holding the lease
+    
+    # Artifact on disk, once succeeded
+    resultPath = Column(String, nullable=True)
+    resultName = Column(String, nullable=True)
+    resultType = Column(String, nullable=True)
+    resultSize = Column(Integer, nullable=True)
+    
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    runAfter = Column(DateTime, nullable=True)  # not claimed before, when retried
+    startedAt = Column(DateTime, nullable=True)
+    heartbeatAt = Column(DateTime, nullable=True)
+    finishedAt = Column(DateTime, nullable=True)
+    expiresAt = Column(DateTime, nullable=True)  # result and job are deleted after
+
+    # Claiming scans queued jobs oldest first; listings are per user
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "createdAt"),
+        Index("ix_jobs_user_created", "userId", "createdAt"),
+    )
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
+from app.services.monte_carlo import MAX_BINS, MAX_ITERATIONS
 
 # User schemas
 class UserBase(BaseModel):
@@ -76,6 +77,17 @@ class Project(ProjectBase):
     class Config:
         from_attributes = True
 
+class ProjectSummary(ProjectBase):
+    id: str
+    createdAt: datetime
+    updatedAt: datetime
+    activityCount: int
+    lastDuration: Optional[float] = None  # project duration of the last analysis
+
+class ProjectPage(BaseModel):
+    items: List[ProjectSummary]
+    nextCursor: Optional[str] = None  # pass as `cursor` for the next page
+
 class AdhocAnalysisRequest(BaseModel):
     method: str
     timeUnit: str
@@ -87,11 +99,36 @@ class AdhocProbabilityRequest(BaseModel):
     deadline: float
     activities: List[ActivityBase]
 
+class ProbabilitySweepRequest(BaseModel):
+    deadlines: Optional[List[float]] = None
+    confidenceLevels: Optional[List[float]] = None  # e.g. 0.8 for P80
+    points: int = 101  # samples of the returned CDF curve
+
+class AdhocProbabilitySweepRequest(ProbabilitySweepRequest):
+    method: str
+    timeUnit: str
+    activities: List[ActivityBase]
+
+class SimulationRequest(BaseModel):
+    iterations: int = Field(10000, ge=1, le=MAX_ITERATIONS)
+    distribution: str = "beta-pert"  # beta-pert or triangular
+    seed: Optional[int] = None
+    deadline: Optional[float] = None
+    bins: int = Field(50, ge=1, le=MAX_BINS)
+
+class AdhocSimulationRequest(SimulationRequest):
+    method: str
+    timeUnit: str
+    activities: List[ActivityBase]
+
 class ProjectAnalysisResponse(BaseModel):
     projectDuration: float
     criticalPath: List[str]
     activities: List[Activity]
     projectVariance: Optional[float] = None
+    changedActivities: Optional[List[str]] = None  # None after a full recomputation
+    criticalPaths: Optional[List[List[str]]] = None  # only when requested with allPaths
+    criticalPathCount: Optional[int] = None
 
 class ProbabilityRequest(BaseModel):
     deadline: float
@@ -100,3 +137,32 @@ class ProbabilityResponse(BaseModel):
     probability: float
     zscore: float
     stdDeviation: float
+
+# Job schemas
+class JobCreate(BaseModel):
+    kind: str  # export, crashingExport or crashingAnalysis
+    projectId: str
+    format: str = "json"  # json or pdf, for exports
+    diagram: str = "raster"  # network diagram of PDF exports: raster or vector
+    targetDuration: Optional[float] = None  # crashing jobs only
+    includeSnapshots: bool = False  # crashingAnalysis only
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    projectId: str
+    status: str  # queued, running, succeeded or failed
+    progress: float
+    stage: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int
+    createdAt: datetime
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+    expiresAt: Optional[datetime] = None  # the job and its result are deleted after
+    resultName: Optional[str] = None
+    resultType: Optional[str] = None
+    resultSize: Optional[int] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,397 @@
+"""Parsing and validation of bulk activity imports"""
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import codecs
+import csv
+import io
+import json
+from pydantic import ValidationError
+from app.schemas.schemas import ActivityCreate
+from app.services.compiled_network import CycleError, order_activities, parse_predecessors
+
+# Upper bound on rows per import request
+MAX_IMPORT_ROWS = 10_000
+
+# CSV header names are matched case-insensitively against these
+IMPORT_FIELDS = tuple(ActivityCreate.model_fields)
+
+# Streamed imports: formats, rows per INSERT, and an upper bound on rows
+STREAM_FORMATS = ('csv', 'ndjson')
+STREAM_WRITE_CHUNK = 1000
+MAX_STREAM_ROWS = 1_000_000
+
+# Row errors kept in an import report; later ones are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Longest CSV record or NDJSON line of a streamed import, in characters
+MAX_RECORD_CHARS = 1 << 20
+
+
+def parse_json_rows(body: bytes) -> List[Dict]:
+    """Rows of a JSON body: a list of activities or {"activities": [...]}"""
+    try:
+        data = json.loads(body or b'null')
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if isinstance(data, dict):
+        data = data.get('activities')
+    if not isinstance(data, list):
+        raise ValueError('Expected a list of activities or {"activities": [...]}')
+    if len(data) > MAX_IMPORT_ROWS:
+        raise ValueError(f"At most {MAX_IMPORT_ROWS} activities per import")
+    return data
+
+
+def csv_columns(header: List[str]) -> List[Optional[str]]:
+    """Map a CSV header row to activity field names (None for blank columns)"""
+    known = {field.lower(): field for field in IMPORT_FIELDS}
+    columns = [known.get(name.strip().lower()) for name in header]
+    unknown = [name for name, field in zip(header, columns) if field is None and name.strip()]
+    if unknown:
+        raise ValueError(f"Unknown CSV columns: {', '.join(unknown)} (use: {', '.join(IMPORT_FIELDS)})")
+    if 'activityId' not in columns:
+        raise ValueError("CSV needs an activityId column")
+    return columns
+
+
+def csv_row(columns: List[Optional[str]], cells: List[str]) -> Dict:
+    """One CSV record as activity fields; empty cells become null"""
+    return {field: cell.strip() or None for field, cell in zip(columns, cells) if field is not None}
+
+
+def parse_csv_rows(body: bytes) -> List[Dict]:
+    """
+    Rows of a CSV body with a header row of activity field names. Empty
+    cells become null; predecessor lists containing commas must be quoted.
+    """
+    try:
+        text = body.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError("CSV must be UTF-8 encoded")
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if not header:
+        raise ValueError("CSV has no header row")
+    columns = csv_columns(header)
+
+    rows = []
+    for cells in reader:
+        if not any(cell.strip() for cell in cells):
+            continue
+        if len(rows) == MAX_IMPORT_ROWS:
+            raise ValueError(f"At most {MAX_IMPORT_ROWS} activities per import")
+        rows.append(csv_row(columns, cells))
+    return rows
+
+
+def csv_quoted_after(line: str, quoted: bool) -> bool:
+    """
+    Whether a CSV record is inside a quoted field at the end of `line`, given
+    whether it was at its start. Follows csv.reader: a quote opens a field
+    only as its first character, doubles inside one, and is a literal
+    character anywhere else (as in O"Brien).
+    """
+    i = line.find('"')
+    while i >= 0:
+        if quoted:
+            if line.startswith('"', i + 1):
+                i += 1
+            else:
+                quoted = False
+        elif i == 0 or line[i - 1] == ',':
+            quoted = True
+        i = line.find('"', i + 1)
+    return quoted
+
+
+def row_error(row: int, activity_id: Optional[str], field: Optional[str], message: str) -> Dict:
+    return {'row': row, 'activityId': activity_id, 'field': field, 'message': message}
+
+
+def cycle_errors(predecessors: Dict[str, Optional[str]], rows: Dict[str, int]) -> List[Dict]:
+    """
+    Row errors for the imported activities (activity ID -> row in `rows`)
+    that lie on a dependency cycle of the full project, given every
+    activity's predecessors
+    """
+    graph: Dict[str, List[str]] = {activity_id: [] for activity_id in predecessors}
+    for activity_id, listed in predecessors.items():
+        for predecessor in parse_predecessors(listed):
+            if predecessor in graph and predecessor != activity_id:
+                graph[predecessor].append(activity_id)
+    try:
+        order_activities(list(graph), graph)
+    except CycleError as e:
+        errors = []
+        for cycle in e.cycles:
+            described = ' -> '.join(cycle + cycle[:1])
+            for activity_id in cycle:
+                if activity_id in rows:
+                    errors.append(row_error(rows[activity_id], activity_id, 'predecessors', f"Dependency cycle: {described}"))
+        return errors
+    return []
+
+
+def validate_rows(rows: List, existing: Dict[str, Optional[str]]) -> Tuple[List[ActivityCreate], List[Dict]]:
+    """
+    Validate a whole import batch against the project's `existing`
+    activities (activity ID -> predecessors). Returns the parsed activities
+    and one error per problem, with 1-based row numbers: field errors,
+    IDs duplicated in the batch or already in the project, unknown or
+    self-referencing predecessors, and dependency cycles.
+    """
+    activities: List[Tuple[int, ActivityCreate]] = []
+    errors = []
+    for row, data in enumerate(rows, start=1):
+        if not isinstance(data, dict):
+            errors.append(row_error(row, None, None, "Expected an object"))
+            continue
+        try:
+            activity = ActivityCreate.model_validate(data)
+        except ValidationError as e:
+            for error in e.errors():
+                field = '.'.join(str(part) for part in error['loc']) or None
+                errors.append(row_error(row, data.get('activityId'), field, error['msg']))
+            continue
+        activity.activityId = activity.activityId.strip()
+        activities.append((row, activity))
+
+    first_row: Dict[str, int] = {}
+    for row, activity in activities:
+        activity_id = activity.activityId
+        if not activity_id:
+            errors.append(row_error(row, activity_id, 'activityId', "Activity ID is empty"))
+        elif activity_id in existing:
+            errors.append(row_error(row, activity_id, 'activityId', "Activity ID already exists in the project"))
+        elif activity_id in first_row:
+            errors.append(row_error(row, activity_id, 'activityId', f"Duplicate activity ID (first used in row {first_row[activity_id]})"))
+        else:
+            first_row[activity_id] = row
+
+    known = set(existing) | set(first_row)
+    for row, activity in activities:
+        for predecessor in parse_predecessors(activity.predecessors):
+            if predecessor == activity.activityId:
+                errors.append(row_error(row, activity.activityId, 'predecessors', "Activity cannot be its own predecessor"))
+            elif predecessor not in known:
+                errors.append(row_error(row, activity.activityId, 'predecessors', f"Unknown predecessor '{predecessor}'"))
+
+    if not errors:
+        # Cycles can also run through activities already in the project
+        predecessors = dict(existing)
+        predecessors.update((activity.activityId, activity.predecessors) for _, activity in activities)
+        errors.extend(cycle_errors(predecessors, first_row))
+
+    errors.sort(key=lambda error: error['row'])
+    return [activity for _, activity in activities], errors
+
+
+class StreamingImport:
+    """
+    Incremental ingestion of a CSV or NDJSON upload. Bytes are fed as they
+    arrive; every complete record is validated at once and handed back, in
+    chunks of STREAM_WRITE_CHUNK rows, ready to be inserted. Buffered input
+    is bounded by one chunk and one record of at most MAX_RECORD_CHARS; a
+    longer record (say, a stray quote leaving a CSV field open) fails the
+    import at its row. What does grow with the file is the map of activity
+    IDs seen so far, about 100 bytes per row, which checking IDs and
+    predecessors across the whole file cannot do without.
+
+    Predecessors must name an existing or imported activity, but may appear
+    later in the file. Only such forward references (or imported IDs that
+    existing activities already named) can close a dependency cycle, so
+    `needs_cycle_check` tells whether check_cycles() has to run once the
+    rows are written.
+    """
+
+    def __init__(self, project_id: str, format: str, existing: Dict[str, Optional[str]],
+                 total_bytes: Optional[int] = None):
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"Unknown import format '{format}' (use one of: {', '.join(STREAM_FORMATS)})")
+        self.project_id = project_id
+        self.format = format
+        self.existing = set(existing)
+        self.awaited = {
+            predecessor for listed in existing.values() for predecessor in parse_predecessors(listed)
+        } - self.existing
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.partial_line = ''
+        self.record = ''
+        self.quoted = False
+        self.columns: Optional[List[Optional[str]]] = None
+        self.rows_by_id: Dict[str, int] = {}
+        self.unresolved: Dict[str, List[Tuple[int, str]]] = {}
+        self.needs_cycle_check = False
+        self.chunk: List[Dict] = []
+        self.errors: List[Dict] = []
+        self.progress = {
+            'status': 'running',
+            'format': format,
+            'bytesRead': 0,
+            'totalBytes': total_bytes,
+            'rowsRead': 0,
+            'rowsWritten': 0,
+            'errorCount': 0,
+            'startedAt': datetime.utcnow().isoformat(),
+            'finishedAt': None
+        }
+
+    def feed(self, data: bytes) -> Iterator[List[Dict]]:
+        """
+        Consume a piece of the upload, yielding every chunk of rows to insert
+        as soon as it is full (a single piece may hold many chunks)
+        """
+        self.progress['bytesRead'] += len(data)
+        text = self.partial_line + self.decoder.decode(data)
+        start = 0
+        end = text.find('\n')
+        while end >= 0:
+            self._line(text[start:end])
+            if len(self.chunk) >= STREAM_WRITE_CHUNK:
+                yield self._take()
+            start = end + 1
+            end = text.find('\n', start)
+        self.partial_line = text[start:]
+        self._check_length(len(self.record) + len(self.partial_line))
+
+    def finish(self) -> List[Dict]:
+        """End of the upload; returns the remaining rows to insert"""
+        self._line(self.partial_line + self.decoder.decode(b'', final=True))
+        self.partial_line = ''
+        if self.record:
+            self.error(None, None, "Unterminated quoted CSV field at end of file")
+        for predecessor, references in self.unresolved.items():
+            for row, activity_id in references:
+                self.error(row, activity_id, f"Unknown predecessor '{predecessor}'", 'predecessors')
+        return self._take()
+
+    def check_cycles(self, predecessors: Dict[str, Optional[str]]):
+        """Record cycle errors, given every activity of the project after the import"""
+        for error in cycle_errors(predecessors, self.rows_by_id):
+            self.error(error['row'], error['activityId'], error['message'], error['field'])
+
+    def written(self, count: int):
+        self.progress['rowsWritten'] += count
+
+    def close(self, status: str):
+        self.progress['status'] = status
+        self.progress['finishedAt'] = datetime.utcnow().isoformat()
+
+    def error(self, row: Optional[int], activity_id: Optional[str], message: str, field: Optional[str] = None):
+        self.progress['errorCount'] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(row_error(row, activity_id, field, message))
+
+    def report(self) -> Dict:
+        return {**self.progress, 'errors': sorted(self.errors, key=lambda error: error['row'] or 0)}
+
+    def _take(self) -> List[Dict]:
+        # Once a row failed nothing will be committed, so stop handing out rows
+        chunk = self.chunk if not self.progress['errorCount'] else []
+        self.chunk = []
+        return chunk
+
+    def _line(self, line: str):
+        if line.endswith('\r'):
+            line = line[:-1]
+        if self.format == 'ndjson':
+            if not line.strip():
+                return
+            row = self._next_row()
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                self.error(row, None, f"Invalid JSON: {e}")
+                return
+            self._row(row, data)
+            return
+
+        # A CSV record ends on a line that leaves no quoted field open
+        self.record = f"{self.record}\n{line}" if self.record else line
+        self.quoted = csv_quoted_after(line, self.quoted)
+        if self.quoted:
+            self._check_length(len(self.record))
+            return
+        cells = next(csv.reader([self.record]), [])
+        self.record = ''
+        if self.columns is None:
+            if any(cell.strip() for cell in cells):
+                self.columns = csv_columns(cells)
+            return
+        if any(cell.strip() for cell in cells):
+            self._row(self._next_row(), csv_row(self.columns, cells))
+
+    def _check_length(self, length: int):
+        """Fail the import once the record being read outgrows MAX_RECORD_CHARS"""
+        if length > MAX_RECORD_CHARS:
+            hint = " (check for an unbalanced quote)" if self.format == 'csv' else ''
+            raise ValueError(f"Row {self.progress['rowsRead'] + 1} is longer than {MAX_RECORD_CHARS} characters{hint}")
+
+    def _next_row(self) -> int:
+        self.progress['rowsRead'] += 1
+        if self.progress['rowsRead'] > MAX_STREAM_ROWS:
+            raise ValueError(f"At most {MAX_STREAM_ROWS} activities per import")
+        return self.progress['rowsRead']
+
+    def _row(self, row: int, data):
+        if not isinstance(data, dict):
+            self.error(row, None, "Expected an object")
+            return
+        try:
+            activity = ActivityCreate.model_validate(data)
+        except ValidationError as e:
+            for error in e.errors():
+                field = '.'.join(str(part) for part in error['loc']) or None
+                self.error(row, data.get('activityId'), error['msg'], field)
+            return
+
+        activity_id = activity.activityId = activity.activityId.strip()
+        if not activity_id:
+            self.error(row, activity_id, "Activity ID is empty", 'activityId')
+            return
+        if activity_id in self.existing:
+            self.error(row, activity_id, "Activity ID already exists in the project", 'activityId')
+            return
+        if activity_id in self.rows_by_id:
+            self.error(row, activity_id, f"Duplicate activity ID (first used in row {self.rows_by_id[activity_id]})", 'activityId')
+            return
+        self.rows_by_id[activity_id] = row
+        if self.unresolved.pop(activity_id, None) is not None or activity_id in self.awaited:
+            self.needs_cycle_check = True
+
+        for predecessor in parse_predecessors(activity.predecessors):
+            if predecessor == activity_id:
+                self.error(row, activity_id, "Activity cannot be its own predecessor", 'predecessors')
+            elif predecessor not in self.existing and predecessor not in self.rows_by_id:
+                self.unresolved.setdefault(predecessor, []).append((row, activity_id))
+
+        if not self.progress['errorCount']:
+            self.chunk.append({'projectId': self.project_id, **activity.model_dump()})
+
+
+class ImportRegistry:
+    """Progress of recent streamed imports, for polling while they run"""
+
+    def __init__(self, max_imports: int = 256):
+        self.max_imports = max_imports
+        self._imports: "OrderedDict[Tuple[str, str], StreamingImport]" = OrderedDict()
+
+    def register(self, project_id: str, import_id: str, ingest: StreamingImport) -> bool:
+        """Track an import; False if one with this ID is still running"""
+        key = (project_id, import_id)
+        current = self._imports.get(key)
+        if current is not None and current.progress['status'] == 'running':
+            return False
+        self._imports.pop(key, None)
+        self._imports[key] = ingest
+        while len(self._imports) > self.max_imports:
+            self._imports.popitem(last=False)
+        return True
+
+    def get(self, project_id: str, import_id: str) -> Optional[StreamingImport]:
+        return self._imports.get((project_id, import_id))
+
+
+# Process-wide registry used by the import endpoints
+import_registry = ImportRegistry()
@@ -0,0 +1,169 @@
+"""Content-addressed cache of analysis results"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import time
+
+
+def activity_set_hash(activities_data: List[Dict]) -> str:
+    """
+    Hash of the activity rows in the order given. Row order is part of the
+    key because the engine's output depends on it: activity order, critical
+    path tie-breaks and the order of enumerated paths follow the input.
+    """
+    # Rows of values in one shared field order serialize much faster than
+    # dicts with sort_keys
+    fields = sorted({field for activity in activities_data for field in activity})
+    rows = [[activity.get(field) for field in fields] for activity in activities_data]
+    payload = json.dumps([fields, rows], separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AnalysisCache:
+    """
+    LRU cache of engine results keyed by (project ID, activity set hash,
+    result kind). Entries expire after `ttl_seconds`; the cache holds at most
+    `max_entries` results and at most `max_activities` activities summed over
+    them, which bounds memory since results grow with the activity count.
+
+    Cached results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, max_activities: int = 200_000, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.max_activities = max_activities
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, Any]]" = OrderedDict()
+        self._activities = 0
+        self._running: Dict[Tuple, "asyncio.Future"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, project_id: Optional[str], activities_data: List[Dict], kind: Hashable,
+                       compute: Callable[[], Any], digest: Optional[str] = None) -> Tuple[Any, bool]:
+        """
+        Return (result, hit): the cached result for this project content and
+        kind, or the result of compute(), which is stored unless it raises.
+        Callers looking up several kinds for the same activities can pass the
+        activity_set_hash() they already computed as `digest`.
+        """
+        if digest is None:
+            digest = activity_set_hash(activities_data)
+        key = (project_id, digest, kind)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[2], True
+
+        self.misses += 1
+        result = compute()
+        self.put(key, len(activities_data), result)
+        return result, False
+
+    async def get_or_compute_async(self, project_id: Optional[str], activities_data: List[Dict], kind: Hashable,
+                                   compute: Callable[[], Awaitable[Any]],
+                                   digest: Optional[str] = None) -> Tuple[Any, bool]:
+        """
+        get_or_compute() for an async compute(), such as a CPU pool task.
+        Concurrent misses of one key share a single computation: later
+        callers wait for the running one (counted as `shared`) and get its
+        result with hit False, as they did not find it cached.
+        """
+        if digest is None:
+            digest = activity_set_hash(activities_data)
+        key = (project_id, digest, kind)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[2], True
+
+        task = self._running.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._running[key] = task
+            task.add_done_callback(lambda done: self._finish(key, len(activities_data), done))
+        else:
+            self.shared += 1
+        # A caller that goes away does not cancel the run others wait for
+        return await asyncio.shield(task), False
+
+    def contains(self, project_id: Optional[str], digest: str, kind: Hashable) -> bool:
+        """
+        Whether an unexpired result is cached, so callers can skip loading
+        what only compute() needs. Counts neither a hit nor a miss.
+        """
+        entry = self._entries.get((project_id, digest, kind))
+        return entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds
+
+    def _lookup(self, key: Tuple) -> Optional[Tuple[float, int, Any]]:
+        """The unexpired entry of a key, counted as a hit, or None"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self._remove(key)
+        return None
+
+    def _finish(self, key: Tuple, size: int, task: "asyncio.Future"):
+        """Store the result of a finished async computation, unless it failed"""
+        self._running.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, size, task.result())
+
+    def put(self, key: Tuple, size: int, result: Any):
+        """Store a result of `size` activities, evicting least recently used ones"""
+        if size > self.max_activities:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic(), size, result)
+        self._activities += size
+        while len(self._entries) > self.max_entries or self._activities > self.max_activities:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, project_id: str):
+        """Drop every cached result of a project"""
+        keys = [key for key in self._entries if key[0] == project_id]
+        for key in keys:
+            self._remove(key)
+        if keys:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._activities = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared': self.shared,
+            'hitRate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries),
+            'activities': self._activities,
+            'maxEntries': self.max_entries,
+            'maxActivities': self.max_activities,
+            'ttlSeconds': self.ttl_seconds
+        }
+
+    def _remove(self, key: Tuple):
+        _, size, _ = self._entries.pop(key)
+        self._activities -= size
+
+
+# Process-wide cache used by the project analysis endpoints
+analysis_cache = AnalysisCache()
+
+# Process-wide cache shared by the guest-mode (ad-hoc) endpoints, whose
+# results are keyed by the payload alone (project ID None)
+adhoc_cache = AnalysisCache(max_entries=128, max_activities=100_000)
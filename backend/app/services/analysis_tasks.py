@@ -0,0 +1,80 @@
+"""
+Engine runs submitted to the CPU pool. Each task is a module-level function
+of plain data so it can be pickled to a worker process, and returns plain
+data (dicts, lists, bytes) to the server process.
+"""
+from typing import Dict, List, Optional, Tuple
+from app.services.pert_cpm import PERTCPMEngine, schedule_store
+from app.services.crashing_engine import CrashingEngine
+from app.services.pdf_export import generate_pdf_export
+from app.services.network_diagram import generate_network_diagram
+from app.services.vector_diagram import generate_svg_diagram
+
+
+def analyze_activities(activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]] = None,
+                       max_paths: Optional[int] = None) -> Tuple[Dict, Optional[Dict]]:
+    """The analyze() result and, if max_paths is given, up to that many critical paths"""
+    engine = PERTCPMEngine(activities_data, predecessors)
+    result = engine.analyze()
+    return result, engine.critical_paths(max_paths) if max_paths is not None else None
+
+
+def analyze_schedule(project_id: str, activities_data: List[Dict],
+                     predecessors: Optional[Dict[str, List[str]]] = None,
+                     max_paths: Optional[int] = None) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Like analyze_activities, but through the worker's schedule store: a
+    project analyzed in this worker before only has its edits re-propagated
+    """
+    result = schedule_store.analyze(project_id, activities_data, predecessors)
+    critical_paths = schedule_store.get(project_id).critical_paths(max_paths) if max_paths is not None else None
+    return result, critical_paths
+
+
+def longest_paths(project_id: str, activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]],
+                  k: int, max_slack: Optional[float]) -> Tuple[float, List[Dict]]:
+    """Project duration and its k longest paths (see PERTCPMEngine.longest_paths)"""
+    result = schedule_store.analyze(project_id, activities_data, predecessors)
+    return result['projectDuration'], schedule_store.get(project_id).longest_paths(k, max_slack)
+
+
+def crashing_options(activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]] = None) -> Dict:
+    return PERTCPMEngine(activities_data, predecessors).calculate_crashing_options()
+
+
+def export_results(activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]],
+                   max_paths: int) -> Tuple[Dict, Dict, Optional[Dict]]:
+    """Analysis, critical paths and crashing options (None if unavailable) for an export"""
+    engine = PERTCPMEngine(activities_data, predecessors)
+    analysis_result = engine.analyze()
+    critical_paths = engine.critical_paths(max_paths)
+    # Crashing options are optional in an export: incomplete crash data
+    # leaves them out, but the worker's time limit still ends the task
+    try:
+        crashing_result = engine.calculate_crashing_options()
+    except TimeoutError:
+        raise
+    except Exception:
+        crashing_result = None
+    return analysis_result, critical_paths, crashing_result
+
+
+def crashing_scheme(activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]] = None,
+                    target_duration: Optional[float] = None, include_snapshots: bool = False) -> Dict:
+    return CrashingEngine(activities_data, predecessors).calculate_crashing_scheme(target_duration, include_snapshots)
+
+
+def time_cost_curve(activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]] = None) -> Dict:
+    return CrashingEngine(activities_data, predecessors).calculate_time_cost_curve()
+
+
+def render_pdf(export_data: Dict, diagram: str = 'raster') -> bytes:
+    """The PDF report of an export, network diagram included"""
+    return generate_pdf_export(export_data, diagram).getvalue()
+
+
+def render_diagram(activities: List[Dict], critical_path: List[str], format: str) -> bytes:
+    """The AON diagram of a schedule as SVG or PNG"""
+    if format == 'svg':
+        return generate_svg_diagram(activities, critical_path)
+    return generate_network_diagram(activities, critical_path, diagram_type='aon').getvalue()
@@ -0,0 +1,128 @@
+"""Disk cache of rendered artifacts (PDF reports, diagram images)"""
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+# Where rendered artifacts are kept and how many megabytes of them
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", "./artifact_cache")
+ARTIFACT_CACHE_MAX_MB = float(os.getenv("ARTIFACT_CACHE_MAX_MB", 256))
+
+
+def artifact_key(kind: str, content: Any, options: Optional[Dict] = None) -> str:
+    """
+    Hash of what an artifact is rendered from: its kind (which includes the
+    renderer's layout version), the data shown and the rendering options
+    """
+    payload = json.dumps([kind, content, options or {}], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ArtifactCache:
+    """
+    LRU cache of rendered files in a directory, at most `max_bytes` in total.
+    A hit renews the file's modification time, and eviction removes the least
+    recently used files. Files are written atomically, so the server and the
+    analysis workers can share the directory; eviction works from a directory
+    scan, so it stays correct whichever process wrote the files.
+    """
+
+    # Eviction frees space down to this share of max_bytes, so that it does
+    # not run again on each of the following writes
+    LOW_WATER = 0.9
+
+    def __init__(self, directory: str = ARTIFACT_CACHE_DIR, max_bytes: int = int(ARTIFACT_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None  # estimate of this process, corrected by each scan
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{suffix}")
+
+    def get(self, key: str, suffix: str) -> Optional[bytes]:
+        """The cached artifact, or None"""
+        if not self.enabled:
+            return None
+        path = self._path(key, suffix)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, key: str, suffix: str, content: bytes):
+        """Store an artifact, evicting the least recently used ones past the size limit"""
+        if not self.enabled or len(content) > self.max_bytes:
+            return
+        path = self._path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{uuid.uuid4().hex}.partial"
+        with open(partial, 'wb') as f:
+            f.write(content)
+        os.replace(partial, path)
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan_size()
+            else:
+                self._bytes += len(content)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                for file in os.scandir(entry.path):
+                    if not file.name.endswith('.partial'):
+                        try:
+                            yield file.path, file.stat()
+                        except FileNotFoundError:
+                            pass
+
+    def _scan_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._files())
+
+    def _evict(self):
+        files = sorted(self._files(), key=lambda file: file[1].st_mtime)
+        total = sum(stat.st_size for _, stat in files)
+        for path, stat in files:
+            if total <= self.max_bytes * self.LOW_WATER:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+        self._bytes = total
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes
+            }
+
+
+# Rendered PDF reports and diagram images, shared by the server and its workers
+artifact_cache = ArtifactCache()
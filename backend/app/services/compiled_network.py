@@ -0,0 +1,446 @@
+"""Array-backed project network used by the scheduling engines"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from collections import deque
+import heapq
+import numpy as np
+
+
+class CycleError(ValueError):
+    """Raised when activity predecessors form one or more cycles"""
+
+    def __init__(self, cycles: List[List[str]]):
+        self.cycles = cycles
+        described = '; '.join(' -> '.join(cycle + cycle[:1]) for cycle in cycles)
+        super().__init__(
+            f"Graph contains cycles - check your activity predecessors for circular dependencies: {described}"
+        )
+
+    def __reduce__(self):
+        # Rebuilt from the cycles, not the message, when it crosses processes
+        return CycleError, (self.cycles,)
+
+
+def parse_predecessors(predecessors) -> List[str]:
+    """Split a comma-separated predecessor field into activity IDs"""
+    if not predecessors:
+        return []
+    if not isinstance(predecessors, str):
+        predecessors = str(predecessors).strip()
+    return [p.strip() for p in predecessors.split(',') if p.strip()]
+
+
+def topological_sort(ids: Sequence[str], succ_lists: List[List[int]],
+                     in_degree: List[int]) -> Tuple[List[int], List[int]]:
+    """
+    Iterative Kahn's algorithm over integer adjacency lists.
+
+    Returns the topological order and each node's level (longest edge
+    depth from a source). Raises CycleError naming the activities on every
+    cycle if the graph is not a DAG. `in_degree` is consumed.
+    """
+    n = len(succ_lists)
+    level = [0] * n
+    order = [i for i in range(n) if in_degree[i] == 0]
+    head = 0
+    while head < len(order):
+        current = order[head]
+        head += 1
+        next_level = level[current] + 1
+        for successor in succ_lists[current]:
+            if level[successor] < next_level:
+                level[successor] = next_level
+            in_degree[successor] -= 1
+            if in_degree[successor] == 0:
+                order.append(successor)
+
+    if len(order) < n:
+        remaining = [i for i in range(n) if in_degree[i] > 0]
+        cycles = find_cycles(succ_lists, remaining)
+        raise CycleError([[ids[i] for i in cycle] for cycle in cycles])
+    return order, level
+
+
+def order_activities(activity_ids: List[str], graph: Dict[str, List[str]]) -> List[str]:
+    """Topologically order string-keyed activities given successor lists"""
+    index = {activity_id: i for i, activity_id in enumerate(activity_ids)}
+    succ_lists = [[index[succ] for succ in graph.get(activity_id, [])] for activity_id in activity_ids]
+    in_degree = [0] * len(activity_ids)
+    for succs in succ_lists:
+        for succ in succs:
+            in_degree[succ] += 1
+    order, _ = topological_sort(activity_ids, succ_lists, in_degree)
+    return [activity_ids[i] for i in order]
+
+
+def find_cycles(succ_lists: List[List[int]], nodes: List[int]) -> List[List[int]]:
+    """
+    Return one concrete cycle per strongly connected component of the
+    subgraph induced by `nodes`, using an iterative Tarjan traversal.
+    """
+    within = set(nodes)
+    index: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack = set()
+    components = []
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, 0)]
+        while work:
+            node, i = work[-1]
+            succs = succ_lists[node]
+            if i < len(succs):
+                work[-1] = (node, i + 1)
+                successor = succs[i]
+                if successor not in within:
+                    continue
+                if successor not in index:
+                    index[successor] = low[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, 0))
+                elif successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    cycles = []
+    for component in components:
+        members = set(component)
+        start = min(component)
+        if len(component) == 1 and start not in succ_lists[start]:
+            continue
+        # Shortest cycle through `start` inside the component
+        parent = {start: None}
+        queue = deque([start])
+        closing = None
+        while queue and closing is None:
+            node = queue.popleft()
+            for successor in succ_lists[node]:
+                if successor == start:
+                    closing = node
+                    break
+                if successor in members and successor not in parent:
+                    parent[successor] = node
+                    queue.append(successor)
+        cycle = []
+        node = closing
+        while node is not None:
+            cycle.append(node)
+            node = parent[node]
+        cycles.append(cycle[::-1])
+    cycles.sort(key=lambda cycle: cycle[0])
+    return cycles
+
+
+def _slot_gathers(ptr: np.ndarray, idx: np.ndarray, nodes: np.ndarray):
+    """
+    Sort `nodes` by degree (descending) and split their CSR rows into slots:
+    slot j holds the j-th neighbour of every node with degree > j, so it is
+    a prefix of the sorted nodes. Reducing slot by slot touches each edge
+    exactly once, with one NumPy call per slot instead of per node.
+    """
+    degree = ptr[nodes + 1] - ptr[nodes]
+    by_degree = np.argsort(-degree, kind='stable')
+    nodes = nodes[by_degree]
+    degree = degree[by_degree]
+    starts = ptr[nodes]
+    slots = []
+    for j in range(int(degree[0]) if len(degree) else 0):
+        count = int(np.count_nonzero(degree > j))
+        slots.append((count, idx[starts[:count] + j]))
+    return nodes, slots
+
+
+class CompiledNetwork:
+    """
+    Integer-indexed project network.
+
+    Activities are numbered 0..n-1 in input order. Adjacency is stored in
+    CSR form (`pred_ptr`/`pred_idx` and `succ_ptr`/`succ_idx`) and nodes are
+    grouped into topological levels so the forward and backward passes can
+    process a whole level with a handful of NumPy reductions.
+    """
+
+    # Below this many activities per level the per-level NumPy call overhead
+    # outweighs vectorization, so single-scenario passes use a scalar loop
+    SCALAR_LEVEL_WIDTH = 8
+
+    def __init__(self, ids: Sequence[str], edge_src: Sequence[int], edge_dst: Sequence[int],
+                 durations: Sequence[float]):
+        """
+        Build the network from parallel edge arrays (edge_src[k] -> edge_dst[k])
+        and a duration per activity.
+        """
+        self.ids = list(ids)
+        self.n = len(self.ids)
+        self.index = {activity_id: i for i, activity_id in enumerate(self.ids)}
+        self.durations = np.asarray(durations, dtype=float)
+
+        src = np.asarray(edge_src, dtype=np.int64)
+        dst = np.asarray(edge_dst, dtype=np.int64)
+        self.edge_count = len(src)
+
+        order = np.argsort(dst, kind='stable')
+        self.pred_idx = src[order]
+        self.pred_ptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=self.n), out=self.pred_ptr[1:])
+
+        order = np.argsort(src, kind='stable')
+        self.succ_idx = dst[order]
+        self.succ_ptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=self.n), out=self.succ_ptr[1:])
+
+        self._pred_lists: Optional[List[List[int]]] = None
+        self._succ_lists: Optional[List[List[int]]] = None
+        self._forward_levels = None
+        self._backward_levels = None
+        self._topological_sort()
+
+    @classmethod
+    def from_activities(cls, activities: Dict[str, Dict], graph: Dict[str, List[str]],
+                        get_duration=None, durations=None) -> 'CompiledNetwork':
+        """
+        Compile an activity dict and its successor adjacency. Durations are
+        taken from `durations` if given, otherwise from `get_duration(id)`.
+        """
+        ids = list(activities)
+        index = {activity_id: i for i, activity_id in enumerate(ids)}
+        edge_src = [index[pred] for pred, succs in graph.items() for _ in succs]
+        edge_dst = [index[succ] for succs in graph.values() for succ in succs]
+        if durations is None:
+            durations = [get_duration(activity_id) for activity_id in ids]
+        return cls(ids, edge_src, edge_dst, durations)
+
+    # ------------------------------------------------------------------
+    # Structure
+    # ------------------------------------------------------------------
+
+    @property
+    def pred_lists(self) -> List[List[int]]:
+        if self._pred_lists is None:
+            ptr = self.pred_ptr.tolist()
+            idx = self.pred_idx.tolist()
+            self._pred_lists = [idx[ptr[i]:ptr[i + 1]] for i in range(self.n)]
+        return self._pred_lists
+
+    @property
+    def succ_lists(self) -> List[List[int]]:
+        if self._succ_lists is None:
+            ptr = self.succ_ptr.tolist()
+            idx = self.succ_idx.tolist()
+            self._succ_lists = [idx[ptr[i]:ptr[i + 1]] for i in range(self.n)]
+        return self._succ_lists
+
+    @property
+    def sources(self) -> np.ndarray:
+        return np.flatnonzero(np.diff(self.pred_ptr) == 0)
+
+    @property
+    def sinks(self) -> np.ndarray:
+        return np.flatnonzero(np.diff(self.succ_ptr) == 0)
+
+    def _topological_sort(self):
+        """Single Kahn pass providing the order and levels used by both passes"""
+        order, level = topological_sort(self.ids, self.succ_lists, np.diff(self.pred_ptr).tolist())
+
+        self.order = np.asarray(order, dtype=np.int64)
+        self.position = [0] * self.n
+        for rank, node in enumerate(order):
+            self.position[node] = rank
+        self.level = np.asarray(level, dtype=np.int64)
+        self.level_count = int(self.level.max()) + 1 if self.n else 0
+        # Stable sort by level keeps Kahn order inside each level
+        self.level_order = self.order[np.argsort(self.level[self.order], kind='stable')]
+        self.level_ptr = np.zeros(self.level_count + 1, dtype=np.int64)
+        if self.n:
+            np.cumsum(np.bincount(self.level, minlength=self.level_count), out=self.level_ptr[1:])
+
+    def _use_scalar(self, durations: np.ndarray) -> bool:
+        if durations.ndim != 1 or self.level_count == 0:
+            return False
+        return self.n < self.SCALAR_LEVEL_WIDTH * self.level_count
+
+    def _build_forward_levels(self):
+        levels = []
+        for lvl in range(1, self.level_count):
+            nodes = self.level_order[self.level_ptr[lvl]:self.level_ptr[lvl + 1]]
+            levels.append(_slot_gathers(self.pred_ptr, self.pred_idx, nodes))
+        self._forward_levels = levels
+
+    def _build_backward_levels(self):
+        levels = []
+        for lvl in range(self.level_count - 1, -1, -1):
+            nodes = self.level_order[self.level_ptr[lvl]:self.level_ptr[lvl + 1]]
+            inner = nodes[self.succ_ptr[nodes + 1] > self.succ_ptr[nodes]]
+            inner, slots = _slot_gathers(self.succ_ptr, self.succ_idx, inner)
+            levels.append((nodes, inner, slots))
+        self._backward_levels = levels
+
+    # ------------------------------------------------------------------
+    # Passes
+    # ------------------------------------------------------------------
+
+    def forward(self, durations: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute ES and EF arrays.
+
+        `durations` may be a vector of length n or an (n, k) matrix holding k
+        duration scenarios, in which case every scenario is scheduled at once.
+        """
+        d = self.durations if durations is None else np.asarray(durations, dtype=float)
+        if self._use_scalar(d):
+            return self._forward_scalar(d)
+
+        es = np.zeros_like(d)
+        ef = np.empty_like(d)
+        if self.n == 0:
+            return es, ef
+        roots = self.level_order[self.level_ptr[0]:self.level_ptr[1]]
+        ef[roots] = d[roots]
+        if self._forward_levels is None:
+            self._build_forward_levels()
+        for nodes, slots in self._forward_levels:
+            # Every node above level 0 has at least one predecessor
+            starts = ef[slots[0][1]]
+            for count, gather in slots[1:]:
+                np.maximum(starts[:count], ef[gather], out=starts[:count])
+            es[nodes] = starts
+            ef[nodes] = starts + d[nodes]
+        return es, ef
+
+    def backward(self, project_duration, durations: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute LS and LF arrays for the given project duration.
+
+        For scenario matrices `project_duration` is a length-k vector.
+        """
+        d = self.durations if durations is None else np.asarray(durations, dtype=float)
+        if self._use_scalar(d):
+            return self._backward_scalar(float(project_duration), d)
+
+        lf = np.empty_like(d)
+        lf[...] = project_duration
+        ls = np.empty_like(d)
+        if self._backward_levels is None:
+            self._build_backward_levels()
+        for nodes, inner, slots in self._backward_levels:
+            if len(inner):
+                finishes = ls[slots[0][1]]
+                for count, gather in slots[1:]:
+                    np.minimum(finishes[:count], ls[gather], out=finishes[:count])
+                lf[inner] = finishes
+            ls[nodes] = lf[nodes] - d[nodes]
+        return ls, lf
+
+    def _forward_scalar(self, d: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        duration = d.tolist()
+        pred_lists = self.pred_lists
+        es = [0.0] * self.n
+        ef = [0.0] * self.n
+        for current in self.order.tolist():
+            preds = pred_lists[current]
+            if preds:
+                start = ef[preds[0]]
+                for pred in preds:
+                    if ef[pred] > start:
+                        start = ef[pred]
+                es[current] = start
+            ef[current] = es[current] + duration[current]
+        return np.asarray(es), np.asarray(ef)
+
+    def _backward_scalar(self, project_duration: float, d: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        duration = d.tolist()
+        succ_lists = self.succ_lists
+        ls = [0.0] * self.n
+        lf = [project_duration] * self.n
+        for current in reversed(self.order.tolist()):
+            succs = succ_lists[current]
+            if succs:
+                finish = ls[succs[0]]
+                for succ in succs:
+                    if ls[succ] < finish:
+                        finish = ls[succ]
+                lf[current] = finish
+            ls[current] = lf[current] - duration[current]
+        return np.asarray(ls), np.asarray(lf)
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def repropagate_forward(self, es: np.ndarray, ef: np.ndarray, seeds) -> set:
+        """
+        Recompute ES/EF in place for `seeds` and whatever downstream cone
+        their changes reach. Returns the indices whose values changed.
+        """
+        d = self.durations
+        pred_lists = self.pred_lists
+        succ_lists = self.succ_lists
+        position = self.position
+        heap = [(position[v], v) for v in set(seeds)]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        changed = set()
+        while heap:
+            _, current = heapq.heappop(heap)
+            preds = pred_lists[current]
+            start = max(ef[pred] for pred in preds) if preds else 0.0
+            finish = start + d[current]
+            if start == es[current] and finish == ef[current]:
+                continue
+            es[current] = start
+            ef[current] = finish
+            changed.add(current)
+            for successor in succ_lists[current]:
+                if successor not in queued:
+                    queued.add(successor)
+                    heapq.heappush(heap, (position[successor], successor))
+        return changed
+
+    def repropagate_backward(self, ls: np.ndarray, lf: np.ndarray, project_duration: float, seeds) -> set:
+        """
+        Recompute LS/LF in place for `seeds` and the upstream cone their
+        changes reach. Returns the indices whose values changed.
+        """
+        d = self.durations
+        pred_lists = self.pred_lists
+        succ_lists = self.succ_lists
+        position = self.position
+        heap = [(-position[v], v) for v in set(seeds)]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        changed = set()
+        while heap:
+            _, current = heapq.heappop(heap)
+            succs = succ_lists[current]
+            finish = min(ls[succ] for succ in succs) if succs else project_duration
+            start = finish - d[current]
+            if start == ls[current] and finish == lf[current]:
+                continue
+            ls[current] = start
+            lf[current] = finish
+            changed.add(current)
+            for predecessor in pred_lists[current]:
+                if predecessor not in queued:
+                    queued.add(predecessor)
+                    heapq.heappush(heap, (-position[predecessor], predecessor))
+        return changed
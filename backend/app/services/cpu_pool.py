@@ -0,0 +1,193 @@
+"""Bounded process pool for the CPU-heavy analysis, diagram and PDF work"""
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+# Worker processes, tasks that may wait for a free worker, and the default
+# limit in seconds on queueing plus running one task
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", os.cpu_count() or 1))
+CPU_QUEUE_SIZE = int(os.getenv("CPU_QUEUE_SIZE", 32))
+CPU_TASK_TIMEOUT = float(os.getenv("CPU_TASK_TIMEOUT", 120))
+
+# Limit for rendering PDF reports, which takes far longer than analysis
+CPU_RENDER_TIMEOUT = float(os.getenv("CPU_RENDER_TIMEOUT", 600))
+
+# Seconds a worker gets past its own deadline before the caller gives up on it
+TIMEOUT_GRACE = 5
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the queue is full"""
+
+
+class PoolUnavailable(Exception):
+    """The pool is shut down, or a worker died and the pool was restarted"""
+
+
+def _warm_up():
+    """Worker initializer: import the engines and renderers once per process"""
+    import app.services.analysis_tasks  # noqa: F401
+    import app.services.pdf_export  # noqa: F401
+
+
+def _call(fn: Callable, args: tuple, kwargs: Dict, deadline: Optional[float]) -> Any:
+    """
+    Run a task in a worker. The deadline (wall-clock time, shared between
+    processes) is enforced in the worker itself with a timer signal where
+    available, so a runaway task frees its worker instead of holding it
+    after the caller gave up. Time spent queued counts against it: a task
+    whose deadline passed while it waited fails without running.
+    """
+    if deadline is None or not hasattr(signal, "setitimer"):
+        return fn(*args, **kwargs)
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise TimeoutError("Task waited for a worker past its time limit")
+
+    def expire(signum, frame):
+        raise TimeoutError("Task exceeded its time limit")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class CPUPool:
+    """
+    Runs CPU-bound functions in worker processes so they never block the
+    event loop. At most `workers` tasks run and `queue_size` more wait;
+    further submissions are rejected with PoolSaturated instead of queueing
+    without bound. Tasks time out after `task_timeout` seconds (queueing
+    included) with TimeoutError: the deadline is fixed at submission, and
+    a worker only gives a task the time left of it.
+
+    Functions and their arguments are pickled, so tasks must be module-level
+    functions of plain data. Workers are started with forkserver/spawn, never
+    by forking the threaded server process.
+
+    The streaming crashing endpoints are the exception: their engines yield
+    events as they run, so they iterate in the server's threadpool without
+    this pool's backpressure. They are bounded by STREAM_MAX_ACTIVITIES and
+    stopped between events after CPU_TASK_TIMEOUT seconds instead (see
+    api.analysis.stream_events).
+    """
+
+    def __init__(self, workers: int = CPU_WORKERS, queue_size: int = CPU_QUEUE_SIZE,
+                 task_timeout: float = CPU_TASK_TIMEOUT):
+        if workers < 1:
+            raise ValueError("The CPU pool needs at least one worker")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.task_timeout = task_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.restarts = 0
+
+    def start(self):
+        """Start the worker processes (otherwise done on first use)"""
+        with self._lock:
+            self._closed = False
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_warm_up)
+            return self._executor
+
+    def shutdown(self):
+        """Stop the workers; queued tasks are cancelled"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._closed = True
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in a worker and return its result; exceptions
+        raised by fn are re-raised here. Raises PoolSaturated when the queue
+        is full, PoolUnavailable when the pool cannot run it and TimeoutError
+        when it takes longer than `timeout` (default task_timeout) seconds.
+        """
+        timeout = timeout or self.task_timeout
+        with self._lock:
+            if self._closed:
+                raise PoolUnavailable("The analysis workers are shutting down")
+            if self._pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise PoolSaturated(f"All {self.workers} analysis workers are busy and {self.queue_size} tasks are queued")
+            self._pending += 1
+
+        executor = self._executor or self.start()
+        try:
+            future = executor.submit(_call, fn, args, kwargs, time.time() + timeout)
+        except (BrokenProcessPool, RuntimeError):
+            self._release(None)
+            self._restart(executor)
+            raise PoolUnavailable("The analysis workers are restarting")
+        future.add_done_callback(self._release)
+
+        try:
+            # A task still waiting for a worker is cancelled on timeout; a
+            # running one is stopped by the same deadline in the worker
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout + TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise TimeoutError(f"Task did not finish within {timeout:g}s")
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise PoolUnavailable("An analysis worker died; the workers are restarting")
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'queueSize': self.queue_size,
+            'taskTimeout': self.task_timeout,
+            'running': min(self._pending, self.workers),
+            'queued': max(0, self._pending - self.workers),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'failures': self.failures,
+            'restarts': self.restarts
+        }
+
+    def _release(self, future):
+        # Runs when a task really ends, so a timed-out task that is still
+        # running keeps its place until its worker is free again
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled():
+                error = future.exception()
+                if error is None:
+                    self.completed += 1
+                elif not isinstance(error, TimeoutError):
+                    self.failures += 1
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace a broken executor; tasks that were in it have failed"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+# Process-wide pool used by the analysis and export endpoints
+cpu_pool = CPUPool()
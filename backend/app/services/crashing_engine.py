@@ -1,17 +1,100 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator
 from collections import defaultdict, deque
 import copy
+import numpy as np
+from app.services.compiled_network import CompiledNetwork, CycleError, order_activities, parse_predecessors
+from app.services.time_cost import iter_time_cost_curve, time_cost_curve
+
+# Flow and step-size tolerance of the min-cut crashing loop
+EPSILON = 1e-9
+
+
+def minimum_cut(node_count: int, arcs: List[Tuple[int, int, float]], source: int, sink: int) -> Tuple[float, set]:
+    """
+    Minimum source-sink cut by Dinic's max-flow algorithm (iterative, so deep
+    networks do not hit the recursion limit). `arcs` are (tail, head,
+    capacity) with float('inf') for uncuttable arcs. Returns the cut value,
+    inf if every cut crosses an infinite arc, and the nodes on the source side.
+    """
+    head = [[] for _ in range(node_count)]
+    to, capacity = [], []
+    for u, v, c in arcs:
+        head[u].append(len(to))
+        to.append(v)
+        capacity.append(c)
+        head[v].append(len(to))
+        to.append(u)
+        capacity.append(0.0)
+    
+    def levels() -> List[int]:
+        level = [-1] * node_count
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for e in head[u]:
+                if capacity[e] > EPSILON and level[to[e]] < 0:
+                    level[to[e]] = level[u] + 1
+                    queue.append(to[e])
+        return level
+    
+    flow = 0.0
+    while True:
+        level = levels()
+        if level[sink] < 0:
+            break
+        # Blocking flow: repeated depth-first augmentations along the levels
+        next_arc = [0] * node_count
+        while True:
+            stack = []
+            u = source
+            while u != sink:
+                arcs_u = head[u]
+                while next_arc[u] < len(arcs_u):
+                    e = arcs_u[next_arc[u]]
+                    if capacity[e] > EPSILON and level[to[e]] == level[u] + 1:
+                        break
+                    next_arc[u] += 1
+                if next_arc[u] < len(arcs_u):
+                    e = arcs_u[next_arc[u]]
+                    stack.append(e)
+                    u = to[e]
+                elif stack:
+                    # Dead end: prune the node and retreat one arc
+                    level[u] = -1
+                    e = stack.pop()
+                    u = to[e ^ 1]
+                    next_arc[u] += 1
+                else:
+                    break
+            if u != sink:
+                break
+            pushed = min(capacity[e] for e in stack)
+            if pushed == float('inf'):
+                return float('inf'), set()
+            for e in stack:
+                capacity[e] -= pushed
+                capacity[e ^ 1] += pushed
+            flow += pushed
+    
+    level = levels()
+    return flow, {node for node in range(node_count) if level[node] >= 0}
+
 
 class CrashingEngine:
     """Complete Project Crashing with iterative optimization"""
     
-    def __init__(self, activities_data: List[Dict]):
+    def __init__(self, activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]] = None):
         """
         Initialize with crashing activity data
         Each activity: activityId, duration, crashTime, cost, crashCost, predecessors
+        
+        `predecessors` maps activity IDs to their predecessor IDs, as loaded
+        from the dependencies table; if given, the predecessor text is not parsed.
         """
         self.original_activities = {a['activityId']: copy.deepcopy(a) for a in activities_data}
         self.activities = copy.deepcopy(self.original_activities)
+        self.predecessors = predecessors
         
     def build_graph(self):
         """Build the project network DAG"""
@@ -25,58 +108,41 @@ class CrashingEngine:
                 reverse_graph[activity_id] = []
         
         for activity_id, activity in self.activities.items():
-            predecessors = activity.get('predecessors', '')
-            if predecessors:
-                if not isinstance(predecessors, str):
-                    predecessors = str(predecessors).strip()
-                    
-                preds = [p.strip() for p in predecessors.split(',') if p.strip()]
-                for pred in preds:
-                    if pred not in self.activities:
-                        raise ValueError(f"Activity '{activity_id}' references undefined predecessor '{pred}'")
-                    graph[pred].append(activity_id)
-                    reverse_graph[activity_id].append(pred)
+            if self.predecessors is not None:
+                preds = self.predecessors.get(activity_id, ())
+            else:
+                preds = parse_predecessors(activity.get('predecessors', ''))
+            for pred in preds:
+                if pred not in self.activities:
+                    raise ValueError(f"Activity '{activity_id}' references undefined predecessor '{pred}'")
+                graph[pred].append(activity_id)
+                reverse_graph[activity_id].append(pred)
         
         return graph, reverse_graph
     
     def validate_dag(self, graph):
         """Validate that the graph is a DAG (no cycles)"""
-        visited = set()
-        rec_stack = set()
-        
-        def has_cycle(node):
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in graph.get(node, []):
-                if neighbor not in visited:
-                    if has_cycle(neighbor):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
-            
-            rec_stack.remove(node)
+        try:
+            self.topological_order(graph)
+        except CycleError:
             return False
-        
-        for node in self.activities:
-            if node not in visited:
-                if has_cycle(node):
-                    return False
         return True
     
+    def topological_order(self, graph) -> List[str]:
+        """Activities in topological order; raises CycleError naming each cycle"""
+        return order_activities(list(self.activities), graph)
+    
     def get_duration(self, activity_id: str) -> float:
         """Get current duration for an activity"""
         return float(self.activities[activity_id].get('duration', 0))
     
-    def forward_pass(self, graph, reverse_graph) -> Dict[str, Dict]:
-        """Calculate ES and EF for all activities"""
+    def forward_pass(self, graph, reverse_graph, order: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Calculate ES and EF for all activities in topological order"""
+        if order is None:
+            order = self.topological_order(graph)
         es_ef = {}
-        in_degree = {node: len(reverse_graph[node]) for node in self.activities}
-        queue = deque([node for node in self.activities if in_degree[node] == 0])
         
-        while queue:
-            current = queue.popleft()
-            
+        for current in order:
             if not reverse_graph[current]:
                 es_ef[current] = {'ES': 0}
             else:
@@ -84,23 +150,17 @@ class CrashingEngine:
             
             duration = self.get_duration(current)
             es_ef[current]['EF'] = es_ef[current]['ES'] + duration
-            
-            for successor in graph[current]:
-                in_degree[successor] -= 1
-                if in_degree[successor] == 0:
-                    queue.append(successor)
         
         return es_ef
     
-    def backward_pass(self, graph, reverse_graph, project_duration: float) -> Dict[str, Dict]:
-        """Calculate LS and LF for all activities"""
+    def backward_pass(self, graph, reverse_graph, project_duration: float,
+                      order: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Calculate LS and LF for all activities in reverse topological order"""
+        if order is None:
+            order = self.topological_order(graph)
         ls_lf = {}
-        out_degree = {node: len(graph[node]) for node in self.activities}
-        queue = deque([node for node in self.activities if out_degree[node] == 0])
         
-        while queue:
-            current = queue.popleft()
-            
+        for current in reversed(order):
             if not graph[current]:
                 ls_lf[current] = {'LF': project_duration}
             else:
@@ -108,11 +168,6 @@ class CrashingEngine:
             
             duration = self.get_duration(current)
             ls_lf[current]['LS'] = ls_lf[current]['LF'] - duration
-            
-            for predecessor in reverse_graph[current]:
-                out_degree[predecessor] -= 1
-                if out_degree[predecessor] == 0:
-                    queue.append(predecessor)
         
         return ls_lf
     
@@ -120,10 +175,11 @@ class CrashingEngine:
         """Find the actual critical path"""
         path = []
         current = None
+        critical_set = set(critical_activities)
         
         for activity_id in critical_activities:
             preds = reverse_graph.get(activity_id, [])
-            critical_preds = [p for p in preds if p in critical_activities]
+            critical_preds = [p for p in preds if p in critical_set]
             if not critical_preds:
                 current = activity_id
                 break
@@ -137,7 +193,7 @@ class CrashingEngine:
         while current:
             next_node = None
             for successor in graph.get(current, []):
-                if successor in critical_activities and successor not in visited:
+                if successor in critical_set and successor not in visited:
                     next_node = successor
                     break
             
@@ -154,27 +210,34 @@ class CrashingEngine:
         """Perform CPM analysis on current state"""
         graph, reverse_graph = self.build_graph()
         
-        if not self.validate_dag(graph):
-            raise ValueError("Graph contains cycles")
-        
-        es_ef = self.forward_pass(graph, reverse_graph)
-        project_duration = max(ef['EF'] for ef in es_ef.values()) if es_ef else 0
-        ls_lf = self.backward_pass(graph, reverse_graph, project_duration)
+        # Compiling runs the one topological sort, validating the DAG
+        network = CompiledNetwork.from_activities(self.activities, graph, self.get_duration)
+        return self.snapshot(network, graph, reverse_graph)
+    
+    def snapshot(self, network: CompiledNetwork, graph, reverse_graph) -> Dict:
+        """
+        Materialize a full analysis of the network's current durations: a
+        fresh forward/backward pass, schedule values stored on the activity
+        dicts, and copies of those dicts for the caller
+        """
+        es, ef = network.forward()
+        project_duration = float(ef.max()) if network.n else 0
+        ls, lf = network.backward(project_duration)
+        slack = ls - es
         
         critical_activities = []
-        for activity_id in self.activities:
-            slack = ls_lf[activity_id]['LS'] - es_ef[activity_id]['ES']
-            is_critical = abs(slack) < 0.01
-            
+        rows = zip(network.ids, es.tolist(), ef.tolist(), ls.tolist(), lf.tolist(), slack.tolist())
+        for activity_id, start, finish, late_start, late_finish, activity_slack in rows:
+            is_critical = abs(activity_slack) < 0.01
             if is_critical:
                 critical_activities.append(activity_id)
             
             self.activities[activity_id].update({
-                'ES': es_ef[activity_id]['ES'],
-                'EF': es_ef[activity_id]['EF'],
-                'LS': ls_lf[activity_id]['LS'],
-                'LF': ls_lf[activity_id]['LF'],
-                'slack': slack,
+                'ES': start,
+                'EF': finish,
+                'LS': late_start,
+                'LF': late_finish,
+                'slack': activity_slack,
                 'isCritical': is_critical
             })
         
@@ -183,7 +246,7 @@ class CrashingEngine:
         return {
             'projectDuration': project_duration,
             'criticalPath': critical_path,
-            'activities': list(copy.deepcopy(self.activities).values())
+            'activities': [dict(activity) for activity in self.activities.values()]
         }
     
     def get_crash_slope(self, activity_id: str) -> float:
@@ -227,111 +290,248 @@ class CrashingEngine:
         
         return actual_crash
     
-    def calculate_crashing_scheme(self, target_duration: float = None) -> Dict:
+    def calculate_time_cost_curve(self) -> Dict:
+        """
+        Exact minimum-cost project cost curve from one parametric LP solve:
+        every breakpoint from the normal to the shortest achievable duration,
+        with the crash plan at each (see time_cost.time_cost_curve)
+        """
+        graph, _ = self.build_graph()
+        return time_cost_curve(self.original_activities, graph)
+    
+    def iter_time_cost_curve(self) -> Iterator[Tuple[str, Dict]]:
+        """The cost curve as ('curve', ...) then ('breakpoint', ...) events"""
+        graph, _ = self.build_graph()
+        return iter_time_cost_curve(self.original_activities, graph)
+    
+    def _step_limit(self, network: CompiledNetwork, durations: np.ndarray, cut: List[int], released: List[int],
+                    current_duration: float, amount: float) -> float:
+        """
+        The largest step up to `amount` by which crashing `cut` and
+        lengthening `released` shortens the project one for one. After a step
+        t every path has length L + s * t, s being its lengthened minus its
+        crashed activities, so the project duration is convex in t; each round
+        moves t to where the longest path at t meets current_duration - t.
+        """
+        change = np.zeros(network.n)
+        change[cut] = -1.0
+        change[released] = 1.0
+        pred_ptr = network.pred_ptr.tolist()
+        pred_idx = network.pred_idx.tolist()
+        # Path slopes are integers and fall with every round
+        for _ in range(2 * network.n + 2):
+            es, ef = network.forward(durations + change * amount)
+            j = int(np.argmax(ef))
+            if ef[j] <= current_duration - amount + EPSILON * max(1.0, current_duration):
+                break
+            length, slope = float(durations[j]), float(change[j])
+            while pred_ptr[j] < pred_ptr[j + 1]:
+                preds = pred_idx[pred_ptr[j]:pred_ptr[j + 1]]
+                j = max(preds, key=lambda p: ef[p])
+                length += float(durations[j])
+                slope += float(change[j])
+            amount = (current_duration - length) / (1.0 + slope)
+        return amount
+    
+    def calculate_crashing_scheme(self, target_duration: float = None, include_snapshots: bool = False) -> Dict:
         """
         Calculate optimal crashing scheme with step-by-step reduction
-        Returns complete analysis with crashing schedule
+        Returns complete analysis with crashing schedule (see iter_crashing_scheme)
+        """
+        result = {}
+        crashing_steps = []
+        for kind, payload in self.iter_crashing_scheme(target_duration, include_snapshots):
+            if kind == 'step':
+                crashing_steps.append(payload)
+            else:
+                result.update(payload)
+        initial_analysis = result['initialAnalysis']
+        final_analysis = result['finalAnalysis']
+        
+        return {
+            'initialDuration': result['initialDuration'],
+            'finalDuration': result['finalDuration'],
+            'totalTimeSaved': result['totalTimeSaved'],
+            'totalCostIncrease': result['totalCostIncrease'],
+            'crashingSteps': crashing_steps,
+            'initialCriticalPath': initial_analysis['criticalPath'],
+            'finalCriticalPath': final_analysis['criticalPath'],
+            # Include full analysis objects for frontend display
+            'initialAnalysis': initial_analysis,
+            'finalAnalysis': final_analysis
+        }
+    
+    def iter_crashing_scheme(self, target_duration: float = None,
+                             include_snapshots: bool = False) -> Iterator[Tuple[str, Dict]]:
+        """
+        Run the crashing scheme, yielding events as they are computed:
+        ('initial', ...) with the initial analysis and target, one
+        ('step', ...) per crashing step, then ('final', ...) with the totals
+        and final analysis. Steps are not retained here, so a consumer that
+        streams them holds only the current state.
+        
+        Each step takes the cheapest way to shorten every critical path at
+        once (a minimum cut of the critical subnetwork): it crashes some
+        activities and may release earlier crashes that no longer pay off,
+        lengthening them back towards normal ('activitiesReleased'). Steps
+        last only until another path becomes critical, so recorded durations
+        are the real ones and the total cost follows the exact time-cost
+        curve. The network is compiled once; crashes update durations
+        in place and re-propagate only the affected ES and LS cones. Full
+        analyses are materialized for the initial and final state, and per
+        step only with include_snapshots.
         """
         # Reset activities to original state for fresh analysis
         self.activities = copy.deepcopy(self.original_activities)
+        graph, reverse_graph = self.build_graph()
+        network = CompiledNetwork.from_activities(self.activities, graph, self.get_duration)
+        ids = network.ids
+        durations = network.durations
         
         # Initial analysis
-        initial_analysis = self.analyze_current_state()
+        initial_analysis = self.snapshot(network, graph, reverse_graph)
         initial_duration = initial_analysis['projectDuration']
         
         if target_duration is None:
             target_duration = initial_duration * 0.7  # Reduce by 30% as default
         
-        crashing_steps = []
+        yield 'initial', {
+            'initialDuration': initial_duration,
+            'targetDuration': target_duration,
+            'initialAnalysis': initial_analysis
+        }
+        
+        # Activities without a crash time cannot be crashed
+        normal_times = durations.copy()
+        crash_times = durations.copy()
+        slopes = [float('inf')] * network.n
+        for i, activity_id in enumerate(ids):
+            crash_time = self.original_activities[activity_id].get('crashTime')
+            if crash_time is not None and float(crash_time) < durations[i]:
+                crash_times[i] = float(crash_time)
+                slopes[i] = self.get_crash_slope(activity_id)
+        
+        # Late times are kept relative to a project end at 0 so that a
+        # shorter project does not shift every activity: LS = ls + project duration
+        es, ef = network.forward()
+        ls, lf = network.backward(0.0)
+        
+        edge_src = np.repeat(np.arange(network.n), np.diff(network.succ_ptr))
+        edge_dst = network.succ_idx
+        
         current_duration = initial_duration
         total_cost_increase = 0
         step_number = 0
         
-        # Store all activities info for final output
-        all_activities_states = []
-        
-        while current_duration > target_duration:
-            step_number += 1
-            
-            # Analyze current state
-            analysis = self.analyze_current_state()
-            current_duration = analysis['projectDuration']
-            critical_path = analysis['criticalPath']
-            
-            if current_duration <= target_duration:
-                break
+        while current_duration - target_duration > EPSILON:
+            # Critical subnetwork: critical activities joined by tight edges
+            critical = np.abs(ls + current_duration - es) < 0.01
+            tight = critical[edge_src] & critical[edge_dst] & (np.abs(ef[edge_src] - es[edge_dst]) < 0.01)
             
-            # Find crashable activities on critical path
-            crashable = []
-            for act_id in critical_path:
-                if self.can_crash(act_id):
-                    slope = self.get_crash_slope(act_id)
-                    original = self.original_activities[act_id]
-                    current = self.activities[act_id]
-                    
-                    max_crash_remaining = float(current.get('duration', 0)) - float(original.get('crashTime', 0))
-                    
-                    crashable.append({
-                        'activityId': act_id,
-                        'crashSlope': slope,
-                        'maxCrashRemaining': max_crash_remaining
-                    })
+            # Cheapest way to shorten every critical path (Phillips-Dessouky):
+            # split each activity into in/out nodes and take a minimum cut.
+            # Crossing the cut forward crashes an activity at its slope
+            # (impossible once fully crashed); crossing it backward lengthens
+            # an already crashed activity again, refunding its slope. The
+            # refund is a lower bound on the activity arc, expressed with
+            # plain capacities: the arc keeps slope - refund, and
+            # in -> sink and source -> out arcs carry the refund. Tight
+            # dependencies cannot be cut forward, but a path may cross one
+            # backward: its successor then merely gains float.
+            nodes = np.flatnonzero(critical)
+            node_of = {i: k for k, i in enumerate(nodes.tolist())}
+            source, sink = 2 * len(nodes), 2 * len(nodes) + 1
+            arcs = []
+            for k, i in enumerate(nodes.tolist()):
+                crashable = durations[i] - crash_times[i] > EPSILON
+                refund = slopes[i] if normal_times[i] - durations[i] > EPSILON else 0.0
+                arcs.append((2 * k, 2 * k + 1, max(slopes[i] - refund, 0.0) if crashable else float('inf')))
+                if refund > 0:
+                    arcs.append((2 * k, sink, refund))
+                    arcs.append((source, 2 * k + 1, refund))
+                if es[i] < 0.01:
+                    arcs.append((source, 2 * k, float('inf')))
+                if abs(ef[i] - current_duration) < 0.01:
+                    arcs.append((2 * k + 1, sink, float('inf')))
+            for u, v in zip(edge_src[tight].tolist(), edge_dst[tight].tolist()):
+                arcs.append((2 * node_of[u] + 1, 2 * node_of[v], float('inf')))
             
-            if not crashable:
+            cut_cost, source_side = minimum_cut(2 * len(nodes) + 2, arcs, source, sink)
+            if cut_cost == float('inf'):
                 break  # No more activities can be crashed
+            cut = [i for k, i in enumerate(nodes.tolist()) if 2 * k in source_side and 2 * k + 1 not in source_side]
+            released = [
+                i for k, i in enumerate(nodes.tolist())
+                if 2 * k not in source_side and 2 * k + 1 in source_side and normal_times[i] - durations[i] > EPSILON
+                and slopes[i] > 0
+            ]
             
-            # Sort by crash slope (cheapest first)
-            crashable.sort(key=lambda x: x['crashSlope'])
-            
-            # Crash the cheapest activity
-            best_activity = crashable[0]
-            activity_id = best_activity['activityId']
+            # Shorten until the target or a crash or release limit, and only
+            # while no other path becomes the longest
+            amount = min([current_duration - target_duration]
+                         + [durations[i] - crash_times[i] for i in cut]
+                         + [normal_times[i] - durations[i] for i in released])
+            amount = self._step_limit(network, durations, cut, released, current_duration, float(amount))
+            if amount <= EPSILON:
+                break
             
-            # Calculate amount to crash: use remaining time to target (allowing fractional crashes)
-            crash_amount = min(best_activity['maxCrashRemaining'], current_duration - target_duration)
-            actual_crashed = self.crash_activity(activity_id, crash_amount)
+            step_number += 1
+            crashed = []
+            for i in cut:
+                durations[i] -= amount
+                self.activities[ids[i]]['duration'] = float(durations[i])
+                crashed.append({
+                    'activityId': ids[i],
+                    'amount': amount,
+                    'crashSlope': slopes[i],
+                    'costIncrease': slopes[i] * amount
+                })
+            restored = []
+            for i in released:
+                durations[i] = min(durations[i] + amount, normal_times[i])
+                self.activities[ids[i]]['duration'] = float(durations[i])
+                restored.append({
+                    'activityId': ids[i],
+                    'amount': amount,
+                    'crashSlope': slopes[i],
+                    'costIncrease': -slopes[i] * amount
+                })
+            network.repropagate_forward(es, ef, cut + released)
+            network.repropagate_backward(ls, lf, 0.0, cut + released)
             
-            # Calculate cost increase
-            slope = self.get_crash_slope(activity_id)
-            cost_increase = slope * actual_crashed
+            step_slope = sum(slopes[i] for i in cut) - sum(slopes[i] for i in released)
+            cost_increase = step_slope * amount
             total_cost_increase += cost_increase
+            new_duration = float(ef.max())
             
-            # Record this step
-            new_duration = current_duration - actual_crashed
-            
-            crashing_steps.append({
+            label = ', '.join(item['activityId'] for item in crashed)
+            if restored:
+                label += f" (releasing {', '.join(item['activityId'] for item in restored)})"
+            step = {
                 'step': step_number,
-                'activityCrashed': activity_id,
-                'amountCrashed': actual_crashed,
-                'crashSlope': slope,
+                'activityCrashed': label,
+                'activitiesCrashed': crashed,
+                'activitiesReleased': restored,
+                'amountCrashed': amount,
+                'crashSlope': step_slope,
                 'costIncrease': cost_increase,
                 'cumulativeCost': total_cost_increase,
                 'newDuration': new_duration,
                 'timeSaved': initial_duration - new_duration
-            })
+            }
+            if include_snapshots:
+                step['analysis'] = self.snapshot(network, graph, reverse_graph)
+            yield 'step', step
             
             current_duration = new_duration
         
         # Final analysis
-        final_analysis = self.analyze_current_state()
+        final_analysis = self.snapshot(network, graph, reverse_graph)
         
-        return {
-            'initialDuration': initial_duration,
+        yield 'final', {
             'finalDuration': final_analysis['projectDuration'],
             'totalTimeSaved': initial_duration - final_analysis['projectDuration'],
             'totalCostIncrease': total_cost_increase,
-            'crashingSteps': crashing_steps,
-            'initialCriticalPath': initial_analysis['criticalPath'],
-            'finalCriticalPath': final_analysis['criticalPath'],
-            # Include full analysis objects for frontend display
-            'initialAnalysis': {
-                'projectDuration': initial_analysis['projectDuration'],
-                'criticalPath': initial_analysis['criticalPath'],
-                'activities': initial_analysis['activities']
-            },
-            'finalAnalysis': {
-                'projectDuration': final_analysis['projectDuration'],
-                'criticalPath': final_analysis['criticalPath'],
-                'activities': final_analysis['activities']
-            }
+            'steps': step_number,
+            'finalAnalysis': final_analysis
         }
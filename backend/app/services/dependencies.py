@@ -0,0 +1,111 @@
+"""Dependency edge table, kept in step with the activities' predecessor lists"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+from sqlalchemy import Select, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Activity, Dependency
+from app.services.compiled_network import parse_predecessors
+
+# Edge rows per INSERT statement
+DEPENDENCY_WRITE_BATCH = 5000
+
+
+def dependency_rows(project_id: str, activity_id: str, predecessors: Optional[str]) -> List[Dict]:
+    """Edge rows for one activity's predecessor text, in listed order without repeats"""
+    rows = []
+    seen = set()
+    for pred in parse_predecessors(predecessors):
+        if pred not in seen:
+            seen.add(pred)
+            rows.append({
+                'projectId': project_id,
+                'successorId': activity_id,
+                'position': len(rows),
+                'predecessorId': pred
+            })
+    return rows
+
+
+async def add_dependencies(db: AsyncSession, project_id: str, activities: Iterable[Tuple[str, Optional[str]]]):
+    """Insert the edges of newly added activities, given as (activityId, predecessors) pairs"""
+    rows = []
+    for activity_id, predecessors in activities:
+        rows.extend(dependency_rows(project_id, activity_id, predecessors))
+        if len(rows) >= DEPENDENCY_WRITE_BATCH:
+            await db.execute(insert(Dependency), rows)
+            rows = []
+    if rows:
+        await db.execute(insert(Dependency), rows)
+
+
+async def set_dependencies(db: AsyncSession, project_id: str, activity_id: str, predecessors: Optional[str]):
+    """Replace the edges into one activity after its predecessors changed"""
+    await remove_dependencies(db, project_id, activity_id)
+    await add_dependencies(db, project_id, [(activity_id, predecessors)])
+
+
+async def remove_dependencies(db: AsyncSession, project_id: str, activity_id: str):
+    """
+    Drop the edges into a deleted activity. Edges out of it stay, as the
+    successors' predecessor text still names it.
+    """
+    await db.execute(delete(Dependency).where(
+        Dependency.projectId == project_id,
+        Dependency.successorId == activity_id
+    ))
+
+
+async def load_predecessor_lists(db: AsyncSession, project_id: str) -> Dict[str, List[str]]:
+    """
+    Predecessor IDs of every activity of a project in listed order, read with
+    one query over the primary key index. Activities without predecessors
+    are absent.
+    """
+    lists = defaultdict(list)
+    # Plain Core rows: the ORM result layer would double the cost of this query
+    connection = await db.connection()
+    for successor, predecessor in await connection.execute(
+        select(Dependency.successorId, Dependency.predecessorId)
+        .where(Dependency.projectId == project_id)
+        .order_by(Dependency.successorId, Dependency.position)
+    ):
+        lists[successor].append(predecessor)
+    return dict(lists)
+
+
+def dependents_query(project_id: str, activity_id: str, transitive: bool = False) -> Select:
+    """
+    Select the IDs of the activities that depend on `activity_id`: directly,
+    or with `transitive` also through other activities (a recursive query
+    over the predecessor index, which stops at cycles)
+    """
+    direct = select(Dependency.successorId.label('activityId')).where(
+        Dependency.projectId == project_id,
+        Dependency.predecessorId == activity_id
+    )
+    if not transitive:
+        return direct
+    closure = direct.cte('dependents', recursive=True)
+    closure = closure.union(
+        select(Dependency.successorId)
+        .join(closure, Dependency.predecessorId == closure.c.activityId)
+        .where(Dependency.projectId == project_id)
+    )
+    return select(closure.c.activityId)
+
+
+def backfill_dependencies(connection):
+    """Rebuild the whole edge table from the activities' predecessor text"""
+    connection.execute(delete(Dependency))
+    activities = connection.execution_options(yield_per=DEPENDENCY_WRITE_BATCH).execute(
+        select(Activity.projectId, Activity.activityId, Activity.predecessors)
+        .where(Activity.predecessors.isnot(None), Activity.predecessors != '')
+    )
+    rows = []
+    for project_id, activity_id, predecessors in activities:
+        rows.extend(dependency_rows(project_id, activity_id, predecessors))
+        if len(rows) >= DEPENDENCY_WRITE_BATCH:
+            connection.execute(insert(Dependency), rows)
+            rows = []
+    if rows:
+        connection.execute(insert(Dependency), rows)
@@ -0,0 +1,293 @@
+"""
+Background jobs backed by the jobs table: no broker, so it runs on a single
+box, and queued or interrupted jobs survive a restart.
+
+Every server process runs a JobRunner. Its workers claim queued jobs with a
+conditional UPDATE, so each job runs once however many processes poll, and
+renew the job's lease (heartbeatAt) while it runs. The janitor re-queues jobs
+whose lease lapsed, i.e. whose server stopped, and deletes expired jobs with
+their result files.
+"""
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+from datetime import datetime, timedelta
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.models.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Concurrent jobs per server process, seconds between polls for new jobs,
+# where results are written and how long they are kept
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+JOB_RESULT_DIR = os.getenv("JOB_RESULT_DIR", "./job_results")
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", 24 * 3600))
+
+# A running job whose heartbeat is older than this is taken to be abandoned
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 30))
+
+# Runs of a job before it is failed for good (a lapsed lease or an
+# unavailable CPU pool count; errors of the job itself fail it at once)
+JOB_MAX_ATTEMPTS = 3
+
+# Seconds before retrying a job the CPU pool had no room for
+JOB_RETRY_DELAY = 5
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+class JobArtifact(NamedTuple):
+    """What a job handler produces: the file content and how to serve it"""
+    content: bytes
+    mediaType: str
+    fileName: str
+
+
+Progress = Callable[[float, str], Awaitable[None]]
+Handler = Callable[[AsyncSession, Job, Dict, Progress], Awaitable[JobArtifact]]
+
+
+class JobRunner:
+    """
+    Claims and runs jobs of this process. Handlers are registered per job
+    kind with @job_runner.handler(kind) and called as
+    handler(db, job, params, progress); `progress(fraction, stage)` records
+    how far the job got.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, result_dir: str = JOB_RESULT_DIR,
+                 result_ttl: float = JOB_RESULT_TTL, lease_seconds: float = JOB_LEASE_SECONDS,
+                 poll_interval: float = JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.result_dir = result_dir
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, Handler] = {}
+        self.sessions: Optional[async_sessionmaker] = None
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def handler(self, kind: str):
+        def register(fn: Handler) -> Handler:
+            self.handlers[kind] = fn
+            return fn
+        return register
+
+    def start(self, sessions: async_sessionmaker):
+        """Start the workers and the janitor on the running event loop"""
+        self.sessions = sessions
+        self._wakeup = asyncio.Event()
+        os.makedirs(self.result_dir, exist_ok=True)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def stop(self):
+        """
+        Stop the workers. Jobs they were running are handed back to the
+        queue at once instead of waiting for their lease to lapse.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.sessions is not None:
+            async with self.sessions() as db:
+                await db.execute(
+                    update(Job)
+                    .where(Job.status == 'running', Job.workerId == self.worker_id)
+                    .values(status='queued', workerId=None, stage='interrupted', attempts=Job.attempts - 1)
+                )
+                await db.commit()
+
+    def notify(self):
+        """Wake an idle worker after a job was queued, instead of waiting for the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._run(job)
+
+    async def _claim(self) -> Optional[Job]:
+        """Take the oldest runnable queued job, or None"""
+        async with self.sessions() as db:
+            now = datetime.utcnow()
+            candidates = (await db.scalars(
+                select(Job.id)
+                .where(Job.status == 'queued', or_(Job.runAfter.is_(None), Job.runAfter <= now))
+                .order_by(Job.createdAt)
+                .limit(self.workers)
+            )).all()
+            for job_id in candidates:
+                # Only one process's UPDATE finds the job still queued
+                claimed = await db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == 'queued')
+                    .values(status='running', workerId=self.worker_id, attempts=Job.attempts + 1,
+                            startedAt=now, heartbeatAt=now, stage='started', error=None)
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    return await db.get(Job, job_id)
+        return None
+
+    async def _run(self, job: Job):
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise ValueError(f"Unknown job kind '{job.kind}'")
+            async with self.sessions() as db:
+                artifact = await handler(db, job, json.loads(job.params or '{}'),
+                                         lambda fraction, stage: self._progress(job.id, fraction, stage))
+            await self._progress(job.id, 0.95, 'saving')
+            path = await asyncio.to_thread(self._write, job.id, artifact)
+            finished = await self._finish(job.id, status='succeeded', progress=1.0, stage='done',
+                                          resultPath=path, resultName=artifact.fileName,
+                                          resultType=artifact.mediaType, resultSize=len(artifact.content))
+            if not finished:
+                # Deleted (or re-queued elsewhere) while running: drop the file
+                await asyncio.to_thread(self.remove_result, path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._failed(job, e)
+        finally:
+            heartbeat.cancel()
+
+    async def _failed(self, job: Job, error: Exception):
+        # HTTP errors of shared endpoint code carry a status: 429 means the
+        # CPU pool was full and 503 that it was unavailable, so retry later
+        status = getattr(error, 'status_code', None)
+        detail = getattr(error, 'detail', None) or str(error)
+        if status == 429 or (status == 503 and job.attempts < JOB_MAX_ATTEMPTS):
+            await self._finish(job.id, status='queued', workerId=None, stage='waiting for a worker',
+                               runAfter=datetime.utcnow() + timedelta(seconds=JOB_RETRY_DELAY),
+                               attempts=Job.attempts - (1 if status == 429 else 0), expiresAt=None)
+            return
+        if status is None and not isinstance(error, ValueError):
+            logger.exception("Job %s (%s) failed", job.id, job.kind, exc_info=error)
+        await self._finish(job.id, status='failed', stage='failed', error=detail)
+
+    async def _finish(self, job_id: str, **values) -> bool:
+        """Final update of a job this worker still holds; False if it no longer does"""
+        now = datetime.utcnow()
+        if values.get('status') != 'queued':
+            values.update(finishedAt=now, expiresAt=now + timedelta(seconds=self.result_ttl))
+        async with self.sessions() as db:
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == 'running', Job.workerId == self.worker_id)
+                .values(**values)
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def _progress(self, job_id: str, fraction: float, stage: str):
+        async with self.sessions() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.workerId == self.worker_id)
+                .values(progress=fraction, stage=stage, heartbeatAt=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self.sessions() as db:
+                    await db.execute(
+                        update(Job)
+                        .where(Job.id == job_id, Job.workerId == self.worker_id)
+                        .values(heartbeatAt=datetime.utcnow())
+                    )
+                    await db.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Heartbeat of job %s failed", job_id)
+
+    async def _janitor(self):
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job cleanup failed")
+            await asyncio.sleep(max(1.0, min(self.lease_seconds, self.result_ttl) / 2))
+
+    async def sweep(self):
+        """Re-queue (or fail) jobs with a lapsed lease and delete expired jobs and their files"""
+        now = datetime.utcnow()
+        lapsed = now - timedelta(seconds=self.lease_seconds)
+        async with self.sessions() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.status == 'running', Job.heartbeatAt < lapsed, Job.attempts >= JOB_MAX_ATTEMPTS)
+                .values(status='failed', stage='failed', workerId=None, finishedAt=now,
+                        expiresAt=now + timedelta(seconds=self.result_ttl),
+                        error=f"The job was interrupted {JOB_MAX_ATTEMPTS} times")
+            )
+            requeued = await db.execute(
+                update(Job)
+                .where(Job.status == 'running', Job.heartbeatAt < lapsed)
+                .values(status='queued', workerId=None, stage='interrupted')
+            )
+            expired = (await db.execute(
+                select(Job.id, Job.resultPath).where(Job.expiresAt < now)
+            )).all()
+            if expired:
+                await db.execute(delete(Job).where(Job.id.in_([job_id for job_id, _ in expired])))
+            await db.commit()
+        for _, path in expired:
+            await asyncio.to_thread(self.remove_result, path)
+        if requeued.rowcount:
+            logger.info("Re-queued %d interrupted job(s)", requeued.rowcount)
+            self.notify()
+
+    def _write(self, job_id: str, artifact: JobArtifact) -> str:
+        """Write a result file atomically; returns its path"""
+        extension = os.path.splitext(artifact.fileName)[1]
+        path = os.path.join(self.result_dir, f"{job_id}{extension}")
+        partial = f"{path}.partial"
+        with open(partial, 'wb') as f:
+            f.write(artifact.content)
+        os.replace(partial, path)
+        return path
+
+    @staticmethod
+    def remove_result(path: Optional[str]):
+        """Delete a result file, if it is still there"""
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+# Runner of this server process, started with the app
+job_runner = JobRunner()
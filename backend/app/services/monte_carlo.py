@@ -0,0 +1,208 @@
+"""Monte Carlo schedule risk simulation"""
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.services.pert_cpm import PERTCPMEngine
+
+DISTRIBUTIONS = ('beta-pert', 'triangular')
+MAX_ITERATIONS = 1_000_000
+MAX_BINS = 1000
+
+# Samples are scheduled in chunks of at most this many (activity, iteration)
+# cells so memory stays bounded regardless of the iteration count
+CHUNK_CELLS = 2_000_000
+
+DEFAULT_PERCENTILES = (5, 10, 25, 50, 75, 80, 90, 95, 99)
+
+# Resolution of the tabulated quantile functions used for beta-PERT sampling
+QUANTILE_POINTS = 2049
+
+# Activities sharing a beta shape share a table row. Past this many distinct
+# shapes (16 MB of table) beta-PERT durations are drawn with NumPy's beta
+# sampler instead; rows are tabulated this many at a time.
+MAX_QUANTILE_ROWS = 1024
+QUANTILE_CHUNK_ROWS = 128
+
+
+def _beta_quantile_table(alpha: np.ndarray, beta: np.ndarray) -> np.ndarray:
+    """
+    Tabulate the quantile function of Beta(alpha, beta) on an even grid of
+    probabilities, one row per shape. Sampling then becomes a uniform draw
+    plus linear interpolation, several times cheaper than NumPy's gamma-based
+    beta sampler. PERT shape parameters are always >= 1, so the density is
+    bounded and a trapezoid-integrated CDF is accurate at this resolution.
+    """
+    x = np.linspace(0.0, 1.0, QUANTILE_POINTS)
+    table = np.empty((len(alpha), QUANTILE_POINTS))
+    for start in range(0, len(alpha), QUANTILE_CHUNK_ROWS):
+        rows = slice(start, start + QUANTILE_CHUNK_ROWS)
+        pdf = x ** (alpha[rows, None] - 1) * (1 - x) ** (beta[rows, None] - 1)
+        cdf = np.zeros_like(pdf)
+        cdf[:, 1:] = np.cumsum((pdf[:, 1:] + pdf[:, :-1]) / 2, axis=1)
+        cdf /= cdf[:, -1:]
+        for i, row in enumerate(cdf, start):
+            table[i] = np.interp(x, row, x)
+    return table
+
+
+def _three_point_estimates(engine: PERTCPMEngine):
+    """Return (low, mode, high) arrays; activities without estimates are fixed"""
+    network = engine.compile()
+    low = network.durations.copy()
+    mode = network.durations.copy()
+    high = network.durations.copy()
+    for i, activity_id in enumerate(network.ids):
+        activity = engine.activities[activity_id]
+        a = activity.get('optimistic')
+        m = activity.get('mostLikely')
+        b = activity.get('pessimistic')
+        if a is None or m is None or b is None:
+            continue
+        a, m, b = float(a), float(m), float(b)
+        if not a <= m <= b:
+            raise ValueError(f"Activity '{activity_id}' must satisfy optimistic <= mostLikely <= pessimistic")
+        low[i], mode[i], high[i] = a, m, b
+    return low, mode, high
+
+
+class DurationSampler:
+    """Draws (n, size) duration matrices from three-point estimates"""
+
+    def __init__(self, low: np.ndarray, mode: np.ndarray, high: np.ndarray, distribution: str):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{distribution}' (use one of: {', '.join(DISTRIBUTIONS)})")
+        self.distribution = distribution
+        self.low = low
+        width = high - low
+        # Only activities with a spread are sampled; the rest stay fixed
+        self.variable = np.flatnonzero(width > 0)
+        self.a = low[self.variable, None]
+        self.w = width[self.variable, None]
+        m = mode[self.variable, None]
+        if distribution == 'beta-pert':
+            alpha = 1 + 4 * (m - self.a) / self.w
+            beta = 1 + 4 * (self.a + self.w - m) / self.w
+            shapes, rows = np.unique(np.hstack([alpha, beta]), axis=0, return_inverse=True)
+            if len(shapes) <= MAX_QUANTILE_ROWS:
+                self.table = _beta_quantile_table(shapes[:, 0], shapes[:, 1]).ravel()
+                self.table_next = np.append(self.table[1:], 0.0)
+                self.row_offsets = (rows.reshape(-1) * QUANTILE_POINTS)[:, None]
+            else:
+                self.table = None
+                self.alpha = alpha
+                self.beta = beta
+        else:
+            self.c = (m - self.a) / self.w
+            self.left_scale = self.w * (m - self.a)
+            self.right_scale = self.w * (self.a + self.w - m)
+
+    def sample(self, size: int, rng: np.random.Generator) -> np.ndarray:
+        if len(self.variable) == 0:
+            return np.repeat(self.low[:, None], size, axis=1)
+
+        if self.distribution == 'beta-pert' and self.table is None:
+            drawn = rng.beta(self.alpha, self.beta, size=(len(self.variable), size))
+            drawn *= self.w
+            drawn += self.a
+            return self._with_fixed(drawn, size)
+
+        u = rng.random((len(self.variable), size))
+        if self.distribution == 'beta-pert':
+            # Linear interpolation in the quantile table, computed in place
+            u *= QUANTILE_POINTS - 1
+            cell = u.astype(np.intp)
+            u -= cell
+            cell += self.row_offsets
+            drawn = self.table_next[cell]
+            lower = self.table[cell]
+            drawn -= lower
+            drawn *= u
+            drawn += lower
+            drawn *= self.w
+            drawn += self.a
+        else:
+            # Inverse CDF of the triangular distribution
+            left = self.a + np.sqrt(u * self.left_scale)
+            right = self.a + self.w - np.sqrt((1 - u) * self.right_scale)
+            drawn = np.where(u < self.c, left, right)
+        return self._with_fixed(drawn, size)
+
+    def _with_fixed(self, drawn: np.ndarray, size: int) -> np.ndarray:
+        """Sampled rows of the variable activities, plus the fixed durations"""
+        if len(self.variable) == len(self.low):
+            return drawn
+        samples = np.repeat(self.low[:, None], size, axis=1)
+        samples[self.variable] = drawn
+        return samples
+
+
+def simulate_schedule(activities_data: List[Dict], iterations: int = 10000, distribution: str = 'beta-pert',
+                      seed: Optional[int] = None, deadline: Optional[float] = None, bins: int = 50,
+                      percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                      predecessors: Optional[Dict[str, List[str]]] = None) -> Dict:
+    """
+    Simulate project completion under three-point duration uncertainty.
+
+    Every iteration draws a duration per activity from optimistic/mostLikely/
+    pessimistic and schedules all iterations at once as matrices. Activities
+    without three-point estimates keep their fixed duration.
+
+    Returns the completion-time distribution (summary statistics, percentiles,
+    histogram), each activity's criticality index (share of iterations in
+    which it was critical) and, if a deadline is given, the probability of
+    finishing by it. The seed used is returned so a run can be reproduced.
+    `predecessors` is passed on to PERTCPMEngine.
+    """
+    if not 1 <= iterations <= MAX_ITERATIONS:
+        raise ValueError(f"iterations must be between 1 and {MAX_ITERATIONS}")
+    if not 1 <= bins <= MAX_BINS:
+        raise ValueError(f"bins must be between 1 and {MAX_BINS}")
+
+    engine = PERTCPMEngine(activities_data, predecessors)
+    network = engine.compile()
+    if network.n == 0:
+        raise ValueError("Project has no activities")
+    sampler = DurationSampler(*_three_point_estimates(engine), distribution)
+
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 63))
+    rng = np.random.default_rng(seed)
+
+    completion = np.empty(iterations)
+    critical_counts = np.zeros(network.n, dtype=np.int64)
+    chunk = max(1, min(iterations, CHUNK_CELLS // network.n))
+    for offset in range(0, iterations, chunk):
+        size = min(chunk, iterations - offset)
+        durations = sampler.sample(size, rng)
+        es, ef = network.forward(durations)
+        finish = ef.max(axis=0)
+        ls, _ = network.backward(finish, durations)
+        ls -= es
+        critical_counts += np.count_nonzero(ls <= 1e-9 * np.maximum(finish, 1.0), axis=1)
+        completion[offset:offset + size] = finish
+
+    counts, edges = np.histogram(completion, bins=bins)
+    result = {
+        'iterations': iterations,
+        'distribution': distribution,
+        'seed': seed,
+        'meanDuration': float(completion.mean()),
+        'stdDeviation': float(completion.std()),
+        'minDuration': float(completion.min()),
+        'maxDuration': float(completion.max()),
+        'percentiles': [
+            {'percentile': float(p), 'duration': float(value)}
+            for p, value in zip(percentiles, np.percentile(completion, percentiles))
+        ],
+        'histogram': {
+            'binEdges': edges.tolist(),
+            'counts': counts.tolist()
+        },
+        'criticalityIndex': [
+            {'activityId': activity_id, 'criticality': float(count) / iterations}
+            for activity_id, count in zip(network.ids, critical_counts.tolist())
+        ]
+    }
+    if deadline is not None:
+        result['deadline'] = deadline
+        result['probability'] = float(np.count_nonzero(completion <= deadline)) / iterations
+    return result
@@ -1,11 +1,251 @@
 """Network Diagram Generator for Project Analysis"""
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import Patch
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
 import networkx as nx
+from functools import lru_cache
 from io import BytesIO
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 import numpy as np
+from app.services.artifact_cache import artifact_cache, artifact_key
+
+# Diagrams are drawn on their own Figure and Agg canvas, never through
+# pyplot's global figure manager, so several can render at once in threads.
+# Artists of one kind are batched into a single collection: boxes, edges,
+# arrowheads and all text (as glyph outlines) are one draw call each.
+
+DPI = 150
+
+# Box colors and border widths of AON nodes, by kind
+NODE_STYLES = {
+    'startEnd': {'face': '#D1FAE5', 'edge': '#059669', 'text': '#065F46', 'linewidth': 2},
+    'critical': {'face': '#FEE2E2', 'edge': '#DC2626', 'text': '#7F1D1D', 'linewidth': 2.5},
+    'normal': {'face': '#DBEAFE', 'edge': '#3B82F6', 'text': '#1E40AF', 'linewidth': 2},
+}
+
+# Edge color, line width and arrowhead length and width (in layout units), by criticality
+EDGE_STYLES = {
+    True: {'color': '#DC2626', 'linewidth': 2.5, 'head': (0.24, 0.18)},
+    False: {'color': '#6B7280', 'linewidth': 1.5, 'head': (0.2, 0.14)},
+}
+EDGE_ALPHA = 0.8
+EDGE_CURVATURE = 0.1  # like matplotlib's arc3,rad=0.1
+
+# Width and height of START/END and activity boxes, in layout units
+START_END_BOX = (1.2, 0.8)
+ACTIVITY_BOX = (2.0, 1.4)
+
+# Legend entries (label, node kind); the handles are only read by legends
+AON_LEGEND = [
+    ('Start/End Nodes', 'startEnd'),
+    ('Critical Activities', 'critical'),
+    ('Non-Critical Activities', 'normal'),
+]
+AON_LEGEND_HANDLES = [
+    Patch(facecolor=NODE_STYLES[kind]['face'], edgecolor=NODE_STYLES[kind]['edge'], label=label, linewidth=2)
+    for label, kind in AON_LEGEND
+]
+SIMPLE_LEGEND_HANDLES = [
+    Patch(facecolor='#059669', label='Start/End Nodes'),
+    Patch(facecolor='#DC2626', label='Critical Path'),
+    Patch(facecolor='#3B82F6', label='Non-Critical Activities')
+]
+
+# Space above the diagram for its title, in inches
+TITLE_BAND = 0.8
+MIN_FIGURE_WIDTH = 6.0
+
+
+class DiagramLabel(NamedTuple):
+    """A text of a diagram, placed in layout units and sized in points"""
+    text: str
+    x: float
+    y: float
+    size: float
+    bold: bool
+    color: str
+    va: str = 'center'  # center, bottom or top; text is always centered horizontally
+    background: bool = False  # white backing, behind timing values
+
+
+class AONScene(NamedTuple):
+    """
+    Everything an AON diagram shows, in layout units: independent of the
+    backend that draws it
+    """
+    boxes: np.ndarray  # (n, 4): x, y of the lower left corner, width, height
+    box_kinds: List[str]  # keys of NODE_STYLES
+    edges: List[np.ndarray]  # polylines, ending at the base of their arrowhead
+    edge_critical: List[bool]
+    arrowheads: np.ndarray  # (m, 3, 2) triangles
+    labels: List[DiagramLabel]
+    xlim: Tuple[float, float]
+    ylim: Tuple[float, float]
+
+
+def format_value(value: Optional[float]) -> str:
+    return f"{value:.0f}" if value is not None else "-"
+
+
+@lru_cache(maxsize=None)
+def _line_box(size: float, bold: bool) -> Tuple[float, float]:
+    """Bottom and top of a line of text (descent to ascent) in points, for vertical alignment"""
+    vertices = TextPath((0, 0), "0Ag", size=size, prop=_font(bold)).vertices
+    return vertices[:, 1].min(), vertices[:, 1].max()
+
+
+@lru_cache(maxsize=2)
+def _font(bold: bool) -> FontProperties:
+    return FontProperties(weight='bold' if bold else 'normal')
+
+
+@lru_cache(maxsize=8192)
+def _text_path(text: str, size: float, bold: bool, va: str) -> Path:
+    """
+    Glyph outlines of a text in inches, aligned around the origin. Cached:
+    diagrams repeat the same short texts (IDs, values, corner labels) often.
+    """
+    path = TextPath((0, 0), text, size=size, prop=_font(bold))
+    vertices = path.vertices.copy()
+    bottom, top = _line_box(size, bold)
+    if len(vertices):
+        vertices[:, 0] -= (vertices[:, 0].min() + vertices[:, 0].max()) / 2
+    vertices[:, 1] -= {'center': (bottom + top) / 2, 'bottom': bottom, 'top': top}[va]
+    return Path(vertices / 72, path.codes, readonly=True)
+
+
+@lru_cache(maxsize=8192)
+def _text_background(text: str, size: float, bold: bool, va: str) -> Path:
+    """A box around a text, padded like a matplotlib bbox with pad=0.3"""
+    vertices = _text_path(text, size, bold, va).vertices
+    pad = 0.3 * size / 72
+    bottom, top = _line_box(size, bold)
+    offset = {'center': (bottom + top) / 2, 'bottom': bottom, 'top': top}[va]
+    x0, x1 = (vertices[:, 0].min(), vertices[:, 0].max()) if len(vertices) else (0, 0)
+    y0, y1 = (bottom - offset) / 72, (top - offset) / 72
+    return Path([(x0 - pad, y0 - pad), (x1 + pad, y0 - pad), (x1 + pad, y1 + pad), (x0 - pad, y1 + pad), (x0 - pad, y0 - pad)],
+                closed=True, readonly=True)
+
+
+def curved_edges(starts: np.ndarray, ends: np.ndarray, source_half: np.ndarray, target_half: np.ndarray,
+                 round_nodes: bool, head_sizes: np.ndarray, samples: int = 48):
+    """
+    Arcs from node to node (quadratic curves bulging like arc3,rad=0.1),
+    clipped to the outlines of both nodes, with an arrowhead at the target.
+    Nodes are boxes with the given half width and height, or circles of
+    that radius when `round_nodes`.
+    
+    Returns the polylines, the arrowhead triangles and the indices of the
+    drawn edges (edges between overlapping nodes are left out).
+    """
+    if len(starts) == 0:
+        return [], np.zeros((0, 3, 2)), []
+    delta = ends - starts
+    control = (starts + ends) / 2 + EDGE_CURVATURE * np.stack([delta[:, 1], -delta[:, 0]], axis=1)
+    t = np.linspace(0, 1, samples)[None, :, None]
+    points = (1 - t) ** 2 * starts[:, None] + 2 * (1 - t) * t * control[:, None] + t ** 2 * ends[:, None]
+    
+    def distance(centers, half):
+        # Distance from the node center in node sizes: inside where below 1
+        offsets = np.abs(points - centers[:, None]) / half[:, None]
+        return np.hypot(offsets[..., 0], offsets[..., 1]) if round_nodes else offsets.max(axis=2)
+    
+    source_distance = distance(starts, source_half)
+    target_distance = distance(ends, target_half)
+    outside = (source_distance > 1) & (target_distance > 1)
+    drawn = outside.any(axis=1)
+    first = np.argmax(outside, axis=1)
+    last = samples - 1 - np.argmax(outside[:, ::-1], axis=1)
+    rows = np.arange(len(starts))
+    
+    def crossing(inner, outer, distances):
+        # Where the segment between two samples meets the node outline
+        d_in, d_out = distances[rows, inner], distances[rows, outer]
+        share = ((d_out - 1) / np.maximum(d_out - d_in, 1e-9))[:, None]
+        return points[rows, outer] + share * (points[rows, inner] - points[rows, outer])
+    
+    tails = crossing(np.maximum(first - 1, 0), first, source_distance)
+    tips = crossing(np.minimum(last + 1, samples - 1), last, target_distance)
+    
+    # Arrowheads point along the curve's last drawn segment
+    direction = tips - points[rows, np.maximum(last - 1, 0)]
+    direction /= np.maximum(np.linalg.norm(direction, axis=1), 1e-9)[:, None]
+    normal = np.stack([-direction[:, 1], direction[:, 0]], axis=1)
+    bases = tips - head_sizes[:, :1] * direction
+    heads = np.stack([
+        tips,
+        bases + head_sizes[:, 1:] / 2 * normal,
+        bases - head_sizes[:, 1:] / 2 * normal,
+    ], axis=1)
+    
+    indices = [int(i) for i in np.flatnonzero(drawn)]
+    lines = [
+        np.concatenate([tails[i:i + 1], points[i, first[i]:last[i] + 1], bases[i:i + 1]])
+        for i in indices
+    ]
+    return lines, heads[indices], indices
+
+
+def new_figure(xlim: Tuple[float, float], ylim: Tuple[float, float], width: float, height: float):
+    """
+    A figure sized to the layout's aspect ratio, at most width x height
+    inches, with one axes filling it below the title band. Sizing the figure
+    to the content replaces a tight-bbox save, which would draw it twice.
+    """
+    data_width = max(xlim[1] - xlim[0], 1e-9)
+    data_height = max(ylim[1] - ylim[0], 1e-9)
+    scale = min(width / data_width, (height - TITLE_BAND) / data_height)  # inches per layout unit
+    axes_width, axes_height = data_width * scale, data_height * scale
+    figure_width = max(axes_width, MIN_FIGURE_WIDTH)
+    figure_height = axes_height + TITLE_BAND
+    
+    fig = Figure(figsize=(figure_width, figure_height), facecolor='white')
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([
+        (figure_width - axes_width) / 2 / figure_width, 0,
+        axes_width / figure_width, axes_height / figure_height
+    ])
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+    ax.set_autoscale_on(False)
+    ax.axis('off')
+    return fig, ax, scale
+
+
+def add_labels(fig: Figure, ax, labels: List[DiagramLabel]):
+    """Add texts as two collections: their backings, then the glyph outlines"""
+    backed = [label for label in labels if label.background]
+    if backed:
+        ax.add_collection(PathCollection(
+            [_text_background(l.text, l.size, l.bold, l.va) for l in backed],
+            offsets=[(l.x, l.y) for l in backed],
+            offset_transform=ax.transData,
+            transform=fig.dpi_scale_trans,
+            facecolors=(1, 1, 1, 0.7),
+            edgecolors='none',
+            zorder=3
+        ))
+    if labels:
+        ax.add_collection(PathCollection(
+            [_text_path(l.text, l.size, l.bold, l.va) for l in labels],
+            offsets=[(l.x, l.y) for l in labels],
+            offset_transform=ax.transData,
+            transform=fig.dpi_scale_trans,
+            facecolors=[l.color for l in labels],
+            edgecolors='none',
+            zorder=4
+        ))
+
+
+def save_png(fig: Figure) -> BytesIO:
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=DPI, facecolor='white', edgecolor='none')
+    buf.seek(0)
+    return buf
 
 
 class NetworkDiagramGenerator:
@@ -75,28 +315,15 @@ class NetworkDiagramGenerator:
     
     def _hierarchical_layout(self) -> Dict[str, Tuple[float, float]]:
         """Create hierarchical layout based on activity levels"""
-        # Calculate levels using topological sort
+        # Level of a node: one past the highest level of its predecessors,
+        # assigned in topological order (no recursion, so long chains work)
         levels = {}
-        visited = set()
-        
-        def calculate_level(node):
-            if node in visited:
-                return levels.get(node, 0)
-            
-            visited.add(node)
-            predecessors = list(self.graph.predecessors(node))
-            
-            if not predecessors:
-                levels[node] = 0
-            else:
-                max_pred_level = max(calculate_level(pred) for pred in predecessors)
-                levels[node] = max_pred_level + 1
-            
-            return levels[node]
-        
-        # Calculate levels for all nodes
-        for node in self.graph.nodes():
-            calculate_level(node)
+        try:
+            order = list(nx.topological_sort(self.graph))
+        except nx.NetworkXUnfeasible:
+            return {}
+        for node in order:
+            levels[node] = max((levels[pred] + 1 for pred in self.graph.predecessors(node)), default=0)
         
         # Group nodes by level
         level_nodes = {}
@@ -107,7 +334,6 @@ class NetworkDiagramGenerator:
         
         # Create positions
         pos = {}
-        max_level = max(levels.values()) if levels else 0
         
         for level, nodes in level_nodes.items():
             # Sort nodes at same level for consistent ordering
@@ -122,359 +348,159 @@ class NetworkDiagramGenerator:
         
         return pos
     
-    def generate_diagram(self, width: float = 10, height: float = 6) -> BytesIO:
-        """Generate network diagram and return as BytesIO"""
-        # Create figure
-        fig, ax = plt.subplots(figsize=(width, height), facecolor='white')
-        
-        # Get layout
+    def _layout(self, spring_k: float) -> Dict[str, Tuple[float, float]]:
         pos = self._hierarchical_layout()
-        
         if not pos:
             # Fallback to spring layout if hierarchical fails
-            pos = nx.spring_layout(self.graph, k=2, iterations=50)
-        
-        # Separate critical and non-critical edges
-        critical_edges = []
-        normal_edges = []
-        
-        for edge in self.graph.edges():
-            if edge[0] in self.critical_path and edge[1] in self.critical_path:
-                critical_edges.append(edge)
-            else:
-                normal_edges.append(edge)
-        
-        # Draw normal edges
-        nx.draw_networkx_edges(
-            self.graph, pos,
-            edgelist=normal_edges,
-            edge_color='#9CA3AF',
-            width=1.5,
-            alpha=0.6,
-            arrows=True,
-            arrowsize=15,
-            arrowstyle='->',
-            connectionstyle='arc3,rad=0.1',
-            ax=ax
-        )
-        
-        # Draw critical path edges
-        nx.draw_networkx_edges(
-            self.graph, pos,
-            edgelist=critical_edges,
-            edge_color='#DC2626',
-            width=3,
-            alpha=0.9,
-            arrows=True,
-            arrowsize=20,
-            arrowstyle='-|>',
-            connectionstyle='arc3,rad=0.1',
-            ax=ax
-        )
-        
-        # Separate critical, non-critical, and start/end nodes
-        start_end_nodes = [n for n in self.graph.nodes() if n in ['START', 'END']]
-        critical_nodes = [n for n in self.graph.nodes() if n in self.critical_path and n not in start_end_nodes]
-        normal_nodes = [n for n in self.graph.nodes() if n not in self.critical_path and n not in start_end_nodes]
-        
-        # Draw normal nodes
-        nx.draw_networkx_nodes(
-            self.graph, pos,
-            nodelist=normal_nodes,
-            node_color='#3B82F6',
-            node_size=800,
-            alpha=0.9,
-            ax=ax
-        )
-        
-        # Draw critical nodes
-        nx.draw_networkx_nodes(
-            self.graph, pos,
-            nodelist=critical_nodes,
-            node_color='#DC2626',
-            node_size=1000,
-            alpha=0.95,
-            ax=ax
-        )
-        
-        # Draw START/END nodes differently
-        if start_end_nodes:
-            nx.draw_networkx_nodes(
-                self.graph, pos,
-                nodelist=start_end_nodes,
-                node_color='#059669',
-                node_size=900,
-                alpha=0.95,
-                node_shape='s',  # Square shape for start/end
-                ax=ax
-            )
-        
-        # Add node labels
-        labels = {node: node for node in self.graph.nodes()}
-        nx.draw_networkx_labels(
-            self.graph, pos,
-            labels,
-            font_size=11,
-            font_weight='bold',
-            font_color='white',
-            ax=ax
-        )
-        
-        # Add title
-        ax.set_title('Project Network Diagram', 
-                     fontsize=16, 
-                     fontweight='bold',
-                     color='#1F2937',
-                     pad=20)
-        
-        # Add legend
-        from matplotlib.patches import Patch
-        legend_elements = [
-            Patch(facecolor='#059669', label='Start/End Nodes'),
-            Patch(facecolor='#DC2626', label='Critical Path'),
-            Patch(facecolor='#3B82F6', label='Non-Critical Activities')
+            pos = nx.spring_layout(self.graph, k=spring_k, iterations=50, seed=0)
+        return pos
+    
+    def _edge_arrays(self, pos: Dict[str, Tuple[float, float]]):
+        edges = list(self.graph.edges())
+        starts = np.array([pos[u] for u, _ in edges], dtype=float).reshape(-1, 2)
+        ends = np.array([pos[v] for _, v in edges], dtype=float).reshape(-1, 2)
+        critical = [u in self.critical_path and v in self.critical_path for u, v in edges]
+        return edges, starts, ends, critical
+    
+    def generate_diagram(self, width: float = 10, height: float = 6) -> BytesIO:
+        """Generate network diagram and return as BytesIO"""
+        pos = self._layout(spring_k=2)
+        xs = [p[0] for p in pos.values()] or [0]
+        ys = [p[1] for p in pos.values()] or [0]
+        fig, ax, scale = new_figure((min(xs) - 1, max(xs) + 1), (min(ys) - 1, max(ys) + 1), width, height)
+        
+        # Separate critical, non-critical, and start/end nodes; marker
+        # sizes are areas in points squared, as with nx.draw_networkx_nodes
+        groups = [
+            ([n for n in self.graph.nodes() if n in ['START', 'END']], '#059669', 900, 0.95, 's'),
+            ([n for n in self.graph.nodes() if n in self.critical_path and n not in ['START', 'END']], '#DC2626', 1000, 0.95, 'o'),
+            ([n for n in self.graph.nodes() if n not in self.critical_path and n not in ['START', 'END']], '#3B82F6', 800, 0.9, 'o'),
         ]
-        ax.legend(handles=legend_elements, 
-                 loc='upper left',
-                 frameon=True,
-                 fancybox=True,
-                 shadow=True,
-                 fontsize=10)
-        
-        # Remove axes
-        ax.axis('off')
+        node_radius = {}
+        for nodes, color, size, alpha, marker in groups:
+            if nodes:
+                ax.scatter([pos[n][0] for n in nodes], [pos[n][1] for n in nodes],
+                           s=size, c=color, alpha=alpha, marker=marker, linewidths=0, zorder=2)
+            for n in nodes:
+                node_radius[n] = size ** 0.5 / 2 / 72 / scale  # in layout units
+        
+        # Edges and arrowheads, sized in points like the nodes
+        edges, starts, ends, critical = self._edge_arrays(pos)
+        radius = np.array([[node_radius[u], node_radius[v]] for u, v in edges]).reshape(-1, 2)
+        heads = np.array([(20 if c else 15, 12 if c else 9) for c in critical], dtype=float).reshape(-1, 2) / 72 / scale
+        lines, arrowheads, drawn = curved_edges(starts, ends, np.repeat(radius[:, :1], 2, axis=1),
+                                                np.repeat(radius[:, 1:], 2, axis=1), True, heads)
+        colors = ['#DC2626' if critical[i] else '#9CA3AF' for i in drawn]
+        ax.add_collection(LineCollection(lines, colors=colors, alpha=0.75,
+                                         linewidths=[3 if critical[i] else 1.5 for i in drawn], zorder=1))
+        ax.add_collection(PolyCollection(arrowheads, facecolors=colors, edgecolors='none', alpha=0.75, zorder=1))
         
-        # Adjust layout to prevent label cutoff
-        plt.tight_layout(pad=1.5)
-        
-        # Save to BytesIO
-        buf = BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        buf.seek(0)
-        
-        # Close the plot to free memory
-        plt.close(fig)
+        # Add node labels
+        add_labels(fig, ax, [DiagramLabel(str(n), x, y, 11, True, 'white') for n, (x, y) in pos.items()])
         
-        return buf
+        ax.set_title('Project Network Diagram', fontsize=16, fontweight='bold', color='#1F2937', pad=20)
+        ax.legend(handles=SIMPLE_LEGEND_HANDLES, loc='upper left', frameon=True, fancybox=True, shadow=True, fontsize=10)
+        return save_png(fig)
     
-    def generate_aon_diagram(self, width: float = 12, height: float = 8) -> BytesIO:
-        """Generate Activity-on-Node (AON) diagram with detailed boxes"""
-        fig, ax = plt.subplots(figsize=(width, height), facecolor='white')
-        
-        # Get layout
-        pos = self._hierarchical_layout()
-        
-        if not pos:
-            pos = nx.spring_layout(self.graph, k=2.5, iterations=50)
-        
-        # Draw edges first (so they appear behind nodes)
-        for edge in self.graph.edges():
-            start_pos = pos[edge[0]]
-            end_pos = pos[edge[1]]
-            
-            # Determine if edge is critical
-            is_critical = edge[0] in self.critical_path and edge[1] in self.critical_path
-            
-            # Draw arrow
-            ax.annotate('',
-                       xy=end_pos, xytext=start_pos,
-                       arrowprops=dict(
-                           arrowstyle='-|>',
-                           color='#DC2626' if is_critical else '#6B7280',
-                           lw=2.5 if is_critical else 1.5,
-                           alpha=0.8,
-                           connectionstyle='arc3,rad=0.1'
-                       ))
-        
-        # Draw nodes as detailed boxes
+    def aon_scene(self) -> AONScene:
+        """Layout of the Activity-on-Node diagram: boxes, edges and texts"""
+        pos = self._layout(spring_k=2.5)
+        
+        boxes = []
+        box_kinds = []
+        half_sizes = {}
+        labels = []
         for node, (x, y) in pos.items():
             activity = self.activities.get(node, {})
-            is_critical = node in self.critical_path
             is_start_end = node in ['START', 'END']
+            kind = 'startEnd' if is_start_end else 'critical' if node in self.critical_path else 'normal'
+            box_width, box_height = START_END_BOX if is_start_end else ACTIVITY_BOX
+            boxes.append((x - box_width / 2, y - box_height / 2, box_width, box_height))
+            box_kinds.append(kind)
+            half_sizes[node] = (box_width / 2, box_height / 2)
+            color = NODE_STYLES[kind]['text']
             
-            # Box dimensions
-            if is_start_end:
-                box_width = 1.2
-                box_height = 0.8
-            else:
-                box_width = 2.0
-                box_height = 1.4
-            
-            # Colors
             if is_start_end:
-                box_color = '#D1FAE5'
-                border_color = '#059669'
-                text_color = '#065F46'
-            elif is_critical:
-                box_color = '#FEE2E2'
-                border_color = '#DC2626'
-                text_color = '#7F1D1D'
-            else:
-                box_color = '#DBEAFE'
-                border_color = '#3B82F6'
-                text_color = '#1E40AF'
+                # Just show START/END label
+                labels.append(DiagramLabel(node, x, y, 14, True, color))
+                continue
             
-            # Draw box
-            rect = plt.Rectangle(
-                (x - box_width/2, y - box_height/2),
-                box_width, box_height,
-                facecolor=box_color,
-                edgecolor=border_color,
-                linewidth=2.5 if is_critical else 2,
-                zorder=2
-            )
-            ax.add_patch(rect)
+            # Activity ID at top center, duration in the middle
+            labels.append(DiagramLabel(str(node), x, y + 0.35, 12, True, color))
+            duration = activity.get('duration', 0)
+            labels.append(DiagramLabel(f"Duration: {format_value(duration)}", x, y, 9, False, color))
             
-            # Add activity ID (center, bold)
-            if is_start_end:
-                # Just show START/END label
-                ax.text(x, y, node,
-                       ha='center', va='center',
-                       fontsize=14, fontweight='bold',
-                       color=text_color,
-                       zorder=3)
-            else:
-                # Activity name at top center
-                ax.text(x, y + 0.35, node,
-                       ha='center', va='center',
-                       fontsize=12, fontweight='bold',
-                       color=text_color,
-                       zorder=3)
-                
-                # Duration in center
-                duration = activity.get('duration', 0)
-                duration_text = f"Duration: {duration:.0f}" if duration is not None else "Duration: -"
-                ax.text(x, y, duration_text,
-                       ha='center', va='center',
-                       fontsize=9,
-                       color=text_color,
-                       zorder=3)
-                
-                # ES in top-left corner
-                es = activity.get('ES', 0)
-                es_text = f"{es:.0f}" if es is not None else "-"
-                ax.text(x - box_width/2 + 0.15, y + box_height/2 - 0.15,
-                       es_text,
-                       ha='center', va='center',
-                       fontsize=9,
-                       color=text_color,
-                       bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7, edgecolor='none'),
-                       zorder=3)
-                
-                # EF in top-right corner
-                ef = activity.get('EF', 0)
-                ef_text = f"{ef:.0f}" if ef is not None else "-"
-                ax.text(x + box_width/2 - 0.15, y + box_height/2 - 0.15,
-                       ef_text,
-                       ha='center', va='center',
-                       fontsize=9,
-                       color=text_color,
-                       bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7, edgecolor='none'),
-                       zorder=3)
-                
-                # LS in bottom-left corner
-                ls = activity.get('LS', 0)
-                ls_text = f"{ls:.0f}" if ls is not None else "-"
-                ax.text(x - box_width/2 + 0.15, y - box_height/2 + 0.15,
-                       ls_text,
-                       ha='center', va='center',
-                       fontsize=9,
-                       color=text_color,
-                       bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7, edgecolor='none'),
-                       zorder=3)
-                
-                # LF in bottom-right corner
-                lf = activity.get('LF', 0)
-                lf_text = f"{lf:.0f}" if lf is not None else "-"
-                ax.text(x + box_width/2 - 0.15, y - box_height/2 + 0.15,
-                       lf_text,
-                       ha='center', va='center',
-                       fontsize=9,
-                       color=text_color,
-                       bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7, edgecolor='none'),
-                       zorder=3)
-                
-                # Add labels for corners (smaller text above values)
-                label_fontsize = 6
-                label_offset = 0.08
-                ax.text(x - box_width/2 + 0.15, y + box_height/2 - 0.15 + label_offset,
-                       'ES',
-                       ha='center', va='bottom',
-                       fontsize=label_fontsize,
-                       color=text_color,
-                       zorder=3)
-                ax.text(x + box_width/2 - 0.15, y + box_height/2 - 0.15 + label_offset,
-                       'EF',
-                       ha='center', va='bottom',
-                       fontsize=label_fontsize,
-                       color=text_color,
-                       zorder=3)
-                ax.text(x - box_width/2 + 0.15, y - box_height/2 + 0.15 - label_offset,
-                       'LS',
-                       ha='center', va='top',
-                       fontsize=label_fontsize,
-                       color=text_color,
-                       zorder=3)
-                ax.text(x + box_width/2 - 0.15, y - box_height/2 + 0.15 - label_offset,
-                       'LF',
-                       ha='center', va='top',
-                       fontsize=label_fontsize,
-                       color=text_color,
-                       zorder=3)
-        
-        # Add title
-        ax.set_title('Activity-on-Node (AON) Network Diagram',
-                     fontsize=16,
-                     fontweight='bold',
-                     color='#1F2937',
-                     pad=20)
-        
-        # Add legend
-        from matplotlib.patches import Patch
-        legend_elements = [
-            Patch(facecolor='#D1FAE5', edgecolor='#059669',
-                  label='Start/End Nodes', linewidth=2),
-            Patch(facecolor='#FEE2E2', edgecolor='#DC2626', 
-                  label='Critical Activities', linewidth=2),
-            Patch(facecolor='#DBEAFE', edgecolor='#3B82F6',
-                  label='Non-Critical Activities', linewidth=2)
-        ]
-        ax.legend(handles=legend_elements,
-                 loc='upper left',
-                 frameon=True,
-                 fancybox=True,
-                 shadow=True,
-                 fontsize=10)
-        
-        # Set axis limits with padding
-        if pos:
-            x_vals = [p[0] for p in pos.values()]
-            y_vals = [p[1] for p in pos.values()]
-            x_margin = (max(x_vals) - min(x_vals)) * 0.15
-            y_margin = (max(y_vals) - min(y_vals)) * 0.15
-            ax.set_xlim(min(x_vals) - 1 - x_margin, max(x_vals) + 1 + x_margin)
-            ax.set_ylim(min(y_vals) - 1 - y_margin, max(y_vals) + 1 + y_margin)
-        
-        # Remove axes
-        ax.axis('off')
-        ax.set_aspect('equal')
-        
-        # Adjust layout
-        plt.tight_layout(pad=1.5)
-        
-        # Save to BytesIO
-        buf = BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight',
-                   facecolor='white', edgecolor='none')
-        buf.seek(0)
-        
-        plt.close(fig)
-        
-        return buf
+            # ES, EF top left and right, LS, LF bottom left and right, each
+            # value under or over its small corner label
+            left, right = x - box_width / 2 + 0.15, x + box_width / 2 - 0.15
+            top, bottom = y + box_height / 2 - 0.15, y - box_height / 2 + 0.15
+            for name, cx, cy, label_va, label_dy in (('ES', left, top, 'bottom', 0.08), ('EF', right, top, 'bottom', 0.08),
+                                                      ('LS', left, bottom, 'top', -0.08), ('LF', right, bottom, 'top', -0.08)):
+                labels.append(DiagramLabel(format_value(activity.get(name, 0)), cx, cy, 9, False, color, background=True))
+                labels.append(DiagramLabel(name, cx, cy + label_dy, 6, False, color, va=label_va))
+        
+        edges, starts, ends, critical = self._edge_arrays(pos)
+        source_half = np.array([half_sizes[u] for u, _ in edges], dtype=float).reshape(-1, 2)
+        target_half = np.array([half_sizes[v] for _, v in edges], dtype=float).reshape(-1, 2)
+        heads = np.array([EDGE_STYLES[c]['head'] for c in critical], dtype=float).reshape(-1, 2)
+        lines, arrowheads, drawn = curved_edges(starts, ends, source_half, target_half, False, heads)
+        
+        # Axis limits with padding
+        xs = [p[0] for p in pos.values()] or [0]
+        ys = [p[1] for p in pos.values()] or [0]
+        x_margin = (max(xs) - min(xs)) * 0.15
+        y_margin = (max(ys) - min(ys)) * 0.15
+        
+        return AONScene(
+            boxes=np.array(boxes, dtype=float).reshape(-1, 4),
+            box_kinds=box_kinds,
+            edges=lines,
+            edge_critical=[critical[i] for i in drawn],
+            arrowheads=arrowheads,
+            labels=labels,
+            xlim=(min(xs) - 1 - x_margin, max(xs) + 1 + x_margin),
+            ylim=(min(ys) - 1 - y_margin, max(ys) + 1 + y_margin)
+        )
+    
+    def generate_aon_diagram(self, width: float = 12, height: float = 8) -> BytesIO:
+        """Generate Activity-on-Node (AON) diagram with detailed boxes"""
+        scene = self.aon_scene()
+        fig, ax, _ = new_figure(scene.xlim, scene.ylim, width, height)
+        
+        # Edges first (so they appear behind nodes)
+        edge_colors = [EDGE_STYLES[c]['color'] for c in scene.edge_critical]
+        ax.add_collection(LineCollection(
+            scene.edges, colors=edge_colors, alpha=EDGE_ALPHA,
+            linewidths=[EDGE_STYLES[c]['linewidth'] for c in scene.edge_critical], zorder=1
+        ))
+        ax.add_collection(PolyCollection(scene.arrowheads, facecolors=edge_colors, edgecolors='none',
+                                         alpha=EDGE_ALPHA, zorder=1))
+        
+        # Node boxes
+        x, y, w, h = scene.boxes.T if len(scene.boxes) else (np.zeros(0),) * 4
+        corners = np.stack([np.stack([x, y], 1), np.stack([x + w, y], 1),
+                            np.stack([x + w, y + h], 1), np.stack([x, y + h], 1)], axis=1)
+        ax.add_collection(PolyCollection(
+            corners,
+            facecolors=[NODE_STYLES[k]['face'] for k in scene.box_kinds],
+            edgecolors=[NODE_STYLES[k]['edge'] for k in scene.box_kinds],
+            linewidths=[NODE_STYLES[k]['linewidth'] for k in scene.box_kinds],
+            zorder=2
+        ))
+        
+        add_labels(fig, ax, scene.labels)
+        
+        ax.set_title('Activity-on-Node (AON) Network Diagram', fontsize=16, fontweight='bold', color='#1F2937', pad=20)
+        ax.legend(handles=AON_LEGEND_HANDLES, loc='upper left', frameon=True, fancybox=True, shadow=True, fontsize=10)
+        return save_png(fig)
 
 
-def generate_network_diagram(activities: List[Dict], critical_path: List[str], 
+def diagram_key(activities: List[Dict], critical_path: List[str], diagram_type: str = 'aon', format: str = 'png') -> str:
+    """Cache key of a rendered diagram of this schedule"""
+    return artifact_key(f'diagram-{diagram_type}-v2', [activities, sorted(critical_path)], {'format': format})
+
+
+def generate_network_diagram(activities: List[Dict], critical_path: List[str],
                             diagram_type: str = 'aon') -> BytesIO:
     """
     Generate network diagram
@@ -487,9 +513,17 @@ def generate_network_diagram(activities: List[Dict], critical_path: List[str],
     Returns:
         BytesIO buffer containing PNG image
     """
+    # The same schedule renders the same image: reuse it while cached
+    key = diagram_key(activities, critical_path, diagram_type)
+    cached = artifact_cache.get(key, 'png')
+    if cached is not None:
+        return BytesIO(cached)
+    
     generator = NetworkDiagramGenerator(activities, critical_path)
     
     if diagram_type == 'aon':
-        return generator.generate_aon_diagram()
+        buf = generator.generate_aon_diagram()
     else:
-        return generator.generate_diagram()
+        buf = generator.generate_diagram()
+    artifact_cache.put(key, 'png', buf.getvalue())
+    return buf
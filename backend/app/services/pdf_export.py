@@ -10,12 +10,23 @@ from io import BytesIO
 from datetime import datetime
 from typing import Dict, List, Any
 from app.services.network_diagram import generate_network_diagram
+from app.services.vector_diagram import generate_aon_drawing
+
+# How the network diagram is drawn into the report: rasterized to a PNG by
+# matplotlib, or as reportlab vector shapes
+DIAGRAM_RENDERERS = ('raster', 'vector')
 
 
 class PDFExporter:
     """Generate structured PDF reports for project analysis"""
     
-    def __init__(self):
+    # Critical paths written out in the solution section
+    MAX_LISTED_CRITICAL_PATHS = 10
+    
+    def __init__(self, diagram: str = 'raster'):
+        if diagram not in DIAGRAM_RENDERERS:
+            raise ValueError(f"diagram must be one of: {', '.join(DIAGRAM_RENDERERS)}")
+        self.diagram = diagram
         self.buffer = BytesIO()
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
@@ -387,15 +398,30 @@ class PDFExporter:
                     prob_act['isCritical'] = False
                     merged_activities.append(prob_act)
             
-            # Generate network diagram with complete data
-            diagram_buffer = generate_network_diagram(
-                merged_activities,
-                solution.get('criticalPath', []),
-                diagram_type='aon'
-            )
-            
-            # Create image from buffer
-            img = RLImage(diagram_buffer, width=6.5*inch, height=4.5*inch)
+            # Generate network diagram with complete data, highlighting the
+            # activities of every critical path when they were enumerated
+            critical_activities = solution.get('criticalPath', [])
+            if solution.get('criticalPaths'):
+                critical_activities = list(dict.fromkeys(
+                    activity_id for path in solution['criticalPaths'] for activity_id in path
+                ))
+            if self.diagram == 'vector':
+                # Drawn as shapes, at most as large as the raster image
+                img = generate_aon_drawing(
+                    merged_activities,
+                    critical_activities,
+                    max_width=6.5*inch,
+                    max_height=6.5*inch
+                )
+            else:
+                diagram_buffer = generate_network_diagram(
+                    merged_activities,
+                    critical_activities,
+                    diagram_type='aon'
+                )
+                
+                # Create image from buffer
+                img = RLImage(diagram_buffer, width=6.5*inch, height=4.5*inch)
             img.hAlign = 'CENTER'
             elements.append(img)
             elements.append(Spacer(1, 0.1*inch))
@@ -485,9 +511,12 @@ class PDFExporter:
         elements.append(summary_table)
         elements.append(Spacer(1, 0.2*inch))
         
-        # Critical Path
-        elements.append(Paragraph("3.2 Critical Path", self.styles['SubSection']))
-        critical_path_text = " → ".join(solution['criticalPath'])
+        # Critical Path(s)
+        critical_paths = solution.get('criticalPaths') or [solution['criticalPath']]
+        path_count = solution.get('criticalPathCount', len(critical_paths))
+        heading = "3.2 Critical Paths" if path_count > 1 else "3.2 Critical Path"
+        elements.append(Paragraph(heading, self.styles['SubSection']))
+        critical_path_text = "<br/>".join(" → ".join(path) for path in critical_paths[:self.MAX_LISTED_CRITICAL_PATHS])
         
         cp_box = Paragraph(
             f"<b>{critical_path_text}</b>",
@@ -505,6 +534,12 @@ class PDFExporter:
             )
         )
         elements.append(cp_box)
+        if path_count > self.MAX_LISTED_CRITICAL_PATHS:
+            elements.append(Spacer(1, 0.1*inch))
+            elements.append(Paragraph(
+                f"Showing {self.MAX_LISTED_CRITICAL_PATHS} of {path_count} critical paths.",
+                self.styles['CustomBody']
+            ))
         elements.append(Spacer(1, 0.2*inch))
         
         # Activity Schedule
@@ -674,7 +709,7 @@ class PDFExporter:
             elements.append(Paragraph("3.2 Crashing Scheme", self.styles['SubSection']))
             elements.append(Paragraph(
                 "The following table shows each iteration of the crashing process, indicating which "
-                "activity was crashed, the cost increase, and the resulting project duration.",
+                "activities were crashed together, the cost increase, and the resulting project duration.",
                 self.styles['CustomBody']
             ))
             elements.append(Spacer(1, 0.1*inch))
@@ -770,7 +805,7 @@ class PDFExporter:
         return elements
 
 
-def generate_pdf_export(export_data: Dict[str, Any]) -> BytesIO:
-    """Generate PDF export from analysis data"""
-    exporter = PDFExporter()
+def generate_pdf_export(export_data: Dict[str, Any], diagram: str = 'raster') -> BytesIO:
+    """Generate PDF export from analysis data, with a 'raster' or 'vector' network diagram"""
+    exporter = PDFExporter(diagram)
     return exporter.generate_report(export_data)
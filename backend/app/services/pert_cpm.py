@@ -1,21 +1,35 @@
-from typing import List, Dict, Tuple
-from collections import defaultdict, deque
+from typing import List, Dict, Tuple, Optional, Iterator
+from collections import defaultdict, OrderedDict
+from itertools import islice
+import heapq
 import math
+import numpy as np
+from app.services.compiled_network import CompiledNetwork, CycleError, order_activities, parse_predecessors
 
 class PERTCPMEngine:
     """Core PERT/CPM calculation engine"""
     
-    def __init__(self, activities_data: List[Dict]):
+    # Activity fields whose edits change the schedule
+    SCHEDULE_FIELDS = ('duration', 'optimistic', 'mostLikely', 'pessimistic', 'predecessors')
+    
+    def __init__(self, activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]] = None):
         """
         Initialize with activities data
         Each activity should have: id, duration/optimistic/mostLikely/pessimistic, predecessors
+        
+        `predecessors` maps activity IDs to their predecessor IDs, as loaded
+        from the dependencies table; if given, the activities' predecessor
+        text is not parsed.
         """
         self.activities = {a['activityId']: a for a in activities_data}
         self.graph = defaultdict(list)  # adjacency list
         self.reverse_graph = defaultdict(list)  # reverse graph
-        self.build_graph()
+        self.network = None  # compiled on first analysis
+        self.schedule = None  # (ES, EF, LS, LF) arrays from the last analysis
+        self.project_duration = None
+        self.build_graph(predecessors)
         
-    def build_graph(self):
+    def build_graph(self, predecessors: Optional[Dict[str, List[str]]] = None):
         """Build the project network DAG"""
         # Add all nodes
         for activity_id in self.activities:
@@ -26,44 +40,47 @@ class PERTCPMEngine:
         
         # Add edges based on predecessors
         for activity_id, activity in self.activities.items():
-            predecessors = activity.get('predecessors', '')
-            if predecessors:
-                # Handle string predecessors
-                if not isinstance(predecessors, str):
-                    predecessors = str(predecessors).strip()
-                    
-                preds = [p.strip() for p in predecessors.split(',') if p.strip()]
-                for pred in preds:
-                    if pred not in self.activities:
-                        raise ValueError(f"Activity '{activity_id}' references undefined predecessor '{pred}'")
-                    self.graph[pred].append(activity_id)
-                    self.reverse_graph[activity_id].append(pred)
+            if predecessors is not None:
+                preds = predecessors.get(activity_id, ())
+            else:
+                preds = parse_predecessors(activity.get('predecessors', ''))
+            for pred in preds:
+                if pred not in self.activities:
+                    raise ValueError(f"Activity '{activity_id}' references undefined predecessor '{pred}'")
+                self.graph[pred].append(activity_id)
+                self.reverse_graph[activity_id].append(pred)
+    
+    def _set_predecessors(self, activity_id: str, predecessors: List[str]):
+        """Replace the incoming edges of one activity in the adjacency lists"""
+        for pred in self.reverse_graph[activity_id]:
+            self.graph[pred].remove(activity_id)
+        self.reverse_graph[activity_id] = list(predecessors)
+        # Keep successor lists in activity order, as build_graph() produces them
+        position = self.network.index
+        for pred in predecessors:
+            self.graph[pred].append(activity_id)
+            self.graph[pred].sort(key=position.get)
+    
+    def compile(self) -> CompiledNetwork:
+        """Compile the network into integer-indexed arrays (cached)"""
+        if self.network is None:
+            self.network = CompiledNetwork.from_activities(self.activities, self.graph, self.get_duration)
+        return self.network
     
     def validate_dag(self) -> bool:
         """Validate that the graph is a DAG (no cycles)"""
-        visited = set()
-        rec_stack = set()
-        
-        def has_cycle(node):
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in self.graph.get(node, []):
-                if neighbor not in visited:
-                    if has_cycle(neighbor):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
-            
-            rec_stack.remove(node)
+        try:
+            self.topological_order()
+        except CycleError:
             return False
-        
-        for node in self.activities:
-            if node not in visited:
-                if has_cycle(node):
-                    return False
         return True
     
+    def topological_order(self) -> List[str]:
+        """Activities in topological order; raises CycleError naming each cycle"""
+        if self.network is not None:
+            return [self.network.ids[i] for i in self.network.order.tolist()]
+        return order_activities(list(self.activities), self.graph)
+    
     def get_duration(self, activity_id: str) -> float:
         """Calculate or get duration for an activity"""
         activity = self.activities[activity_id]
@@ -100,158 +117,351 @@ class PERTCPMEngine:
     
     def forward_pass(self) -> Dict[str, Dict]:
         """Calculate ES and EF for all activities"""
-        es_ef = {}
-        
-        # Topological sort to process in order
-        in_degree = {node: len(self.reverse_graph[node]) for node in self.activities}
-        queue = deque([node for node in self.activities if in_degree[node] == 0])
-        
-        while queue:
-            current = queue.popleft()
-            
-            # Calculate ES
-            if not self.reverse_graph[current]:
-                es_ef[current] = {'ES': 0}
-            else:
-                es_ef[current] = {'ES': max(es_ef[pred]['EF'] for pred in self.reverse_graph[current])}
-            
-            # Calculate EF
-            duration = self.get_duration(current)
-            es_ef[current]['EF'] = es_ef[current]['ES'] + duration
-            
-            # Process successors
-            for successor in self.graph[current]:
-                in_degree[successor] -= 1
-                if in_degree[successor] == 0:
-                    queue.append(successor)
-        
-        return es_ef
+        network = self.compile()
+        es, ef = network.forward()
+        return {
+            activity_id: {'ES': start, 'EF': finish}
+            for activity_id, start, finish in zip(network.ids, es.tolist(), ef.tolist())
+        }
     
     def backward_pass(self, project_duration: float) -> Dict[str, Dict]:
         """Calculate LS and LF for all activities"""
-        ls_lf = {}
-        
-        # Reverse topological sort
-        out_degree = {node: len(self.graph[node]) for node in self.activities}
-        queue = deque([node for node in self.activities if out_degree[node] == 0])
-        
-        while queue:
-            current = queue.popleft()
-            
-            # Calculate LF
-            if not self.graph[current]:
-                ls_lf[current] = {'LF': project_duration}
-            else:
-                ls_lf[current] = {'LF': min(ls_lf[succ]['LS'] for succ in self.graph[current])}
-            
-            # Calculate LS
-            duration = self.get_duration(current)
-            ls_lf[current]['LS'] = ls_lf[current]['LF'] - duration
-            
-            # Process predecessors
-            for predecessor in self.reverse_graph[current]:
-                out_degree[predecessor] -= 1
-                if out_degree[predecessor] == 0:
-                    queue.append(predecessor)
-        
-        return ls_lf
+        network = self.compile()
+        ls, lf = network.backward(project_duration)
+        return {
+            activity_id: {'LS': start, 'LF': finish}
+            for activity_id, start, finish in zip(network.ids, ls.tolist(), lf.tolist())
+        }
     
     def analyze(self) -> Dict:
         """Perform complete analysis"""
-        # Validate DAG (no cycles)
-        if not self.validate_dag():
-            raise ValueError("Graph contains cycles - check your activity predecessors for circular dependencies")
+        # Compiling runs the single topological sort, which raises CycleError
+        # naming the activities on every cycle
+        network = self.compile()
         
         # Check for connectivity
-        start_nodes = [node for node in self.activities if len(self.reverse_graph[node]) == 0]
-        end_nodes = [node for node in self.activities if len(self.graph[node]) == 0]
-        
-        if not start_nodes:
+        if len(network.sources) == 0:
             raise ValueError("No start activity found - ensure at least one activity has no predecessors")
-        if not end_nodes:
+        if len(network.sinks) == 0:
             raise ValueError("No end activity found - ensure at least one activity has no successors (check for cycles)")
-        if len(start_nodes) > 1 or len(end_nodes) > 1:
-            # This is technically allowed, but unusual. Add implicit start/end if needed
-            pass
-        
-        # Forward pass
-        es_ef = self.forward_pass()
-        if not es_ef:
-            raise ValueError("Forward pass failed - no activities processed")
-            
-        project_duration = max(ef['EF'] for ef in es_ef.values()) if es_ef else 0
         
-        # Backward pass
-        ls_lf = self.backward_pass(project_duration)
+        # Forward and backward passes over the compiled arrays
+        es, ef = network.forward()
+        project_duration = float(ef.max())
+        ls, lf = network.backward(project_duration)
+        self.schedule = (es, ef, ls, lf)
+        self.project_duration = project_duration
         
-        # Calculate slack and identify critical path
-        critical_activities = []
-        for activity_id in self.activities:
-            slack = ls_lf[activity_id]['LS'] - es_ef[activity_id]['ES']
-            is_critical = abs(slack) < 0.01  # Float comparison with tolerance
-            
-            if is_critical:
-                critical_activities.append(activity_id)
-            
-            # Store calculated values
+        # Store calculated values (dict output is only built at the boundary)
+        self._store_values()
+        return self.summarize()
+    
+    def _store_values(self, indices: Optional[List[int]] = None):
+        """Copy schedule values into the activity dicts (all, or only `indices`)"""
+        network = self.network
+        es, ef, ls, lf = self.schedule
+        if indices is None:
+            slack = ls - es
+            rows = zip(network.ids, es.tolist(), ef.tolist(), ls.tolist(), lf.tolist(), slack.tolist())
+        else:
+            rows = ((network.ids[i], float(es[i]), float(ef[i]), float(ls[i]), float(lf[i]),
+                     float(ls[i] - es[i])) for i in indices)
+        
+        for activity_id, start, finish, late_start, late_finish, slack in rows:
             self.activities[activity_id].update({
-                'ES': es_ef[activity_id]['ES'],
-                'EF': es_ef[activity_id]['EF'],
-                'LS': ls_lf[activity_id]['LS'],
-                'LF': ls_lf[activity_id]['LF'],
+                'ES': start,
+                'EF': finish,
+                'LS': late_start,
+                'LF': late_finish,
                 'slack': slack,
-                'isCritical': is_critical
+                'isCritical': abs(slack) < 0.01  # Float comparison with tolerance
             })
+    
+    def summarize(self) -> Dict:
+        """Build the analysis result from the current schedule"""
+        es, ef, ls, lf = self.schedule
+        critical = np.abs(ls - es) < 0.01
+        critical_activities = [self.network.ids[i] for i in np.flatnonzero(critical)]
         
         # Find critical path
-        critical_path = self.find_critical_path(critical_activities)
+        critical_path = self.find_critical_path()
         
         # Calculate project variance (only for critical path activities)
         project_variance = sum(self.get_variance(act) for act in critical_activities)
         
         return {
-            'projectDuration': project_duration,
+            'projectDuration': self.project_duration,
             'criticalPath': critical_path,
             'activities': self.activities,
             'projectVariance': project_variance
         }
     
-    def find_critical_path(self, critical_activities: List[str]) -> List[str]:
-        """Find the actual critical path"""
-        # Build subgraph of critical activities
-        path = []
-        current = None
-        
-        # Find start node (critical activity with no predecessors)
-        for activity_id in critical_activities:
-            preds = self.reverse_graph.get(activity_id, [])
-            critical_preds = [p for p in preds if p in critical_activities]
-            if not critical_preds:
-                current = activity_id
-                break
-        
-        if not current:
-            return critical_activities[:1] if critical_activities else []
+    def update_activity(self, activity_id: str, changes: Dict) -> Dict:
+        """
+        Apply edits to one activity and re-propagate only the affected part
+        of the last computed schedule: the downstream ES/EF cone and the
+        upstream LS/LF cone. Runs a full analysis if none has been done yet.
         
-        path = [current]
+        Returns the analyze() result plus 'changedActivities', the IDs whose
+        inputs or schedule values changed.
+        """
+        return self.update_activities({activity_id: changes})
+    
+    def update_activities(self, edits: Dict[str, Dict]) -> Dict:
+        """
+        Apply edits to several activities at once, as update_activity() does
+        for one. Predecessor changes are applied together and the network is
+        recompiled once, so only the final network has to be acyclic; on any
+        error every edit is undone.
+        """
+        for activity_id in edits:
+            if activity_id not in self.activities:
+                raise ValueError(f"Activity '{activity_id}' not found")
+        
+        if self.schedule is None:
+            for activity_id, changes in edits.items():
+                self.activities[activity_id].update(changes)
+            self.graph = defaultdict(list)
+            self.reverse_graph = defaultdict(list)
+            self.network = None
+            self.build_graph()
+            result = self.analyze()
+            result['changedActivities'] = list(self.activities)
+            return result
+        
+        network = self.network
+        previous = {
+            activity_id: {field: self.activities[activity_id].get(field) for field in changes}
+            for activity_id, changes in edits.items()
+        }
+        old_preds = {activity_id: list(self.reverse_graph[activity_id]) for activity_id in edits}
+        for activity_id, changes in edits.items():
+            self.activities[activity_id].update(changes)
+        seeds = [network.index[activity_id] for activity_id in edits]
+        backward_seeds = set(seeds)
+        
+        try:
+            durations = network.durations.copy()
+            for activity_id, index in zip(edits, seeds):
+                durations[index] = self.get_duration(activity_id)
+            
+            rewired = {}
+            for activity_id in edits:
+                new_preds = parse_predecessors(self.activities[activity_id].get('predecessors', ''))
+                if new_preds != old_preds[activity_id]:
+                    for pred in new_preds:
+                        if pred not in self.activities:
+                            raise ValueError(f"Activity '{activity_id}' references undefined predecessor '{pred}'")
+                    rewired[activity_id] = new_preds
+            if rewired:
+                try:
+                    for activity_id, new_preds in rewired.items():
+                        self._set_predecessors(activity_id, new_preds)
+                    network = CompiledNetwork.from_activities(self.activities, self.graph, durations=durations)
+                except CycleError:
+                    for activity_id in rewired:
+                        self._set_predecessors(activity_id, old_preds[activity_id])
+                    raise
+                self.network = network
+                for activity_id, new_preds in rewired.items():
+                    backward_seeds.update(network.index[pred] for pred in old_preds[activity_id] + new_preds)
+        except ValueError:
+            for activity_id, fields in previous.items():
+                self.activities[activity_id].update(fields)
+            raise
+        network.durations[seeds] = durations[seeds]
+        
+        es, ef, ls, lf = self.schedule
+        changed = network.repropagate_forward(es, ef, seeds)
+        project_duration = float(ef.max())
+        if project_duration != self.project_duration:
+            backward_seeds.update(network.sinks.tolist())
+        self.project_duration = project_duration
+        changed |= network.repropagate_backward(ls, lf, project_duration, backward_seeds)
+        changed.update(seeds)
+        
+        self._store_values(sorted(changed))
+        result = self.summarize()
+        result['changedActivities'] = [network.ids[i] for i in sorted(changed)]
+        return result
+    
+    def find_critical_path(self) -> List[str]:
+        """Return the first critical path in activity order"""
+        return next(self.iter_critical_paths(), [])
+    
+    def _critical_subnetwork(self) -> Tuple[List[int], Dict[int, List[int]], Dict[int, int]]:
+        """
+        Reduce the last schedule to the network of critical paths: critical
+        activities joined by tight edges (the predecessor's EF equals the
+        successor's ES). Returns the path start activities, the successor
+        lists of that subnetwork and, per activity, the number of critical
+        paths from it to the project end, counted by dynamic programming in
+        reverse topological order. Only critical activities are visited.
+        """
+        network = self.network
+        es, ef, ls, lf = self.schedule
+        critical = np.abs(ls - es) < 0.01
+        
+        src = np.repeat(np.arange(network.n), np.diff(network.succ_ptr))
+        dst = network.succ_idx
+        tight = critical[src] & critical[dst] & (np.abs(ef[src] - es[dst]) < 0.01)
+        src, dst = src[tight], dst[tight]
+        
+        has_pred = np.zeros(network.n, dtype=bool)
+        has_pred[dst] = True
+        successors = defaultdict(list)
+        for u, v in zip(src.tolist(), dst.tolist()):
+            successors[u].append(v)
+        
+        # Paths end at activities without tight successors that finish the project
+        counts = {}
+        critical_order = network.order[critical[network.order]].tolist()
+        for u in reversed(critical_order):
+            if u in successors:
+                next_nodes = [v for v in successors[u] if counts[v]]
+                successors[u] = next_nodes
+                counts[u] = sum(counts[v] for v in next_nodes)
+            else:
+                counts[u] = 1 if abs(ef[u] - self.project_duration) < 0.01 else 0
         
-        # Traverse through critical path
-        visited = {current}
-        while current:
-            next_node = None
-            for successor in self.graph.get(current, []):
-                if successor in critical_activities and successor not in visited:
-                    next_node = successor
+        starts = [u for u in np.flatnonzero(critical & ~has_pred & (np.abs(es) < 0.01)).tolist() if counts[u]]
+        return starts, successors, counts
+    
+    def count_critical_paths(self) -> int:
+        """Number of distinct critical paths, without enumerating them"""
+        starts, _, counts = self._critical_subnetwork()
+        return sum(counts[u] for u in starts)
+    
+    def iter_critical_paths(self) -> Iterator[List[str]]:
+        """
+        Lazily yield every critical path of the last schedule as a list of
+        activity IDs. The walk is iterative and only follows branches that
+        lead to the project end, so each path costs time proportional to its
+        length however many paths the network has.
+        """
+        starts, successors, _ = self._critical_subnetwork()
+        return self._walk_critical_paths(starts, successors)
+    
+    def _walk_critical_paths(self, starts: List[int], successors: Dict[int, List[int]]) -> Iterator[List[str]]:
+        ids = self.network.ids
+        for start in starts:
+            if start not in successors:
+                yield [ids[start]]
+                continue
+            path = [start]
+            branches = [iter(successors[start])]
+            while branches:
+                node = next(branches[-1], None)
+                if node is None:
+                    branches.pop()
+                    path.pop()
+                elif node in successors:
+                    path.append(node)
+                    branches.append(iter(successors[node]))
+                else:
+                    yield [ids[i] for i in path] + [ids[node]]
+    
+    def critical_paths(self, limit: Optional[int] = 100) -> Dict:
+        """
+        Enumerate critical paths, at most `limit` of them (None for all).
+        'count' is always the total number of critical paths.
+        """
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        starts, successors, counts = self._critical_subnetwork()
+        count = sum(counts[u] for u in starts)
+        paths = list(islice(self._walk_critical_paths(starts, successors), limit))
+        return {
+            'count': count,
+            'paths': paths,
+            'truncated': len(paths) < count
+        }
+    
+    def iter_longest_paths(self) -> Iterator[Tuple[List[str], float]]:
+        """
+        Lazily yield (activity IDs, length) for every start-to-end path, in
+        order of decreasing length.
+        
+        Best-first search over path prefixes. A prefix is keyed by its length
+        plus the longest completion from its last activity, which the
+        schedule already holds as project duration - LS, so the key is exact:
+        the best prefix always extends to the best remaining path. Successors
+        are pre-sorted by completion and expanded lazily (a prefix pushes
+        only its next sibling once its best extension is taken), so producing k
+        paths costs O(k * path length) heap operations no matter how many
+        paths or how wide the network is. Equal keys (rounded, so float noise
+        does not split them) go to the newest entry, completing one tied path
+        before starting the next.
+        """
+        if self.schedule is None:
+            self.analyze()
+        network = self.network
+        n = network.n
+        _, _, ls, _ = self.schedule
+        completion = self.project_duration - ls
+        
+        # Children of every activity, longest completion first; a virtual
+        # root (index n) has the start activities as its children
+        edge_src = np.repeat(np.arange(n), np.diff(network.succ_ptr))
+        sources = network.sources
+        parents = np.concatenate([edge_src, np.full(len(sources), n)])
+        children = np.concatenate([network.succ_idx, sources])
+        order = np.lexsort((-completion[children], parents))
+        children = children[order].tolist()
+        child_ptr = np.concatenate([network.succ_ptr, [len(children)]]).tolist()
+        completion = completion.tolist()
+        durations = network.durations.tolist()
+        ids = network.ids
+        
+        # Entries: (-key, -push count, activity, prefix length before it,
+        #           parent entry, slot in children, parent activity)
+        heap = []
+        counter = 0
+        if child_ptr[n] < child_ptr[n + 1]:
+            first = children[child_ptr[n]]
+            heap.append((-round(completion[first], 9), 0, first, 0.0, None, child_ptr[n], n))
+        
+        while heap:
+            entry = heapq.heappop(heap)
+            # The best extension has the same key as the popped prefix, so
+            # follow it straight to the end instead of through the heap
+            while True:
+                key, _, u, before, parent, slot, parent_node = entry
+                if slot + 1 < child_ptr[parent_node + 1]:
+                    sibling = children[slot + 1]
+                    counter += 1
+                    heapq.heappush(heap, (-round(before + completion[sibling], 9), -counter,
+                                          sibling, before, parent, slot + 1, parent_node))
+                length = before + durations[u]
+                if child_ptr[u] == child_ptr[u + 1]:
                     break
+                entry = (key, 0, children[child_ptr[u]], length, entry, child_ptr[u], u)
             
-            if next_node:
-                path.append(next_node)
-                visited.add(next_node)
-                current = next_node
-            else:
+            path = []
+            while entry is not None:
+                path.append(ids[entry[2]])
+                entry = entry[4]
+            yield path[::-1], length
+    
+    def longest_paths(self, k: int = 10, max_slack: Optional[float] = None) -> List[Dict]:
+        """
+        The k longest paths with their float margin (project duration minus
+        path length), optionally only those with slack <= max_slack
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        paths = []
+        for activity_ids, length in islice(self.iter_longest_paths(), k):
+            slack = self.project_duration - length
+            if max_slack is not None and slack > max_slack + 1e-9:
                 break
-        
-        return path
+            paths.append({
+                'activities': activity_ids,
+                'duration': length,
+                'slack': slack,
+                'isCritical': abs(slack) < 0.01
+            })
+        return paths
     
     def get_crash_slope(self, activity_id: str) -> float:
         """Calculate crash slope (cost per unit time)"""
@@ -310,6 +520,86 @@ class PERTCPMEngine:
             'crashingOptions': crashing_options
         }
 
+class ScheduleStore:
+    """
+    Keeps the last analyzed engine per project so that later analyses only
+    re-propagate the activities edited since, instead of starting over
+    """
+    
+    def __init__(self, max_projects: int = 64, max_changed_fraction: float = 0.1,
+                 max_changed_activities: int = 32):
+        self.max_projects = max_projects
+        self.max_changed_fraction = max_changed_fraction
+        self.max_changed_activities = max_changed_activities
+        self._engines: "OrderedDict[str, PERTCPMEngine]" = OrderedDict()
+    
+    def analyze(self, project_id: str, activities_data: List[Dict],
+                predecessors: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """
+        Analyze a project, reusing its previous schedule when only a few
+        activities changed. 'changedActivities' lists the activities that were
+        re-propagated, or is None after a full analysis, which builds the
+        network from `predecessors` if given.
+        """
+        engine = self._engines.pop(project_id, None)
+        result = self._reanalyze(engine, activities_data) if engine is not None else None
+        if result is None:
+            engine = PERTCPMEngine(activities_data, predecessors)
+            result = engine.analyze()
+            result['changedActivities'] = None
+        
+        self._engines[project_id] = engine
+        while len(self._engines) > self.max_projects:
+            self._engines.popitem(last=False)
+        return result
+    
+    def get(self, project_id: str) -> Optional[PERTCPMEngine]:
+        """Return the engine holding the last schedule of a project, if any"""
+        return self._engines.get(project_id)
+    
+    def discard(self, project_id: str):
+        """Forget the stored schedule of a project"""
+        self._engines.pop(project_id, None)
+    
+    def _reanalyze(self, engine: PERTCPMEngine, activities_data: List[Dict]) -> Optional[Dict]:
+        """Apply the differences to a stored engine, or None if a full run is cheaper"""
+        if engine.schedule is None or len(activities_data) != len(engine.activities):
+            return None
+        
+        edits = {}
+        for data in activities_data:
+            current = engine.activities.get(data['activityId'])
+            if current is None:
+                return None
+            changes = {field: value for field, value in data.items() if current.get(field) != value}
+            if changes:
+                edits[data['activityId']] = changes
+        
+        schedule_edits = [
+            activity_id for activity_id, changes in edits.items()
+            if any(field in PERTCPMEngine.SCHEDULE_FIELDS for field in changes)
+        ]
+        # Re-propagation walks the cone of every edit, so beyond a few dozen
+        # edits one full pass is cheaper whatever the network size
+        limit = min(self.max_changed_activities, int(len(activities_data) * self.max_changed_fraction))
+        if len(schedule_edits) > max(1, limit):
+            return None
+        
+        for activity_id, changes in edits.items():
+            if activity_id not in schedule_edits:
+                engine.activities[activity_id].update(changes)
+        if not schedule_edits:
+            result = engine.summarize()
+            result['changedActivities'] = []
+            return result
+        # All schedule edits at once: a batch may reverse a dependency, which
+        # only the final network, not each edit on its own, has to allow
+        return engine.update_activities({activity_id: edits[activity_id] for activity_id in schedule_edits})
+
+# Store of the process running the analysis; with the CPU pool every worker
+# process keeps its own
+schedule_store = ScheduleStore()
+
 def calculate_probability(project_duration: float, project_variance: float, deadline: float) -> Dict:
     """Calculate probability of completing by deadline"""
     if project_variance == 0:
@@ -331,3 +621,140 @@ def calculate_probability(project_duration: float, project_variance: float, dead
         'zscore': z_score,
         'stdDeviation': std_deviation
     }
+
+# Coefficients of Acklam's rational approximation to the normal quantile
+# (relative error below 1.2e-9)
+_QUANTILE_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+               1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_QUANTILE_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+               6.680131188771972e+01, -1.328068155288572e+01)
+_QUANTILE_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+               -2.549671010115382e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_QUANTILE_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+               3.754408661907416e+00)
+_QUANTILE_TAIL = 0.02425
+
+# Upper bound on deadlines, confidence levels and curve points per sweep
+MAX_SWEEP_POINTS = 10_000
+
+# Below this |z|/sqrt(2) erfc comes from the power series of erf, above it
+# from its continued fraction; both converge to double precision in
+# _ERF_TERMS terms on their side of the switch
+_ERF_SWITCH = 2.0
+_ERF_TERMS = 40
+
+def normal_cdf(z: np.ndarray) -> np.ndarray:
+    """
+    Standard normal CDF of an array (NumPy has no erf). Agrees with
+    math.erf/math.erfc to a relative error of about 1e-13, tails included.
+    """
+    z = np.asarray(z, dtype=float)
+    x = np.abs(z) / math.sqrt(2)
+    near = x < _ERF_SWITCH
+    
+    # erf(x) = 2/sqrt(pi) exp(-x^2) sum(2^n x^(2n+1) / (1*3*...*(2n+1)))
+    xs = np.where(near, x, 0.0)
+    x2 = xs * xs
+    term = xs.copy()
+    series = xs.copy()
+    for n in range(1, _ERF_TERMS):
+        term *= 2 * x2 / (2 * n + 1)
+        series += term
+    erfc_near = 1.0 - 2 / math.sqrt(math.pi) * np.exp(-x2) * series
+    
+    # erfc(x) = exp(-x^2)/sqrt(pi) / (x + (1/2)/(x + 1/(x + (3/2)/(x + ...))))
+    xf = np.where(near, _ERF_SWITCH, x)
+    fraction = np.zeros_like(xf)
+    for k in range(_ERF_TERMS, 0, -1):
+        fraction = (k / 2) / (xf + fraction)
+    with np.errstate(under='ignore'):
+        erfc_far = np.exp(-xf * xf) / math.sqrt(math.pi) / (xf + fraction)
+    
+    erfc = np.where(near, erfc_near, erfc_far)
+    return np.where(z >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+def normal_quantile(p: np.ndarray) -> np.ndarray:
+    """
+    Inverse standard normal CDF of an array of probabilities in (0, 1):
+    Acklam's rational approximation refined by one Halley step.
+    """
+    p = np.asarray(p, dtype=float)
+    
+    def horner(coefficients, x):
+        result = np.zeros_like(x)
+        for coefficient in coefficients:
+            result = result * x + coefficient
+        return result
+    
+    # Work on the lower half, where normal_cdf keeps its relative precision,
+    # and mirror: rational approximation near the centre, log-based in the tail
+    lower = np.minimum(p, 1.0 - p)
+    q = lower - 0.5
+    r = q * q
+    central = q * horner(_QUANTILE_A, r) / horner(_QUANTILE_B + (1.0,), r)
+    tail_q = np.sqrt(-2.0 * np.log(np.maximum(lower, np.finfo(float).tiny)))
+    tail = horner(_QUANTILE_C, tail_q) / horner(_QUANTILE_D + (1.0,), tail_q)
+    z = np.where(lower >= _QUANTILE_TAIL, central, tail)
+    
+    # One Halley step against normal_cdf takes it to full double precision
+    error = normal_cdf(z) - lower
+    u = error * math.sqrt(2 * math.pi) * np.exp(z * z / 2)
+    z = z - u / (1 + z * u / 2)
+    return np.where(p > 0.5, -z, z)
+
+def probability_sweep(project_duration: float, project_variance: float,
+                      deadlines: Optional[List[float]] = None,
+                      confidence_levels: Optional[List[float]] = None,
+                      points: int = 101) -> Dict:
+    """
+    Evaluate the completion-time distribution (normal approximation, as in
+    calculate_probability) for many deadlines and confidence levels at once.
+    
+    Returns the probability and z-score for each deadline, the deadline
+    needed for each confidence level (e.g. 0.8 for P80), and the CDF curve
+    over mean +/- 4 standard deviations sampled at `points` deadlines. With
+    zero variance the duration is certain: probabilities are 0 or 1, the
+    z-scores are None and the curve is a step over duration +/- 10%.
+    """
+    if not 2 <= points <= MAX_SWEEP_POINTS:
+        raise ValueError(f"points must be between 2 and {MAX_SWEEP_POINTS}")
+    deadlines = np.asarray(deadlines or [], dtype=float)
+    levels = np.asarray(confidence_levels or [], dtype=float)
+    if len(deadlines) > MAX_SWEEP_POINTS or len(levels) > MAX_SWEEP_POINTS:
+        raise ValueError(f"At most {MAX_SWEEP_POINTS} deadlines and confidence levels per request")
+    if np.any((levels <= 0) | (levels >= 1)):
+        raise ValueError("Confidence levels must be between 0 and 1 (exclusive)")
+    
+    std_deviation = math.sqrt(project_variance) if project_variance > 0 else 0.0
+    if std_deviation == 0:
+        # Deterministic duration: a step at the project duration
+        curve_deadlines = np.linspace(project_duration * 0.9, project_duration * 1.1, points)
+        probabilities = (deadlines >= project_duration).astype(float)
+        zscores = [None] * len(deadlines)
+        required = np.full(len(levels), project_duration)
+        curve_probabilities = (curve_deadlines >= project_duration).astype(float)
+    else:
+        zscores = (deadlines - project_duration) / std_deviation
+        probabilities = normal_cdf(zscores)
+        required = project_duration + std_deviation * normal_quantile(levels)
+        curve_deadlines = np.linspace(project_duration - 4 * std_deviation,
+                                      project_duration + 4 * std_deviation, points)
+        curve_probabilities = normal_cdf((curve_deadlines - project_duration) / std_deviation)
+        zscores = zscores.tolist()
+    
+    return {
+        'projectDuration': project_duration,
+        'stdDeviation': std_deviation,
+        'deadlines': [
+            {'deadline': deadline, 'probability': probability, 'zscore': zscore}
+            for deadline, probability, zscore in zip(deadlines.tolist(), probabilities.tolist(), zscores)
+        ],
+        'confidence': [
+            {'confidence': level, 'deadline': deadline}
+            for level, deadline in zip(levels.tolist(), required.tolist())
+        ],
+        'curve': {
+            'deadlines': curve_deadlines.tolist(),
+            'probabilities': curve_probabilities.tolist()
+        }
+    }
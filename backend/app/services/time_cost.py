@@ -0,0 +1,300 @@
+"""Exact linear time-cost tradeoff via parametric linear programming"""
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from app.services.compiled_network import CompiledNetwork, parse_predecessors
+
+# Pivot, feasibility and ratio-tie tolerance
+EPSILON = 1e-9
+
+# Safety net against cycling on pathological degenerate inputs
+MAX_PIVOTS_PER_ROW = 50
+
+# Largest LP solved, in constraint rows: one per dependency, end activity and
+# crashable activity. The dense tableau needs memory quadratic in the rows
+# (about 250 MB and a few seconds at this limit, roughly 1000 activities).
+MAX_TIME_COST_ROWS = 2500
+
+
+class ParametricLP:
+    """
+    Dense-tableau simplex for  min c.x  s.t.  A x <= b0 + r * b1, x >= 0,
+    followed as the parameter r grows from 0.
+
+    Requires b0 >= 0 and c >= 0, so the all-slack basis is optimal at r = 0.
+    Within one basis the optimum is linear in r; when a basic variable is
+    about to turn negative a dual simplex pivot (Bland's rule on ties) swaps
+    it out, which keeps the basis optimal past that point. Each basis change
+    is a potential breakpoint of the optimal value function.
+    """
+
+    def __init__(self, A: np.ndarray, b0: np.ndarray, b1: np.ndarray, c: np.ndarray):
+        m, n = A.shape
+        self.variables = n
+        self.tableau = np.hstack([A, np.eye(m)])
+        self.beta0 = b0.astype(float).copy()
+        self.beta1 = b1.astype(float).copy()
+        self.cost = np.concatenate([c, np.zeros(m)])
+        self.reduced = self.cost.copy()
+        self.basis = np.arange(n, n + m)
+
+    def values(self, r: float) -> np.ndarray:
+        """Structural variable values of the current basis at parameter r"""
+        x = np.zeros(self.variables)
+        basic = self.beta0 + r * self.beta1
+        structural = self.basis < self.variables
+        x[self.basis[structural]] = np.maximum(basic[structural], 0.0)
+        return x
+
+    def objective(self, r: float) -> Tuple[float, float]:
+        """Optimal value at r and its rate of change in r, for the current basis"""
+        c_b = self.cost[self.basis]
+        return float(c_b @ (self.beta0 + r * self.beta1)), float(c_b @ self.beta1)
+
+    def next_limit(self, r: float) -> Tuple[Optional[float], Optional[int]]:
+        """
+        How far r can grow before the current basis turns infeasible, and the
+        row that leaves then. (None, None) if it stays feasible forever.
+        """
+        falling = np.flatnonzero(self.beta1 < -EPSILON)
+        if len(falling) == 0:
+            return None, None
+        limits = self.beta0[falling] / -self.beta1[falling]
+        limit = max(float(limits.min()), r)
+        ties = falling[limits <= limit + EPSILON * max(1.0, abs(limit))]
+        # Bland's rule: smallest basic variable index leaves
+        return limit, int(ties[np.argmin(self.basis[ties])])
+
+    def pivot_out(self, row: int) -> bool:
+        """Dual simplex pivot on `row`; False if no column can enter (infeasible)"""
+        alpha = self.tableau[row]
+        candidates = np.flatnonzero(alpha < -EPSILON)
+        if len(candidates) == 0:
+            return False
+        ratios = self.reduced[candidates] / -alpha[candidates]
+        best = ratios.min()
+        ties = candidates[ratios <= best + EPSILON * max(1.0, abs(best))]
+        column = int(ties.min())
+
+        pivot = alpha[column]
+        self.tableau[row] /= pivot
+        self.beta0[row] /= pivot
+        self.beta1[row] /= pivot
+        # Network constraints stay sparse, so only touch rows that change
+        factors = self.tableau[:, column].copy()
+        factors[row] = 0.0
+        touched = np.flatnonzero(factors)
+        self.tableau[touched] -= np.outer(factors[touched], self.tableau[row])
+        self.beta0[touched] -= factors[touched] * self.beta0[row]
+        self.beta1[touched] -= factors[touched] * self.beta1[row]
+        self.reduced -= self.reduced[column] * self.tableau[row]
+        self.basis[row] = column
+        return True
+
+
+def _crash_range(activity: Dict) -> float:
+    """How far an activity can be crashed (0 if not crashable)"""
+    crash_time = activity.get('crashTime')
+    if crash_time is None:
+        return 0.0
+    return max(float(activity.get('duration') or 0) - float(crash_time), 0.0)
+
+
+def _check_rows(rows: int):
+    if rows > MAX_TIME_COST_ROWS:
+        raise ValueError(
+            f"Project is too large for the exact time-cost curve: {rows} constraints (dependencies, end "
+            f"activities and crashable activities), at most {MAX_TIME_COST_ROWS} are supported"
+        )
+
+
+def check_time_cost_size(activities_data: List[Dict], predecessors: Optional[Dict[str, List[str]]] = None):
+    """
+    Raise ValueError if the project's time-cost LP exceeds MAX_TIME_COST_ROWS.
+    Cheap enough to run in the request before submitting the solve.
+    """
+    edges = 0
+    has_successor = set()
+    crashable = 0
+    for activity in activities_data:
+        if predecessors is not None:
+            preds = predecessors.get(activity['activityId'], ())
+        else:
+            preds = parse_predecessors(activity.get('predecessors') or '')
+        edges += len(preds)
+        has_successor.update(preds)
+        if _crash_range(activity) > 0:
+            crashable += 1
+    sinks = sum(1 for activity in activities_data if activity['activityId'] not in has_successor)
+    _check_rows(edges + sinks + crashable)
+
+
+def time_cost_curve(activities: Dict[str, Dict], graph: Dict[str, List[str]]) -> Dict:
+    """
+    Compute the exact minimum-cost project cost curve for linear crash costs.
+
+    Returns the normal and minimum durations and costs and the curve as a
+    list of breakpoints from the normal duration down, each with its total
+    cost, the marginal cost per time unit of shortening further, and the
+    crash plan realizing it. See iter_time_cost_curve() for the method.
+    """
+    result = {'breakpoints': []}
+    for kind, payload in iter_time_cost_curve(activities, graph):
+        if kind == 'curve':
+            result.update(payload)
+        else:
+            result['breakpoints'].append(payload)
+    breakpoints = result['breakpoints']
+    return {
+        'normalDuration': result['normalDuration'],
+        'normalCost': result['normalCost'],
+        'minimumDuration': breakpoints[-1]['duration'],
+        'minimumDurationCost': breakpoints[-1]['totalCost'],
+        'breakpoints': breakpoints
+    }
+
+
+def iter_time_cost_curve(activities: Dict[str, Dict], graph: Dict[str, List[str]]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield the exact project cost curve as it is computed: first
+    ('curve', {normalDuration, normalCost}), then ('breakpoint', {...}) for
+    each breakpoint from the normal duration down, as soon as the sweep has
+    confirmed it.
+
+    For every project duration T between the normal and the shortest
+    achievable duration, the cheapest way to finish by T is
+
+        min  sum(slope_i * y_i)
+        s.t. S_j >= S_i + duration_i - y_i       for every dependency i -> j
+             S_i + duration_i - y_i <= T         for every end activity
+             0 <= y_i <= duration_i - crashTime_i,  S_i >= 0
+
+    Writing starts relative to the normal schedule (p_i = ES_i - S_i, which
+    an optimal schedule never needs below 0) makes every right-hand side
+    non-negative and puts T only on the right, as T = normal - r. One
+    parametric simplex sweep over r then yields the whole piecewise-linear
+    curve: its breakpoints are where the optimal basis changes.
+    """
+    network = CompiledNetwork.from_activities(
+        activities, graph, lambda activity_id: float(activities[activity_id].get('duration') or 0)
+    )
+    n = network.n
+    if n == 0:
+        raise ValueError("Project has no activities")
+    es, ef = network.forward()
+    normal_duration = float(ef.max())
+    normal_cost = sum(float(a.get('cost') or 0) for a in activities.values())
+
+    # Crashable activities and their cost slopes
+    crashable, limits, slopes = [], [], []
+    for i, activity_id in enumerate(network.ids):
+        activity = activities[activity_id]
+        crash_time = activity.get('crashTime')
+        if crash_time is None or float(crash_time) >= network.durations[i]:
+            continue
+        normal = float(activity.get('cost') or 0)
+        crash_cost = activity.get('crashCost')
+        crash_cost = normal if crash_cost is None else float(crash_cost)
+        if crash_cost < normal:
+            raise ValueError(f"Activity '{activity_id}' has a crash cost lower than its normal cost")
+        crashable.append(i)
+        limits.append(network.durations[i] - float(crash_time))
+        slopes.append((crash_cost - normal) / limits[-1])
+
+    # Variable layout: p for every non-start activity, then y per crashable one
+    has_pred = np.diff(network.pred_ptr) > 0
+    p_column = np.full(n, -1)
+    p_column[has_pred] = np.arange(int(has_pred.sum()))
+    y_offset = int(has_pred.sum())
+    y_column = np.full(n, -1)
+    y_column[crashable] = y_offset + np.arange(len(crashable))
+    variables = y_offset + len(crashable)
+
+    edge_src = np.repeat(np.arange(n), np.diff(network.succ_ptr))
+    edge_dst = network.succ_idx
+    sinks = network.sinks
+    rows = len(edge_src) + len(sinks) + len(crashable)
+    _check_rows(rows)
+    A = np.zeros((rows, variables))
+    b0 = np.zeros(rows)
+    b1 = np.zeros(rows)
+
+    # p_j - p_i - y_i <= ES_j - EF_i
+    edge_rows = np.arange(len(edge_src))
+    A[edge_rows, p_column[edge_dst]] = 1.0
+    from_inner = p_column[edge_src] >= 0
+    A[edge_rows[from_inner], p_column[edge_src[from_inner]]] = -1.0
+    from_crashable = y_column[edge_src] >= 0
+    A[edge_rows[from_crashable], y_column[edge_src[from_crashable]]] = -1.0
+    b0[edge_rows] = es[edge_dst] - ef[edge_src]
+
+    # -p_i - y_i <= normal - EF_i - r   for every end activity
+    sink_rows = len(edge_src) + np.arange(len(sinks))
+    inner = p_column[sinks] >= 0
+    A[sink_rows[inner], p_column[sinks[inner]]] = -1.0
+    with_crash = y_column[sinks] >= 0
+    A[sink_rows[with_crash], y_column[sinks[with_crash]]] = -1.0
+    b0[sink_rows] = normal_duration - ef[sinks]
+    b1[sink_rows] = -1.0
+
+    # y_i <= duration_i - crashTime_i
+    bound_rows = len(edge_src) + len(sinks) + np.arange(len(crashable))
+    A[bound_rows, y_column[crashable]] = 1.0
+    b0[bound_rows] = limits
+
+    cost = np.zeros(variables)
+    cost[y_offset:] = slopes
+    np.maximum(b0, 0.0, out=b0)  # float noise from ES/EF differences
+
+    def breakpoint(point, marginal: Optional[float]) -> Dict:
+        r, increase, x = point
+        plan = []
+        for i, limit, slope in zip(crashable, limits, slopes):
+            crashed = min(float(x[y_column[i]]), limit)
+            if crashed > EPSILON:
+                plan.append({
+                    'activityId': network.ids[i],
+                    'normalTime': float(network.durations[i]),
+                    'duration': float(network.durations[i]) - crashed,
+                    'crashedBy': crashed,
+                    'costIncrease': crashed * slope
+                })
+        return {
+            'duration': normal_duration - r,
+            'totalCost': normal_cost + increase,
+            'costIncrease': increase,
+            'marginalCost': marginal,
+            'crashPlan': plan
+        }
+
+    yield 'curve', {'normalDuration': normal_duration, 'normalCost': normal_cost}
+
+    # A point is a breakpoint once the next one shows the marginal cost
+    # changes there; collinear points in between are dropped
+    previous, candidate = None, None
+    for point in _sweep(ParametricLP(A, b0, b1, cost), rows):
+        if candidate is not None:
+            if previous is not None:
+                (r0, z0, _), (r1, z1, _), (r2, z2, _) = previous, candidate, point
+                if abs((z1 - z0) * (r2 - r1) - (z2 - z1) * (r1 - r0)) <= EPSILON * max(1.0, z2) * max(1.0, r2):
+                    candidate = point
+                    continue
+            yield 'breakpoint', breakpoint(candidate, (point[1] - candidate[1]) / (point[0] - candidate[0]))
+            previous = candidate
+        candidate = point
+    yield 'breakpoint', breakpoint(candidate, None)
+
+
+def _sweep(lp: ParametricLP, rows: int) -> Iterator[Tuple[float, float, np.ndarray]]:
+    """Yield (r, optimal value, solution) at r = 0 and at every basis change"""
+    r = 0.0
+    yield r, 0.0, lp.values(r)
+    for _ in range(MAX_PIVOTS_PER_ROW * max(rows, 1)):
+        limit, row = lp.next_limit(r)
+        if limit is None:
+            return
+        if limit > r + EPSILON:
+            r = limit
+            yield r, lp.objective(r)[0], lp.values(r)
+        if not lp.pivot_out(row):
+            return
+    raise RuntimeError("Time-cost solver did not converge")
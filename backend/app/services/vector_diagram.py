@@ -0,0 +1,222 @@
+"""
+Vector rendering of the AON network diagram: a reportlab Drawing for PDF
+reports and SVG for the diagram endpoint. Both draw the same AONScene as
+the raster (matplotlib) renderer, without matplotlib.
+"""
+from reportlab.graphics.shapes import FILL_NON_ZERO, Drawing, Path, String
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import getAscentDescent, stringWidth
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from xml.sax.saxutils import escape
+from app.services.artifact_cache import artifact_cache
+from app.services.network_diagram import (
+    AON_LEGEND, EDGE_ALPHA, EDGE_STYLES, NODE_STYLES, AONScene, NetworkDiagramGenerator, diagram_key
+)
+
+# Layout units per point of the raster diagram's font sizes and line widths.
+# Text and lines scale with the boxes here, so zooming into a large network
+# keeps them in proportion.
+UNITS_PER_POINT = 1 / 44
+
+# Points per layout unit at natural size: an activity box 72 points wide
+NATURAL_SCALE = 36
+
+# Title and legend band above the diagram, and the narrowest page, in points
+HEADER_HEIGHT = 44
+MIN_WIDTH = 320
+
+TITLE = 'Activity-on-Node (AON) Network Diagram'
+FONTS = {False: 'Helvetica', True: 'Helvetica-Bold'}
+SVG_FONT_FAMILY = 'Helvetica, Arial, sans-serif'
+
+
+class VectorPath(NamedTuple):
+    """All boxes, edges or arrowheads of one style, drawn as a single path"""
+    subpaths: List[List[Tuple[float, float]]]
+    closed: bool  # filled polygons, else open lines
+    fill: Optional[str]
+    stroke: Optional[str]
+    strokeWidth: float
+    opacity: float = 1.0
+
+
+class VectorText(NamedTuple):
+    x: float  # center
+    y: float  # baseline
+    text: str
+    size: float
+    bold: bool
+    color: str
+
+
+@lru_cache(maxsize=None)
+def _color(value: Optional[str]) -> Optional[colors.Color]:
+    return colors.HexColor(value) if value else None
+
+
+@lru_cache(maxsize=64)
+def _ascent_descent(bold: bool, size: float) -> Tuple[float, float]:
+    return getAscentDescent(FONTS[bold], size)
+
+
+class VectorDiagram:
+    """
+    An AON scene placed on a page in points (y pointing up): at natural
+    size, or scaled down to fit max_width x max_height
+    """
+
+    def __init__(self, scene: AONScene, max_width: Optional[float] = None, max_height: Optional[float] = None):
+        self.scene = scene
+        data_width = max(scene.xlim[1] - scene.xlim[0], 1e-9)
+        data_height = max(scene.ylim[1] - scene.ylim[0], 1e-9)
+        scale = NATURAL_SCALE
+        if max_width:
+            scale = min(scale, max_width / data_width)
+        if max_height:
+            scale = min(scale, (max_height - HEADER_HEIGHT) / data_height)
+        self.scale = scale
+        self.width = max(data_width * scale, min(MIN_WIDTH, max_width or MIN_WIDTH))
+        self.height = data_height * scale + HEADER_HEIGHT
+        self.left = (self.width - data_width * scale) / 2
+
+    def _point(self, x: float, y: float) -> Tuple[float, float]:
+        return (self.left + (x - self.scene.xlim[0]) * self.scale, (y - self.scene.ylim[0]) * self.scale)
+
+    def _points(self, size: float) -> float:
+        """A raster size in points at this diagram's scale"""
+        return size * UNITS_PER_POINT * self.scale
+
+    def _rect(self, left: float, bottom: float, width: float, height: float) -> List[Tuple[float, float]]:
+        return [(left, bottom), (left + width, bottom), (left + width, bottom + height), (left, bottom + height)]
+
+    def shapes(self) -> List:
+        """Paths and texts in drawing order, one path per style"""
+        scene = self.scene
+        shapes = []
+
+        # Edges first (so they appear behind nodes), then their arrowheads
+        for critical in (False, True):
+            style = EDGE_STYLES[critical]
+            lines = [[self._point(x, y) for x, y in line]
+                     for line, is_critical in zip(scene.edges, scene.edge_critical) if is_critical == critical]
+            if lines:
+                shapes.append(VectorPath(lines, False, None, style['color'],
+                                         self._points(style['linewidth']), EDGE_ALPHA))
+        for critical in (False, True):
+            heads = [[self._point(x, y) for x, y in head]
+                     for head, is_critical in zip(scene.arrowheads, scene.edge_critical) if is_critical == critical]
+            if heads:
+                shapes.append(VectorPath(heads, True, EDGE_STYLES[critical]['color'], None, 0, EDGE_ALPHA))
+
+        boxes: Dict[str, List] = {}
+        for (x, y, width, height), kind in zip(scene.boxes, scene.box_kinds):
+            boxes.setdefault(kind, []).append(self._rect(*self._point(x, y), width * self.scale, height * self.scale))
+        for kind, rects in boxes.items():
+            style = NODE_STYLES[kind]
+            shapes.append(VectorPath(rects, True, style['face'], style['edge'], self._points(style['linewidth'])))
+
+        # Labels, with the white backing of timing values behind all of them
+        backgrounds = []
+        texts = []
+        for label in scene.labels:
+            x, y = self._point(label.x, label.y)
+            size = self._points(label.size)
+            ascent, descent = _ascent_descent(label.bold, size)
+            baseline = {'center': y - (ascent + descent) / 2, 'bottom': y - descent, 'top': y - ascent}[label.va]
+            if label.background:
+                pad = 0.3 * size
+                width = stringWidth(label.text, FONTS[label.bold], size) + 2 * pad
+                backgrounds.append(self._rect(x - width / 2, baseline + descent - pad, width, ascent - descent + 2 * pad))
+            texts.append(VectorText(x, baseline, label.text, size, label.bold, label.color))
+        if backgrounds:
+            shapes.append(VectorPath(backgrounds, True, '#FFFFFF', None, 0, 0.7))
+        shapes.extend(texts)
+
+        # Title and a legend row above the diagram
+        shapes.append(VectorText(self.width / 2, self.height - 16, TITLE, 12, True, '#1F2937'))
+        x = 8
+        for text, kind in AON_LEGEND:
+            style = NODE_STYLES[kind]
+            shapes.append(VectorPath([self._rect(x, self.height - 36, 14, 8)], True, style['face'], style['edge'], 1))
+            label_width = stringWidth(text, FONTS[False], 8)
+            shapes.append(VectorText(x + 20 + label_width / 2, self.height - 35, text, 8, False, '#1F2937'))
+            x += 30 + label_width
+        return shapes
+
+    def to_drawing(self) -> Drawing:
+        """The diagram as a reportlab Drawing, a flowable of PDF reports"""
+        drawing = Drawing(self.width, self.height)
+        for shape in self.shapes():
+            if isinstance(shape, VectorPath):
+                path = Path(fillColor=_color(shape.fill), fillOpacity=shape.opacity, strokeColor=_color(shape.stroke),
+                            strokeOpacity=shape.opacity, strokeWidth=shape.strokeWidth, fillMode=FILL_NON_ZERO)
+                for points in shape.subpaths:
+                    path.moveTo(*points[0])
+                    for point in points[1:]:
+                        path.lineTo(*point)
+                    if shape.closed:
+                        path.closePath()
+                drawing.add(path)
+            else:
+                drawing.add(String(shape.x, shape.y, shape.text, fontName=FONTS[shape.bold], fontSize=shape.size,
+                                   fillColor=_color(shape.color), textAnchor='middle'))
+        return drawing
+
+    def to_svg(self) -> str:
+        """The diagram as a standalone SVG document"""
+        height = self.height
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width:.1f}" height="{height:.1f}" '
+            f'viewBox="0 0 {self.width:.1f} {height:.1f}">',
+            '<rect width="100%" height="100%" fill="#FFFFFF"/>'
+        ]
+        group = None  # the open <g> of consecutive texts in one font and color
+        for shape in self.shapes():
+            if isinstance(shape, VectorPath):
+                if group is not None:
+                    parts.append('</g>')
+                    group = None
+                close = 'Z' if shape.closed else ''
+                data = ''.join(
+                    'M' + 'L'.join(f'{x:.2f} {height - y:.2f}' for x, y in points) + close
+                    for points in shape.subpaths
+                )
+                fill = f'fill="{shape.fill}"' if shape.fill else 'fill="none"'
+                stroke = f' stroke="{shape.stroke}" stroke-width="{shape.strokeWidth:.2f}"' if shape.stroke else ''
+                opacity = f' opacity="{shape.opacity}"' if shape.opacity != 1 else ''
+                parts.append(f'<path d="{data}" {fill}{stroke}{opacity}/>')
+            else:
+                font = (round(shape.size, 2), shape.bold, shape.color)
+                if font != group:
+                    if group is not None:
+                        parts.append('</g>')
+                    weight = ' font-weight="bold"' if shape.bold else ''
+                    parts.append(f'<g font-family="{SVG_FONT_FAMILY}" font-size="{shape.size:.2f}"{weight} fill="{shape.color}">')
+                    group = font
+                parts.append(f'<text x="{shape.x:.2f}" y="{height - shape.y:.2f}" text-anchor="middle">'
+                             f'{escape(shape.text)}</text>')
+        if group is not None:
+            parts.append('</g>')
+        parts.append('</svg>')
+        return '\n'.join(parts)
+
+
+def generate_aon_drawing(activities: List[Dict], critical_path: List[str],
+                         max_width: Optional[float] = None, max_height: Optional[float] = None) -> Drawing:
+    """The AON diagram as a reportlab Drawing fitting max_width x max_height points"""
+    scene = NetworkDiagramGenerator(activities, critical_path).aon_scene()
+    return VectorDiagram(scene, max_width, max_height).to_drawing()
+
+
+def generate_svg_diagram(activities: List[Dict], critical_path: List[str]) -> bytes:
+    """The AON diagram as an SVG document at natural size"""
+    key = diagram_key(activities, critical_path, 'aon', 'svg')
+    cached = artifact_cache.get(key, 'svg')
+    if cached is not None:
+        return cached
+
+    scene = NetworkDiagramGenerator(activities, critical_path).aon_scene()
+    svg = VectorDiagram(scene).to_svg().encode('utf-8')
+    artifact_cache.put(key, 'svg', svg)
+    return svg
@@ -0,0 +1,49 @@
+"""
+PERTCPMEngine.analyze() on layered networks, graph construction included,
+and the compiled forward/backward passes alone where the checkout has them.
+
+    python -m benchmarks.analysis [--root DIR] [--sizes 10000 100000] [--widths 50 500]
+
+The engine before compiled networks recursed once per activity, so this
+runs in a thread with a large stack and a raised recursion limit to let
+such checkouts finish.
+"""
+import copy
+import sys
+import threading
+from benchmarks.common import best_of, layered, parse_args
+
+
+def main(args):
+    from app.services.pert_cpm import PERTCPMEngine
+
+    print(f"{'activities':>10} {'width':>6} {'analyze':>10} {'passes':>9}")
+    for n in args.sizes:
+        for width in args.widths:
+            activities = layered(n, width=width, seed=1)
+            # The engine writes results into the activity dicts, so every run gets its own
+            copies = [copy.deepcopy(activities) for _ in range(args.repeat)]
+            analyze = best_of(lambda: PERTCPMEngine(copies.pop()).analyze(), args.repeat)
+
+            passes = ''
+            engine = PERTCPMEngine(copy.deepcopy(activities))
+            if hasattr(engine, 'compile'):
+                network = engine.compile()
+                def run_passes():
+                    es, ef = network.forward()
+                    network.backward(float(ef.max()))
+                passes = f"{best_of(run_passes, args.repeat) * 1000:7.0f}ms"
+            print(f"{n:>10} {width:>6} {analyze * 1000:8.0f}ms {passes:>9}", flush=True)
+
+
+if __name__ == '__main__':
+    args = parse_args(__doc__, lambda parser: (
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000]),
+        parser.add_argument("--widths", type=int, nargs="+", default=[50, 500]),
+        parser.add_argument("--repeat", type=int, default=3)
+    ))
+    sys.setrecursionlimit(1_000_000)
+    threading.stack_size(512 * 1024 * 1024)
+    thread = threading.Thread(target=main, args=(args,))
+    thread.start()
+    thread.join()
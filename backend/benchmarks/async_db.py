@@ -0,0 +1,123 @@
+"""
+Request throughput and latency under concurrent load: the app runs under
+uvicorn in a subprocess on SQLite, with a fixed delay injected into every
+statement to stand in for a database server. Clients list a project's
+activities as fast as they can, alone and while one more client keeps a
+slow recursive dependents query running (--slow seconds each).
+
+    python -m benchmarks.async_db [--root DIR] [--clients 1 20] [--seconds 8]
+
+The delay runs in whatever thread executes the statement, so a handler
+that queries synchronously holds the event loop for it.
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import parse_args
+
+
+def serve(args):
+    """Run the app with the statement delays (the subprocess side)"""
+    import logging
+    from sqlalchemy import event
+    import uvicorn
+    import main
+    import app.database as database
+    logging.disable(logging.INFO)
+
+    def delay(statement):
+        time.sleep(args.slow if 'RECURSIVE' in statement else args.latency)
+
+    async_engine = getattr(database, 'async_engine', None)
+    if async_engine is not None:
+        @event.listens_for(async_engine.sync_engine, 'connect')
+        def on_async_connect(dbapi_connection, record):
+            dbapi_connection.run_async(lambda connection: connection.set_trace_callback(delay))
+    else:
+        @event.listens_for(database.engine, 'connect')
+        def on_connect(dbapi_connection, record):
+            dbapi_connection.set_trace_callback(delay)
+    uvicorn.run(main.app, host='127.0.0.1', port=args.port, log_level='warning')
+
+
+async def load(args, base_url: str):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        for _ in range(100):
+            try:
+                await client.get('/health')
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+        response = await client.post('/auth/signup', json={'email': 'bench@example.com', 'username': 'bench', 'password': 'benchmark1'})
+        headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+        project_id = (await client.post('/projects', json={'name': 'Bench', 'method': 'CPM', 'timeUnit': 'days'},
+                                        headers=headers)).json()['id']
+        ids = []
+        for j in range(10):
+            response = await client.post(f"/projects/{project_id}/activities", headers=headers, json={
+                'activityId': f"A{j}", 'name': 'n', 'predecessors': f"A{j - 1}" if j else '', 'duration': 1
+            })
+            ids.append(response.json()['id'])
+
+        for clients in args.clients:
+            for slow in (False, True):
+                latencies, failures = [], [0]
+                stop = time.perf_counter() + args.seconds
+
+                async def fast():
+                    while time.perf_counter() < stop:
+                        start = time.perf_counter()
+                        response = await client.get(f"/projects/{project_id}/activities", headers=headers)
+                        if response.status_code != 200:
+                            failures[0] += 1
+                        latencies.append(time.perf_counter() - start)
+
+                async def recursive():
+                    while time.perf_counter() < stop:
+                        await client.get(f"/projects/{project_id}/activities/{ids[0]}/dependents?transitive=true",
+                                         headers=headers)
+
+                start = time.perf_counter()
+                await asyncio.gather(*[fast() for _ in range(clients)], *([recursive()] if slow else []))
+                elapsed = time.perf_counter() - start
+                latencies.sort()
+                print(f"{clients:>3} clients, {'with slow query' if slow else 'fast only':<15}: "
+                      f"{len(latencies) / elapsed:7.1f} req/s, p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+                      f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms, {failures[0]} failed", flush=True)
+
+
+def main(args):
+    work = tempfile.mkdtemp(prefix='projectpath-bench-')
+    environment = {**os.environ, 'DATABASE_URL': f"sqlite:///{work}/bench.db"}
+    environment.pop('ASYNC_DATABASE_URL', None)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.async_db', '--serve', '--root', args.root, '--port', str(args.port),
+         '--latency', str(args.latency), '--slow', str(args.slow)],
+        env=environment, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    try:
+        asyncio.run(load(args, f"http://127.0.0.1:{args.port}"))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    args = parse_args(__doc__, lambda parser: (
+        parser.add_argument("--clients", type=int, nargs="+", default=[1, 20]),
+        parser.add_argument("--seconds", type=float, default=8.0),
+        parser.add_argument("--latency", type=float, default=0.002, help="seconds added to every statement"),
+        parser.add_argument("--slow", type=float, default=1.0, help="seconds the recursive query takes"),
+        parser.add_argument("--port", type=int, default=8765),
+        parser.add_argument("--serve", action="store_true", help="run the server side (used internally)")
+    ))
+    if args.serve:
+        serve(args)
+    else:
+        main(args)
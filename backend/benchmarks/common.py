@@ -0,0 +1,122 @@
+"""
+Shared setup of the benchmark scripts: which checkout to measure, synthetic
+networks, timing and an API client on a throwaway database.
+
+Every script measures the backend it is pointed at with --root (by default
+this one), so a "before" column is reproduced by checking out the commit
+before a change elsewhere and measuring it with the same script:
+
+    git worktree add /tmp/before <commit>^
+    python -m benchmarks.analysis --root /tmp/before/backend
+"""
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(description: str, configure: Callable[[argparse.ArgumentParser], None] = None) -> argparse.Namespace:
+    """
+    Parse the command line and put the backend to measure first on sys.path.
+    Scripts import app modules only after this.
+    """
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=BACKEND_DIR,
+                        help="backend directory of the checkout to measure (default: this one)")
+    if configure is not None:
+        configure(parser)
+    args = parser.parse_args()
+    args.root = os.path.abspath(args.root)
+    sys.path.insert(0, args.root)
+    return args
+
+
+def layered(n: int, width: int = 50, max_predecessors: int = 3, seed: int = 0, pert: bool = False) -> List[Dict]:
+    """
+    A layered network of n activities, `width` per layer: each activity after
+    the first layer has 1..max_predecessors predecessors in the two layers
+    before it. Activities have costs and crash data for the crashing and
+    export paths.
+    """
+    rng = random.Random(seed)
+    activities = []
+    for i in range(n):
+        layer = i // width
+        predecessors = []
+        if layer > 0:
+            low = max(0, (layer - 2) * width)
+            count = rng.randint(1, max_predecessors)
+            predecessors = sorted({f"A{rng.randrange(low, layer * width)}" for _ in range(count)})
+        activity = {'activityId': f"A{i}", 'name': f"Act {i}", 'predecessors': ','.join(predecessors)}
+        if pert:
+            optimistic = rng.randint(1, 5)
+            most_likely = optimistic + rng.randint(0, 5)
+            pessimistic = most_likely + rng.randint(0, 8)
+            activity.update(optimistic=float(optimistic), mostLikely=float(most_likely),
+                            pessimistic=float(pessimistic), duration=None)
+        else:
+            activity['duration'] = float(rng.randint(1, 20))
+        activity.update(cost=100.0, crashTime=max(1.0, (activity['duration'] or 5) - rng.randint(0, 4)),
+                        crashCost=100.0 + rng.randint(10, 100))
+        activities.append(activity)
+    return activities
+
+
+def series_parallel(blocks: int, width: int, seed: int = 0, fractional: bool = False) -> List[Dict]:
+    """
+    `blocks` groups of `width` parallel activities joined in series by
+    zero-duration join activities: width ** blocks start-to-end paths
+    """
+    rng = random.Random(seed)
+    activities = []
+    previous = ''
+    for block in range(blocks):
+        parallel = [f"B{block}_{j}" for j in range(width)]
+        for activity_id in parallel:
+            duration = round(rng.uniform(1, 20), 3) if fractional else rng.randint(1, 20)
+            activities.append({'activityId': activity_id, 'name': activity_id, 'predecessors': previous, 'duration': duration})
+        activities.append({'activityId': f"J{block}", 'name': 'join', 'predecessors': ','.join(parallel), 'duration': 0})
+        previous = f"J{block}"
+    return activities
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Fastest of `repeat` calls, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@contextmanager
+def api_client(**environment) -> Iterator[Tuple[object, Dict[str, str]]]:
+    """
+    A TestClient on the full app, with its lifespan, over a fresh SQLite
+    database in a temporary directory, and the auth headers of a new user.
+    `environment` sets configuration read at import, such as
+    ARTIFACT_CACHE_MAX_MB=0. One small guest analysis has run, so that
+    starting the analysis workers is not part of any measurement.
+    """
+    os.chdir(tempfile.mkdtemp(prefix="projectpath-bench-"))
+    os.environ["DATABASE_URL"] = "sqlite:///./bench.db"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.update({name: str(value) for name, value in environment.items()})
+    from fastapi.testclient import TestClient
+    import main
+    logging.disable(logging.INFO)
+    with TestClient(main.app) as client:
+        response = client.post("/auth/signup", json={"email": "bench@example.com", "username": "bench", "password": "benchmark1"})
+        response.raise_for_status()
+        client.post("/projects/analyze-adhoc", json={"method": "CPM", "timeUnit": "days", "activities": [
+            {"activityId": "A", "name": "A", "duration": 1}, {"activityId": "B", "name": "B", "predecessors": "A", "duration": 1}
+        ]}).raise_for_status()
+        yield client, {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,77 @@
+"""
+AON network diagram rendering (150 dpi PNG): diagrams per second on one
+thread and on --threads threads, whether the threaded images are
+byte-identical to the serial ones, and optionally the first PDF export of
+a project through the API (--export).
+
+    python -m benchmarks.diagrams [--root DIR] [--sizes 20 100 300] [--count 10] [--export 300]
+
+Networks are layered with up to 2 predecessors per activity; sizes above
+100 render a single diagram.
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import api_client, layered, parse_args
+
+
+def render_inputs(n: int, count: int):
+    """Analyzed activities and critical path of `count` networks of n activities"""
+    from app.services.pert_cpm import PERTCPMEngine
+
+    inputs = []
+    for seed in range(count):
+        activities = layered(n, width=min(max(n // 4, 3), 50), max_predecessors=2, seed=seed)
+        result = PERTCPMEngine([dict(a) for a in activities]).analyze()
+        inputs.append(([{**a, **result['activities'][a['activityId']]} for a in activities], result['criticalPath']))
+    return inputs
+
+
+def main(args):
+    from app.services.network_diagram import NetworkDiagramGenerator
+
+    def render(diagram_input) -> str:
+        activities, critical_path = diagram_input
+        png = NetworkDiagramGenerator([dict(a) for a in activities], critical_path).generate_aon_diagram()
+        return hashlib.sha1(png.getvalue()).hexdigest()
+
+    for n in args.sizes:
+        inputs = render_inputs(n, args.count if n <= 100 else 1)
+        render(inputs[0])  # loads fonts
+        start = time.perf_counter()
+        serial = [render(diagram_input) for diagram_input in inputs]
+        elapsed = time.perf_counter() - start
+        line = f"{n:>5} activities: {len(inputs) / elapsed:6.2f} diagrams/s ({elapsed / len(inputs):6.2f} s each)"
+        if len(inputs) > 1:
+            try:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(args.threads) as executor:
+                    threaded = list(executor.map(render, inputs))
+                elapsed = time.perf_counter() - start
+                line += (f" | {args.threads} threads {len(inputs) / elapsed:6.2f} diagrams/s,"
+                         f" identical to serial: {threaded == serial}")
+            except Exception as e:
+                line += f" | {args.threads} threads failed: {type(e).__name__}: {e}"
+        print(line, flush=True)
+
+    if args.export:
+        with api_client(ARTIFACT_CACHE_MAX_MB=0) as (client, headers):
+            for n in args.export:
+                project_id = client.post('/projects', json={'name': f"Bench {n}", 'method': 'CPM', 'timeUnit': 'days'},
+                                         headers=headers).json()['id']
+                for activity in layered(n, width=min(max(n // 4, 3), 50), max_predecessors=2):
+                    client.post(f"/projects/{project_id}/activities", json=activity, headers=headers).raise_for_status()
+                start = time.perf_counter()
+                client.get(f"/projects/{project_id}/export?format=pdf", headers=headers).raise_for_status()
+                print(f"{n:>5} activities: first PDF export {time.perf_counter() - start:6.2f} s", flush=True)
+
+
+if __name__ == '__main__':
+    os.environ['ARTIFACT_CACHE_MAX_MB'] = '0'
+    main(parse_args(__doc__, lambda parser: (
+        parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 300]),
+        parser.add_argument("--count", type=int, default=10, help="diagrams rendered per size up to 100 activities"),
+        parser.add_argument("--threads", type=int, default=4),
+        parser.add_argument("--export", type=int, nargs="*", default=[], help="project sizes to export as PDF")
+    )))
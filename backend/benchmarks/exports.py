@@ -0,0 +1,46 @@
+"""
+Report and diagram exports through the API: PDF reports with the raster and
+the vector network diagram, and the diagram alone as PNG and SVG, with
+their sizes. The artifact cache is off and one worker renders, so every
+request renders; each project's analysis is cached by a first export, so
+the times are rendering only.
+
+    python -m benchmarks.exports [--root DIR] [--sizes 300 3000] [--repeat 2]
+
+Networks are layered with up to 3 predecessors per activity.
+"""
+import os
+import time
+from benchmarks.common import api_client, layered, parse_args
+
+EXPORTS = [
+    ("PDF raster", "export?format=pdf&diagram=raster"),
+    ("PDF vector", "export?format=pdf&diagram=vector"),
+    ("diagram png", "diagram?format=png"),
+    ("diagram svg", "diagram?format=svg"),
+]
+
+
+def main(args):
+    with api_client(ARTIFACT_CACHE_MAX_MB=0, CPU_WORKERS=1) as (client, headers):
+        for n in args.sizes:
+            project_id = client.post('/projects', json={'name': f"Bench {n}", 'method': 'CPM', 'timeUnit': 'days'},
+                                     headers=headers).json()['id']
+            client.post(f"/projects/{project_id}/activities/bulk", json=layered(n), headers=headers).raise_for_status()
+            client.get(f"/projects/{project_id}/export?format=pdf", headers=headers).raise_for_status()
+            for label, path in EXPORTS:
+                best = float('inf')
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    response = client.get(f"/projects/{project_id}/{path}", headers=headers)
+                    best = min(best, time.perf_counter() - start)
+                    response.raise_for_status()
+                print(f"{n:>5} activities: {label:<12} {best:6.2f} s {len(response.content) / 1024:8.0f} KiB", flush=True)
+
+
+if __name__ == '__main__':
+    os.environ['ARTIFACT_CACHE_MAX_MB'] = '0'
+    main(parse_args(__doc__, lambda parser: (
+        parser.add_argument("--sizes", type=int, nargs="+", default=[300, 3000]),
+        parser.add_argument("--repeat", type=int, default=2, help="runs per export; the fastest is reported")
+    )))
@@ -0,0 +1,93 @@
+"""
+Activity and project lookups on a populated SQLite database: the raw
+(projectId, activityId) and per-user project queries with their query
+plans, and the API calls built on them. Where the checkout has the lookup
+indexes of migration 2, they are dropped before the data is loaded and
+the timed migration recreates them.
+
+    python -m benchmarks.indexes [--root DIR] [--projects 2000] [--activities 50]
+
+Each figure is the best of --repeat runs, in milliseconds.
+"""
+import sqlite3
+import time
+from benchmarks.common import api_client, best_of, parse_args
+
+LOOKUP_INDEXES = ('uq_activities_project_activity', 'ix_projects_userId')
+
+
+def main(args):
+    with api_client() as (client, headers):
+        from app.database import engine
+
+        connection = sqlite3.connect('bench.db')
+        indexed = connection.execute(
+            f"SELECT count(*) FROM sqlite_master WHERE type = 'index' AND name IN {LOOKUP_INDEXES}"
+        ).fetchone()[0]
+        if indexed:
+            for name in LOOKUP_INDEXES:
+                connection.execute(f'DROP INDEX "{name}"')
+            connection.execute("DELETE FROM schema_version WHERE version = 2")
+
+        users = args.projects // 4
+        connection.executemany("INSERT INTO users (id, email, username, hashedPassword) VALUES (?, ?, ?, ?)",
+                               [(f"u{i}", f"e{i}", f"n{i}", 'x') for i in range(users)])
+        connection.executemany("INSERT INTO projects (id, name, method, timeUnit, userId) VALUES (?, ?, ?, ?, ?)",
+                               [(f"p{i}", 'p', 'CPM', 'days', f"u{i % users}") for i in range(args.projects)])
+        connection.executemany(
+            "INSERT INTO activities (id, projectId, activityId, name, predecessors, duration, isCritical) VALUES (?, ?, ?, ?, ?, ?, 0)",
+            [(f"a{i}-{j}", f"p{i}", f"A{j}", 'n', f"A{j - 1}" if j else '', 1)
+             for i in range(args.projects) for j in range(args.activities)]
+        )
+        connection.commit()
+
+        project_id = client.post('/projects', json={'name': 'Bench', 'method': 'CPM', 'timeUnit': 'days'},
+                                 headers=headers).json()['id']
+        for j in range(args.activities):
+            client.post(f"/projects/{project_id}/activities", headers=headers, json={
+                'activityId': f"X{j}", 'name': 'n', 'predecessors': f"X{j - 1}" if j else '', 'duration': 1
+            }).raise_for_status()
+        print(f"{args.projects + 1} projects, {(args.projects + 1) * args.activities} activities")
+
+        if indexed:
+            from app.migrations import run_migrations
+            start = time.perf_counter()
+            run_migrations(engine)
+            print(f"migration 2: {(time.perf_counter() - start) * 1000:.0f} ms")
+            # A connection from before the migration may keep planning without its indexes
+            connection.close()
+            connection = sqlite3.connect('bench.db')
+
+        for label, query in (
+            ('(projectId, activityId) lookup', "SELECT id FROM activities WHERE projectId = 'p5' AND activityId = 'A7'"),
+            ('projects of a user', "SELECT id FROM projects WHERE userId = 'u5'")
+        ):
+            plan = connection.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()[0][3]
+            elapsed = best_of(lambda: connection.execute(query).fetchall(), args.repeat * 10)
+            print(f"{label:<32} {elapsed * 1000:8.3f} ms  {plan}")
+
+        created = [0]
+        def create():
+            created[0] += 1
+            client.post(f"/projects/{project_id}/activities", headers=headers,
+                        json={'activityId': f"N{created[0]}", 'name': 'n', 'duration': 1}).raise_for_status()
+        def duplicate():
+            response = client.post(f"/projects/{project_id}/activities", headers=headers,
+                                   json={'activityId': 'X1', 'name': 'n', 'duration': 1})
+            assert response.status_code == 400, response.text
+        for label, call in (
+            ('POST activity', create),
+            ('duplicate POST activity', duplicate),
+            ('GET activities', lambda: client.get(f"/projects/{project_id}/activities", headers=headers)),
+            ('GET /projects', lambda: client.get('/projects', headers=headers)),
+            ('GET analyze', lambda: client.get(f"/projects/{project_id}/analyze", headers=headers))
+        ):
+            print(f"{label:<32} {best_of(call, args.repeat) * 1000:8.2f} ms", flush=True)
+
+
+if __name__ == '__main__':
+    main(parse_args(__doc__, lambda parser: (
+        parser.add_argument("--projects", type=int, default=2000),
+        parser.add_argument("--activities", type=int, default=50),
+        parser.add_argument("--repeat", type=int, default=20)
+    )))
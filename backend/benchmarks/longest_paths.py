@@ -0,0 +1,36 @@
+"""
+PERTCPMEngine.longest_paths(k) on series-parallel networks, whose path
+count is exponential: blocks of W parallel activities joined in series
+have W ** blocks start-to-end paths. Times exclude the CPM analysis.
+
+    python -m benchmarks.longest_paths [--root DIR] [--k 10 100 1000]
+
+With integer durations many paths tie; with fractional ones the top
+paths part early, so every path is rebuilt in full.
+"""
+from benchmarks.common import best_of, parse_args, series_parallel
+
+# (blocks, parallel activities per block)
+SHAPES = [(50, 20), (200, 50), (1000, 100)]
+
+
+def main(args):
+    from app.services.pert_cpm import PERTCPMEngine
+
+    for fractional in (False, True):
+        print("fractional durations" if fractional else "integer durations")
+        for blocks, width in SHAPES:
+            activities = series_parallel(blocks, width, seed=1, fractional=fractional)
+            engine = PERTCPMEngine(activities)
+            engine.analyze()
+            times = ', '.join(
+                f"k={k} {best_of(lambda: engine.longest_paths(k), args.repeat) * 1000:.1f} ms" for k in args.k
+            )
+            print(f"  {len(activities):>7} activities ({width}^{blocks} paths): {times}", flush=True)
+
+
+if __name__ == '__main__':
+    main(parse_args(__doc__, lambda parser: (
+        parser.add_argument("--k", type=int, nargs="+", default=[10, 1000]),
+        parser.add_argument("--repeat", type=int, default=3)
+    )))
@@ -0,0 +1,59 @@
+"""
+GET /projects/{id}/analyze through the full app on SQLite: how long it
+takes and how many statements it executes when the schedule is first
+written, when nothing changed and after every duration was edited. The
+analysis result cache is disabled so every call runs the engine.
+
+    python -m benchmarks.schedule_writeback [--root DIR] [--sizes 1000 10000]
+
+Statements are cursor executions, including the project and activity
+SELECTs; on PostgreSQL each one is a round trip.
+"""
+import time
+from benchmarks.common import api_client, layered, parse_args
+
+
+def main(args):
+    with api_client() as (client, headers):
+        from sqlalchemy import event, text
+        import app.database as database
+        from app.models.models import Activity
+        from app.services.analysis_cache import analysis_cache
+        analysis_cache.max_entries = 0
+
+        # Handlers use the async engine where the checkout has one
+        engine = getattr(database, 'async_engine', None)
+        engine = engine.sync_engine if engine is not None else database.engine
+        statements = [0]
+        event.listen(engine, 'before_cursor_execute', lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+        print(f"{'activities':>10}  {'scenario':<17} {'time':>8} {'statements':>11}")
+        for n in args.sizes:
+            project_id = client.post('/projects', json={'name': f"Bench {n}", 'method': 'CPM', 'timeUnit': 'days'},
+                                     headers=headers).json()['id']
+            with database.SessionLocal() as db:
+                db.add_all([Activity(projectId=project_id, **activity) for activity in layered(n)])
+                db.commit()
+            try:
+                from app.services.dependencies import backfill_dependencies
+            except ImportError:
+                pass  # predecessors are only read from the activities
+            else:
+                with database.engine.begin() as connection:
+                    backfill_dependencies(connection)
+
+            for scenario in ('first analyze', 'unchanged', 'durations edited'):
+                if scenario == 'durations edited':
+                    with database.engine.begin() as connection:
+                        connection.execute(text('UPDATE activities SET duration = duration + 1 WHERE "projectId" = :p'),
+                                           {'p': project_id})
+                statements[0] = 0
+                start = time.perf_counter()
+                response = client.get(f"/projects/{project_id}/analyze", headers=headers)
+                elapsed = time.perf_counter() - start
+                response.raise_for_status()
+                print(f"{n:>10}  {scenario:<17} {elapsed * 1000:6.0f}ms {statements[0]:>11}", flush=True)
+
+
+if __name__ == '__main__':
+    main(parse_args(__doc__, lambda parser: parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000])))
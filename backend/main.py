@@ -1,17 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
-from app.api import projects, activities, analysis, auth
-from app.database import Base, engine
+from app.api import projects, activities, analysis, auth, jobs
+from app.database import AsyncSessionLocal, Base, engine
+from app.migrations import run_migrations
+from app.services.analysis_cache import analysis_cache, adhoc_cache
+from app.services.artifact_cache import artifact_cache
+from app.services.cpu_pool import cpu_pool
+from app.services.jobs import job_runner
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables, then bring existing ones up to date. This runs
+    # in the server process only, not in the analysis workers, which import
+    # the main module again when it was started as a script.
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    # Analysis workers start with the server instead of on the first request
+    cpu_pool.start()
+    # Background jobs, including those queued or interrupted before a restart
+    job_runner.start(AsyncSessionLocal)
+    yield
+    await job_runner.stop()
+    cpu_pool.shutdown()
 
 app = FastAPI(
     title="ProjectPath API",
     description="PERT/CPM Project Analyzer API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -31,6 +50,7 @@ app.include_router(auth.router)
 app.include_router(projects.router, prefix="/projects", tags=["projects"])
 app.include_router(activities.router, prefix="/projects", tags=["activities"])
 app.include_router(analysis.router, prefix="/projects", tags=["analysis"])
+app.include_router(jobs.router)
 
 @app.get("/")
 async def root():
@@ -44,6 +64,20 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and occupancy of the analysis result and rendered report caches"""
+    return {
+        "projects": analysis_cache.stats(),
+        "adhoc": adhoc_cache.stats(),
+        "artifacts": artifact_cache.stats()
+    }
+
+@app.get("/pool/stats")
+async def pool_stats():
+    """Occupancy, limits and outcome counters of the analysis worker pool"""
+    return cpu_pool.stats()
+
 if __name__ == "__main__":
     import os
     import uvicorn
@@ -0,0 +1,27 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="module")
+def client():
+    """The analysis endpoints with a running CPU pool; ad-hoc routes need no database"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api import analysis
+    from app.services.cpu_pool import cpu_pool
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        cpu_pool.start()
+        yield
+        cpu_pool.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(analysis.router, prefix="/projects")
+    with TestClient(app) as client:
+        yield client
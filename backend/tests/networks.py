@@ -0,0 +1,27 @@
+"""Random project networks shared by the tests"""
+import random
+from typing import Dict, List
+
+
+def random_network(rng: random.Random, size: int, max_predecessors: int = 3, crashable: bool = False) -> List[Dict]:
+    """
+    A random activity-on-node DAG: each activity depends on a few earlier
+    ones. With `crashable`, activities get costs and most can be crashed.
+    """
+    activities = []
+    for i in range(size):
+        count = rng.randint(0, min(i, max_predecessors))
+        predecessors = rng.sample([f"A{j}" for j in range(i)], count)
+        activity = {
+            'activityId': f"A{i}",
+            'name': f"Activity {i}",
+            'predecessors': ', '.join(predecessors),
+            'duration': rng.randint(1, 10)
+        }
+        if crashable:
+            duration = activity['duration']
+            activity['cost'] = rng.randint(10, 100)
+            activity['crashTime'] = rng.randint(0, duration - 1) if duration > 1 and rng.random() < 0.8 else duration
+            activity['crashCost'] = activity['cost'] + (duration - activity['crashTime']) * rng.randint(1, 20)
+        activities.append(activity)
+    return activities
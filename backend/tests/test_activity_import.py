@@ -0,0 +1,61 @@
+"""Record splitting and limits of streamed activity imports"""
+import csv
+import io
+import random
+import pytest
+from app.services import activity_import
+from app.services.activity_import import StreamingImport, csv_quoted_after
+
+
+def stream(format, text, piece=7):
+    """Feed an upload in small pieces; returns the rows to insert and the import"""
+    ingest = StreamingImport('P', format, {})
+    data = text.encode()
+    rows = []
+    for start in range(0, len(data), piece):
+        for chunk in ingest.feed(data[start:start + piece]):
+            rows.extend(chunk)
+    rows.extend(ingest.finish())
+    return rows, ingest
+
+
+@pytest.mark.parametrize('seed', range(500))
+def test_records_split_like_csv_reader(seed):
+    rng = random.Random(seed)
+    text = ''.join(rng.choice('ab,"\n') for _ in range(rng.randint(1, 40)))
+    records, record, quoted = [], [], False
+    for line in text[:-1].split('\n') if text.endswith('\n') else text.split('\n'):
+        record.append(line)
+        quoted = csv_quoted_after(line, quoted)
+        if not quoted:
+            records.extend(csv.reader(['\n'.join(record)]))
+            record = []
+    expected = list(csv.reader(io.StringIO(text)))
+    if quoted:
+        # A quoted field still open at the end is an import error
+        expected = expected[:-1]
+    assert records == expected
+
+
+def test_stray_quote_in_unquoted_cell_stays_in_its_row():
+    rows, ingest = stream('csv', 'activityId,name,duration\nA,O"Brien,3\nB,"Smith, J",2\nC,"Two\nlines",1\n')
+    assert not ingest.errors
+    assert [(row['activityId'], row['name']) for row in rows] == [('A', 'O"Brien'), ('B', 'Smith, J'), ('C', 'Two\nlines')]
+
+
+def test_unbalanced_quote_fails_at_its_row(monkeypatch):
+    monkeypatch.setattr(activity_import, 'MAX_RECORD_CHARS', 200)
+    text = 'activityId,name,duration\nA,First,3\nB,"Open,2\n' + ''.join(f"X{i},Row {i},1\n" for i in range(1000))
+    with pytest.raises(ValueError, match=r'Row 2 is longer than 200 characters \(check for an unbalanced quote\)'):
+        stream('csv', text)
+
+
+def test_overlong_ndjson_line_fails_before_it_ends(monkeypatch):
+    monkeypatch.setattr(activity_import, 'MAX_RECORD_CHARS', 200)
+    text = '{"activityId": "A", "name": "A"}\n{"activityId": "B", "name": "' + 'x' * 10_000
+    ingest = StreamingImport('P', 'ndjson', {})
+    with pytest.raises(ValueError, match='Row 2 is longer than 200 characters$'):
+        for start in range(0, len(text), 100):
+            list(ingest.feed(text[start:start + 100].encode()))
+    # Nothing past the limit was buffered
+    assert len(ingest.partial_line) <= 300
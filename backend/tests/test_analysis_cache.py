@@ -0,0 +1,39 @@
+"""Cached ad-hoc analyses must answer exactly as an uncached run would"""
+import random
+from app.services.analysis_cache import adhoc_cache, activity_set_hash
+from networks import random_network
+
+
+def adhoc_request(activities):
+    return {'method': 'CPM', 'timeUnit': 'days', 'activities': activities}
+
+
+def test_row_order_is_part_of_the_key():
+    activities = random_network(random.Random(1), 10)
+    assert activity_set_hash(activities) == activity_set_hash([dict(a) for a in activities])
+    assert activity_set_hash(activities) != activity_set_hash(activities[::-1])
+
+
+def test_permuted_requests_match_uncached_responses(client):
+    # Two equally long paths: the reported critical path follows row order
+    tied = [
+        {'activityId': 'A', 'name': 'A', 'predecessors': '', 'duration': 3},
+        {'activityId': 'B', 'name': 'B', 'predecessors': '', 'duration': 3},
+        {'activityId': 'C', 'name': 'C', 'predecessors': 'A, B', 'duration': 2},
+    ]
+    rng = random.Random(5)
+    networks = [tied] + [random_network(rng, 15) for _ in range(5)]
+    for activities in networks:
+        permuted = activities[::-1]
+        adhoc_cache.clear()
+        client.post('/projects/analyze-adhoc?allPaths=true', json=adhoc_request(activities))
+        cached = client.post('/projects/analyze-adhoc?allPaths=true', json=adhoc_request(permuted))
+        adhoc_cache.clear()
+        uncached = client.post('/projects/analyze-adhoc?allPaths=true', json=adhoc_request(permuted))
+        assert cached.status_code == uncached.status_code == 200
+        assert cached.json() == uncached.json()
+
+    adhoc_cache.clear()
+    first = client.post('/projects/analyze-adhoc', json=adhoc_request(tied)).json()
+    second = client.post('/projects/analyze-adhoc', json=adhoc_request(tied[::-1])).json()
+    assert first['criticalPath'] == ['A', 'C'] and second['criticalPath'] == ['B', 'C']
@@ -0,0 +1,42 @@
+"""Time limits of the CPU pool, queueing included"""
+import asyncio
+import time
+import pytest
+from app.services.cpu_pool import CPUPool, PoolSaturated
+
+
+@pytest.fixture
+def pool():
+    pool = CPUPool(workers=1, queue_size=1, task_timeout=1.5)
+    # Start the worker first, so that its start-up is not part of any test
+    asyncio.run(pool.run(time.sleep, 0, timeout=60))
+    yield pool
+    pool.shutdown()
+
+
+def test_time_spent_queued_counts_against_the_limit(pool):
+    async def run():
+        started = time.monotonic()
+        first = asyncio.ensure_future(pool.run(time.sleep, 1.2))
+        await asyncio.sleep(0.1)
+        # Waits about 1.1s for the worker, then has only about 0.4s of its
+        # 1.5s left; timed from its start it would run until about 2.7s
+        with pytest.raises(TimeoutError):
+            await pool.run(time.sleep, 5)
+        await first
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 2.2
+    assert pool.stats()['completed'] == 2
+
+
+def test_full_queue_is_rejected(pool):
+    async def run():
+        tasks = [asyncio.ensure_future(pool.run(time.sleep, 0.3)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolSaturated):
+            await pool.run(time.sleep, 0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert pool.stats()['rejected'] == 1
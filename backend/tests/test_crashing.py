@@ -0,0 +1,46 @@
+"""The min-cut crashing scheme must cost what the exact LP curve says"""
+import random
+import pytest
+from app.services.crashing_engine import CrashingEngine
+from networks import random_network
+
+
+def curve_cost(curve, duration):
+    """Cost increase of the time-cost curve at a duration, between breakpoints"""
+    breakpoints = curve['breakpoints']
+    for longer, shorter in zip(breakpoints, breakpoints[1:]):
+        if shorter['duration'] - 1e-9 <= duration <= longer['duration'] + 1e-9:
+            share = (longer['duration'] - duration) / (longer['duration'] - shorter['duration'])
+            return longer['costIncrease'] + share * (shorter['costIncrease'] - longer['costIncrease'])
+    return breakpoints[0]['costIncrease']
+
+
+def test_crashed_activity_is_released_when_cheaper():
+    def activity(activity_id, duration, crash_time, slope, predecessors=''):
+        return {'activityId': activity_id, 'name': activity_id, 'predecessors': predecessors, 'duration': duration,
+                'crashTime': crash_time, 'cost': 100, 'crashCost': 100 + slope * (duration - crash_time)}
+
+    engine = CrashingEngine([
+        activity('A', 5, 2, 10), activity('B', 2, 1, 5, 'A'), activity('C', 4, 0, 10, 'A'),
+        activity('D', 5, 0, 3), activity('E', 4, 1, 5, 'D, B, A')
+    ])
+    result = engine.calculate_crashing_scheme(5)
+    assert result['finalDuration'] == pytest.approx(5)
+    assert result['totalCostIncrease'] == pytest.approx(58)
+    assert any(step['activitiesReleased'] for step in result['crashingSteps'])
+
+
+@pytest.mark.parametrize('seed', range(150))
+def test_scheme_matches_time_cost_curve(seed):
+    rng = random.Random(seed)
+    engine = CrashingEngine(random_network(rng, rng.randint(10, 40), rng.randint(2, 6), crashable=True))
+    curve = engine.calculate_time_cost_curve()
+    shortest, normal = curve['minimumDuration'], curve['normalDuration']
+
+    # Past the shortest duration, exactly to it, and between breakpoints
+    for target in [shortest - 1, shortest] + [rng.uniform(shortest, normal) for _ in range(5)]:
+        result = engine.calculate_crashing_scheme(target)
+        assert result['finalDuration'] == pytest.approx(max(target, shortest), abs=1e-6)
+        assert result['totalCostIncrease'] == pytest.approx(curve_cost(curve, result['finalDuration']), rel=1e-6, abs=1e-6)
+        for step in result['crashingSteps']:
+            assert step['newDuration'] < normal
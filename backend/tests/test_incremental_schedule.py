@@ -0,0 +1,148 @@
+"""Incremental re-propagation must match a full recompute of the edited network"""
+import copy
+import random
+import pytest
+from app.services.compiled_network import CycleError
+from app.services.pert_cpm import PERTCPMEngine, ScheduleStore
+from networks import random_network
+
+SCHEDULE_VALUES = ('ES', 'EF', 'LS', 'LF', 'slack', 'isCritical')
+
+
+def full_analysis(activities):
+    return PERTCPMEngine(copy.deepcopy(activities)).analyze()
+
+
+def assert_same_schedule(result, expected):
+    assert result['projectDuration'] == pytest.approx(expected['projectDuration'])
+    assert result['criticalPath'] == expected['criticalPath']
+    for activity_id, activity in expected['activities'].items():
+        for value in SCHEDULE_VALUES:
+            assert result['activities'][activity_id][value] == pytest.approx(activity[value]), (activity_id, value)
+
+
+def random_edit(rng, activities):
+    """Changes to a random activity: a new duration, new predecessors or both"""
+    activity = rng.choice(activities)
+    changes = {}
+    if rng.random() < 0.7:
+        changes['duration'] = rng.randint(0, 12)
+    if not changes or rng.random() < 0.4:
+        # Any activity may become a predecessor, so some edits close a cycle
+        others = [a['activityId'] for a in activities if a['activityId'] != activity['activityId']]
+        changes['predecessors'] = ', '.join(rng.sample(others, rng.randint(0, min(3, len(others)))))
+    return activity['activityId'], changes
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_update_activity_matches_full_analysis(seed):
+    rng = random.Random(seed)
+    activities = random_network(rng, rng.randint(2, 40))
+    engine = PERTCPMEngine(copy.deepcopy(activities))
+    engine.analyze()
+
+    for _ in range(25):
+        activity_id, changes = random_edit(rng, activities)
+        edited = copy.deepcopy(activities)
+        next(a for a in edited if a['activityId'] == activity_id).update(changes)
+        try:
+            expected = full_analysis(edited)
+        except CycleError:
+            # The edit is rejected and the engine keeps its previous schedule
+            with pytest.raises(CycleError):
+                engine.update_activity(activity_id, changes)
+            assert_same_schedule(engine.summarize(), full_analysis(activities))
+            continue
+
+        result = engine.update_activity(activity_id, changes)
+        assert_same_schedule(result, expected)
+        assert activity_id in result['changedActivities']
+        activities = edited
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_schedule_store_matches_full_analysis(seed):
+    rng = random.Random(1000 + seed)
+    # A small store, so that projects are also evicted and analyzed from scratch
+    store = ScheduleStore(max_projects=3)
+    projects = {f"P{i}": random_network(rng, rng.randint(2, 80)) for i in range(5)}
+
+    for _ in range(40):
+        project_id = rng.choice(list(projects))
+        activities = copy.deepcopy(projects[project_id])
+        # Mostly a few edits, sometimes more than the store re-propagates one by one
+        for _ in range(rng.choice([0, 1, 2, 3, 40])):
+            activity_id, changes = random_edit(rng, activities)
+            next(a for a in activities if a['activityId'] == activity_id).update(changes)
+        if rng.random() < 0.2:
+            activities[rng.randrange(len(activities))]['name'] = f"Renamed {rng.random()}"
+
+        try:
+            expected = full_analysis(activities)
+        except CycleError:
+            with pytest.raises(CycleError):
+                store.analyze(project_id, copy.deepcopy(activities))
+            continue
+        result = store.analyze(project_id, copy.deepcopy(activities))
+        assert_same_schedule(result, expected)
+        for data in activities:
+            assert result['activities'][data['activityId']]['name'] == data['name']
+        projects[project_id] = activities
+        assert len(store._engines) <= store.max_projects
+
+
+def test_schedule_store_applies_a_reversed_dependency_as_one_batch():
+    activities = [
+        {'activityId': 'A', 'name': 'A', 'duration': 3, 'predecessors': ''},
+        {'activityId': 'B', 'name': 'B', 'duration': 4, 'predecessors': 'A'},
+        {'activityId': 'C', 'name': 'C', 'duration': 2, 'predecessors': 'B'},
+        {'activityId': 'D', 'name': 'D', 'duration': 5, 'predecessors': ''},
+    ] + [{'activityId': f"F{i}", 'name': f"F{i}", 'duration': 1, 'predecessors': 'D'} for i in range(30)]
+    store = ScheduleStore()
+    store.analyze('P', copy.deepcopy(activities))
+
+    # B no longer follows A and A now follows B; applied one at a time the
+    # first of these edits closes a cycle
+    reversed_ = copy.deepcopy(activities)
+    reversed_[0]['predecessors'] = 'B'
+    reversed_[1]['predecessors'] = ''
+    reversed_[2]['predecessors'] = 'A'
+    result = store.analyze('P', copy.deepcopy(reversed_))
+    assert result['changedActivities'] is not None
+    assert_same_schedule(result, full_analysis(reversed_))
+    assert result['criticalPath'] == ['B', 'A', 'C']
+
+
+def test_schedule_store_falls_back_to_full_analysis_beyond_edit_limit():
+    rng = random.Random(7)
+    activities = random_network(rng, 400)
+    store = ScheduleStore()
+    assert store.analyze('P', copy.deepcopy(activities))['changedActivities'] is None
+
+    few = copy.deepcopy(activities)
+    for activity in few[:3]:
+        activity['duration'] += 1
+    result = store.analyze('P', copy.deepcopy(few))
+    assert result['changedActivities'] is not None
+    assert_same_schedule(result, full_analysis(few))
+
+    many = copy.deepcopy(few)
+    for activity in many[:store.max_changed_activities + 1]:
+        activity['duration'] += 1
+    result = store.analyze('P', copy.deepcopy(many))
+    assert result['changedActivities'] is None
+    assert_same_schedule(result, full_analysis(many))
+
+
+def test_schedule_store_evicts_least_recently_used_project():
+    rng = random.Random(11)
+    store = ScheduleStore(max_projects=2)
+    networks = {project_id: random_network(rng, 20) for project_id in ('P1', 'P2', 'P3')}
+    store.analyze('P1', copy.deepcopy(networks['P1']))
+    store.analyze('P2', copy.deepcopy(networks['P2']))
+    store.analyze('P1', copy.deepcopy(networks['P1']))
+    store.analyze('P3', copy.deepcopy(networks['P3']))
+    assert store.get('P2') is None
+    assert store.get('P1') is not None and store.get('P3') is not None
+    # An evicted project is analyzed from scratch
+    assert store.analyze('P2', copy.deepcopy(networks['P2']))['changedActivities'] is None
@@ -0,0 +1,41 @@
+"""Input bounds of the Monte Carlo simulation and its two beta-PERT samplers"""
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from app.schemas.schemas import SimulationRequest
+from app.services import monte_carlo
+from app.services.monte_carlo import MAX_BINS, DurationSampler, simulate_schedule
+
+
+def three_point_network(size):
+    return [
+        {'activityId': f"A{i}", 'predecessors': f"A{i - 1}" if i else '',
+         'optimistic': 1 + i % 3, 'mostLikely': 3 + i % 5, 'pessimistic': 9 + i % 7}
+        for i in range(size)
+    ]
+
+
+@pytest.mark.parametrize('bins', [0, MAX_BINS + 1])
+def test_bins_out_of_range_rejected(bins):
+    with pytest.raises(ValueError):
+        simulate_schedule(three_point_network(3), iterations=10, bins=bins)
+    with pytest.raises(ValidationError):
+        SimulationRequest(bins=bins)
+
+
+def test_activities_with_the_same_shape_share_a_table_row():
+    low = np.array([1.0, 1.0, 2.0, 1.0])
+    mode = np.array([2.0, 2.0, 4.0, 3.0])
+    high = np.array([4.0, 4.0, 8.0, 4.0])
+    sampler = DurationSampler(low, mode, high, 'beta-pert')
+    # The third activity is the first one scaled, so three of four rows repeat
+    assert sampler.table.size == 2 * monte_carlo.QUANTILE_POINTS
+
+
+def test_beta_sampler_without_table_matches_tabulated(monkeypatch):
+    activities = three_point_network(40)
+    tabulated = simulate_schedule(activities, iterations=20000, seed=3)
+    monkeypatch.setattr(monte_carlo, 'MAX_QUANTILE_ROWS', 0)
+    sampled = simulate_schedule(activities, iterations=20000, seed=3)
+    assert sampled['meanDuration'] == pytest.approx(tabulated['meanDuration'], rel=0.01)
+    assert sampled['stdDeviation'] == pytest.approx(tabulated['stdDeviation'], rel=0.05)
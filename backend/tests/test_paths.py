@@ -0,0 +1,80 @@
+"""Critical path counting and k-longest path enumeration against brute force"""
+import random
+import pytest
+from app.services.pert_cpm import PERTCPMEngine
+from networks import random_network
+
+
+def all_paths(activities):
+    """Every start-to-end path with its length, by exhaustive depth-first search"""
+    durations = {a['activityId']: a['duration'] for a in activities}
+    successors = {activity_id: [] for activity_id in durations}
+    starts = []
+    for a in activities:
+        predecessors = [p for p in a['predecessors'].split(', ') if p]
+        for pred in predecessors:
+            successors[pred].append(a['activityId'])
+        if not predecessors:
+            starts.append(a['activityId'])
+
+    paths = []
+    def extend(path, length):
+        if not successors[path[-1]]:
+            paths.append((tuple(path), length))
+        for succ in successors[path[-1]]:
+            extend(path + [succ], length + durations[succ])
+    for start in starts:
+        extend([start], durations[start])
+    return paths
+
+
+def small_network(seed):
+    """Small DAGs with several starts and ends and short durations, so many paths tie"""
+    rng = random.Random(seed)
+    activities = random_network(rng, rng.randint(1, 12), rng.randint(1, 4))
+    for activity in activities:
+        activity['duration'] = rng.choice([0, 1, 1, 2, 2, 3])
+    return activities, rng
+
+
+@pytest.mark.parametrize('seed', range(400))
+def test_critical_paths_match_brute_force(seed):
+    activities, rng = small_network(seed)
+    engine = PERTCPMEngine(activities)
+    duration = engine.analyze()['projectDuration']
+    expected = {path for path, length in all_paths(activities) if length == duration}
+
+    everything = engine.critical_paths(None)
+    assert everything['count'] == len(expected) == engine.count_critical_paths()
+    assert len(everything['paths']) == len(expected)
+    assert {tuple(path) for path in everything['paths']} == expected
+    assert not everything['truncated']
+
+    limit = rng.randint(0, len(expected) + 1)
+    limited = engine.critical_paths(limit)
+    assert limited['count'] == len(expected)
+    assert limited['paths'] == everything['paths'][:limit]
+    assert limited['truncated'] == (limit < len(expected))
+
+
+@pytest.mark.parametrize('seed', range(400))
+def test_longest_paths_match_brute_force(seed):
+    activities, rng = small_network(seed)
+    engine = PERTCPMEngine(activities)
+    duration = engine.analyze()['projectDuration']
+    expected = all_paths(activities)
+
+    # Every path exactly once, longest first
+    enumerated = [(tuple(path), length) for path, length in engine.iter_longest_paths()]
+    assert sorted(enumerated) == sorted(expected)
+    lengths = [length for _, length in enumerated]
+    assert lengths == sorted(lengths, reverse=True)
+
+    k = rng.randint(1, len(expected) + 1)
+    max_slack = rng.choice([None, 0, 1, 2])
+    within = [length for _, length in expected if max_slack is None or duration - length <= max_slack]
+    top = engine.longest_paths(k, max_slack)
+    assert [path['duration'] for path in top] == sorted(within, reverse=True)[:k]
+    for path in top:
+        assert path['slack'] == duration - path['duration']
+        assert path['isCritical'] == (path['duration'] == duration)
@@ -0,0 +1,48 @@
+"""Probability sweeps over the normal approximation of the project duration"""
+import math
+import pytest
+from app.services.pert_cpm import calculate_probability, probability_sweep
+
+
+def pert_request(spread, **sweep):
+    """A three-activity PERT network; zero spread makes every estimate certain"""
+    return {
+        'method': 'PERT', 'timeUnit': 'days',
+        'activities': [
+            {'activityId': 'A', 'name': 'A', 'predecessors': '', 'optimistic': 4 - spread, 'mostLikely': 4, 'pessimistic': 4 + spread},
+            {'activityId': 'B', 'name': 'B', 'predecessors': 'A', 'optimistic': 6 - spread, 'mostLikely': 6, 'pessimistic': 6 + 2 * spread},
+            {'activityId': 'C', 'name': 'C', 'predecessors': 'A', 'optimistic': 3, 'mostLikely': 3, 'pessimistic': 3},
+        ],
+        **sweep
+    }
+
+
+def test_sweep_matches_single_deadline_probability():
+    sweep = probability_sweep(20, 4, deadlines=[14, 20, 23.5], confidence_levels=[0.5, 0.9])
+    for row in sweep['deadlines']:
+        single = calculate_probability(20, 4, row['deadline'])
+        assert row['probability'] == pytest.approx(single['probability'], rel=1e-12)
+        assert row['zscore'] == pytest.approx(single['zscore'])
+    assert sweep['confidence'][0]['deadline'] == pytest.approx(20)
+    assert sweep['confidence'][1]['deadline'] == pytest.approx(20 + 2 * 1.2815515655446004, rel=1e-8)
+
+
+def test_zero_variance_sweep_endpoint_returns_finite_json(client):
+    response = client.post('/projects/analyze-adhoc/probability/sweep',
+                           json=pert_request(0, deadlines=[9, 10, 11], confidenceLevels=[0.8], points=5))
+    assert response.status_code == 200, response.text
+    sweep = response.json()
+    assert sweep['projectDuration'] == 10 and sweep['stdDeviation'] == 0
+    assert [row['probability'] for row in sweep['deadlines']] == [0, 1, 1]
+    assert all(row['zscore'] is None for row in sweep['deadlines'])
+    assert sweep['confidence'] == [{'confidence': 0.8, 'deadline': 10}]
+    assert sweep['curve']['probabilities'] == [0, 0, 1, 1, 1]
+
+
+def test_sweep_endpoint_with_variance(client):
+    response = client.post('/projects/analyze-adhoc/probability/sweep',
+                           json=pert_request(1, deadlines=[10], points=3))
+    assert response.status_code == 200, response.text
+    sweep = response.json()
+    assert sweep['stdDeviation'] == pytest.approx(math.sqrt((2 / 6) ** 2 + (3 / 6) ** 2))
+    assert sweep['deadlines'][0]['zscore'] < 0 < sweep['deadlines'][0]['probability'] < 0.5
@@ -0,0 +1,126 @@
+"""The exact time-cost LP: its curve, crash plans and size limit"""
+import random
+import pytest
+from app.services import time_cost
+from app.services.crashing_engine import CrashingEngine
+from app.services.pert_cpm import PERTCPMEngine
+from app.services.time_cost import check_time_cost_size
+from networks import random_network
+
+
+def lp_rows(activities):
+    """Dependencies, end activities and crashable activities"""
+    predecessors = {a['activityId']: [p for p in a['predecessors'].split(', ') if p] for a in activities}
+    edges = sum(len(preds) for preds in predecessors.values())
+    with_successors = {pred for preds in predecessors.values() for pred in preds}
+    sinks = sum(1 for a in activities if a['activityId'] not in with_successors)
+    crashable = sum(1 for a in activities if a.get('crashTime') is not None and a['crashTime'] < a['duration'])
+    return edges + sinks + crashable
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_size_check_and_solver_agree_on_the_limit(seed, monkeypatch):
+    rng = random.Random(seed)
+    activities = random_network(rng, 60, crashable=True)
+    rows = lp_rows(activities)
+
+    monkeypatch.setattr(time_cost, 'MAX_TIME_COST_ROWS', rows)
+    check_time_cost_size(activities)
+    CrashingEngine(activities).calculate_time_cost_curve()
+
+    monkeypatch.setattr(time_cost, 'MAX_TIME_COST_ROWS', rows - 1)
+    with pytest.raises(ValueError, match='too large'):
+        check_time_cost_size(activities)
+    with pytest.raises(ValueError, match='too large'):
+        CrashingEngine(activities).calculate_time_cost_curve()
+
+
+def activity(activity_id, duration, crash_time, slope, predecessors=''):
+    return {'activityId': activity_id, 'name': activity_id, 'predecessors': predecessors, 'duration': duration,
+            'crashTime': crash_time, 'cost': 100, 'crashCost': 100 + slope * (duration - crash_time)}
+
+
+def test_curve_of_a_small_network():
+    # Paths E-A-B and E-C-D of length 9. The cheapest unit crashes B and C
+    # (2 + 3), then the shared E (6), then A and C together (10 + 3) until C
+    # is used up; D cannot be crashed, so 5 is the shortest duration
+    curve = CrashingEngine([
+        activity('E', 2, 1, 6), activity('A', 4, 1, 10, 'E'), activity('B', 3, 2, 2, 'A'),
+        activity('C', 6, 3, 3, 'E'), activity('D', 1, 1, 0, 'C')
+    ]).calculate_time_cost_curve()
+
+    assert curve['normalDuration'] == 9 and curve['normalCost'] == 500
+    assert curve['minimumDuration'] == pytest.approx(5)
+    assert curve['minimumDurationCost'] == pytest.approx(537)
+    expected = [(9, 0, 5, {}), (8, 5, 6, {'B': 1, 'C': 1}), (7, 11, 13, {'B': 1, 'C': 1, 'E': 1}),
+                (5, 37, None, {'A': 2, 'B': 1, 'C': 3, 'E': 1})]
+    assert len(curve['breakpoints']) == len(expected)
+    for point, (duration, increase, marginal, plan) in zip(curve['breakpoints'], expected):
+        assert point['duration'] == pytest.approx(duration)
+        assert point['costIncrease'] == pytest.approx(increase)
+        assert point['totalCost'] == pytest.approx(500 + increase)
+        assert point['marginalCost'] == (None if marginal is None else pytest.approx(marginal))
+        assert {step['activityId']: step['crashedBy'] for step in point['crashPlan']} == pytest.approx(plan)
+
+
+def lp_minimum_cost(activities, deadline):
+    """Cheapest crash cost to finish by `deadline`, from a general-purpose LP solver"""
+    from scipy.optimize import linprog
+    ids = [a['activityId'] for a in activities]
+    index = {activity_id: i for i, activity_id in enumerate(ids)}
+    n = len(ids)
+    # Variables: start times, then crash amounts, with
+    # S_i + duration_i - y_i <= S_j per dependency, and <= deadline at the end
+    rows, bounds = [], []
+    successors = set()
+    for a in activities:
+        for pred in filter(None, a['predecessors'].split(', ')):
+            successors.add(pred)
+            row = [0.0] * (2 * n)
+            row[index[pred]], row[n + index[pred]], row[index[a['activityId']]] = 1.0, -1.0, -1.0
+            rows.append(row)
+            bounds.append(-activities[index[pred]]['duration'])
+    for a in activities:
+        if a['activityId'] not in successors:
+            i = index[a['activityId']]
+            row = [0.0] * (2 * n)
+            row[i], row[n + i] = 1.0, -1.0
+            rows.append(row)
+            bounds.append(deadline - a['duration'])
+    slopes = [(a['crashCost'] - a['cost']) / (a['duration'] - a['crashTime']) if a['crashTime'] < a['duration'] else 0
+              for a in activities]
+    result = linprog([0.0] * n + slopes, A_ub=rows, b_ub=bounds,
+                     bounds=[(0, None)] * n + [(0, a['duration'] - a['crashTime']) for a in activities])
+    assert result.status == 0
+    return result.fun
+
+
+def random_curve(seed):
+    rng = random.Random(seed)
+    activities = random_network(rng, rng.randint(5, 25), crashable=True)
+    return activities, CrashingEngine(activities).calculate_time_cost_curve()
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_breakpoint_crash_plans_are_feasible(seed):
+    activities, curve = random_curve(seed)
+    by_id = {a['activityId']: a for a in activities}
+
+    durations = [point['duration'] for point in curve['breakpoints']]
+    assert durations == sorted(durations, reverse=True)
+    for point in curve['breakpoints']:
+        # The crash plan finishes by the breakpoint's duration at its cost
+        crashed_by = {step['activityId']: step['crashedBy'] for step in point['crashPlan']}
+        crashed = [dict(a, duration=a['duration'] - crashed_by.get(a['activityId'], 0)) for a in activities]
+        assert PERTCPMEngine(crashed).analyze()['projectDuration'] <= point['duration'] + 1e-6
+        assert sum(step['costIncrease'] for step in point['crashPlan']) == pytest.approx(point['costIncrease'])
+        for step in point['crashPlan']:
+            assert step['duration'] >= by_id[step['activityId']]['crashTime'] - 1e-9
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_breakpoints_match_a_general_lp_solver(seed):
+    pytest.importorskip('scipy')
+    activities, curve = random_curve(seed)
+    for point in curve['breakpoints']:
+        assert point['costIncrease'] == pytest.approx(lp_minimum_cost(activities, point['duration']), rel=1e-6, abs=1e-6)
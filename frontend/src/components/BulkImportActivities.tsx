@@ -159,10 +159,8 @@ export default function BulkImportActivities({
           setImportProgress(((i + 1) / parsedActivities.length) * 100)
         }
       } else {
-        // For authenticated users, use API
-        for (let i = 0; i < parsedActivities.length; i++) {
-          const activity = parsedActivities[i]
-
+        // For authenticated users, import the whole batch in one transaction
+        const rows = parsedActivities.map(activity => {
           const data: any = {
             activityId: activity.activityId,
             name: activity.name || activity.activityId,
@@ -177,14 +175,25 @@ export default function BulkImportActivities({
             data.duration = activity.duration ? parseFloat(activity.duration) : null
           }
 
-          await api.post(`/projects/${projectId}/activities`, data)
-          setImportProgress(((i + 1) / parsedActivities.length) * 100)
-        }
+          return data
+        })
+
+        await api.post(`/projects/${projectId}/activities/bulk`, { activities: rows })
+        setImportProgress(100)
       }
 
       onImportComplete()
     } catch (err: any) {
-      setError(err.response?.data?.detail || 'Import failed')
+      const rowErrors = err.response?.data?.errors
+      if (rowErrors?.length) {
+        const listed = rowErrors
+          .slice(0, 5)
+          .map((e: any) => `Row ${e.row}${e.activityId ? ` (${e.activityId})` : ''}: ${e.message}`)
+          .join('; ')
+        setError(`${err.response.data.detail}. ${listed}${rowErrors.length > 5 ? '; ...' : ''}`)
+      } else {
+        setError(err.response?.data?.detail || 'Import failed')
+      }
       setStep('preview')
     }
   }
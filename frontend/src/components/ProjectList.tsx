@@ -10,11 +10,22 @@ interface Project {
   method: 'CPM' | 'PERT'
   timeUnit: string
   createdAt: string
+  activityCount?: number
+  lastDuration?: number | null
 }
 
+interface ProjectPage {
+  items: Project[]
+  nextCursor: string | null
+}
+
+const PAGE_SIZE = 20
+
 export default function ProjectList() {
   const [projects, setProjects] = useState<Project[]>([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const { isAuthenticated } = useAuth()
 
   useEffect(() => {
@@ -28,8 +39,9 @@ export default function ProjectList() {
 
   const fetchProjects = async () => {
     try {
-      const response = await api.get('/projects')
-      setProjects(response.data)
+      const response = await api.get<ProjectPage>('/projects', { params: { limit: PAGE_SIZE } })
+      setProjects(response.data.items)
+      setNextCursor(response.data.nextCursor)
     } catch (error) {
       console.error('Failed to fetch projects:', error)
       setProjects([])
@@ -38,6 +50,20 @@ export default function ProjectList() {
     }
   }
 
+  const fetchMoreProjects = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const response = await api.get<ProjectPage>('/projects', { params: { limit: PAGE_SIZE, cursor: nextCursor } })
+      setProjects(current => [...current, ...response.data.items])
+      setNextCursor(response.data.nextCursor)
+    } catch (error) {
+      console.error('Failed to fetch projects:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDelete = async (projectId: string) => {
     if (!window.confirm('Are you sure you want to delete this project?')) return
 
@@ -72,56 +98,75 @@ export default function ProjectList() {
   }
 
   return (
-    <div className="grid grid-cols-1 gap-6 sm:grid-cols-2">
-      {projects.map(project => (
-        <div key={project.id} className="card p-6 hover:shadow-lg transition-shadow duration-200 flex flex-col h-full">
-          <div className="flex-1">
-            <h3 className="text-lg font-semibold text-secondary-900 group-hover:text-primary-600 transition-colors">
-              {project.name}
-            </h3>
-            <div className="mt-4 flex flex-wrap gap-2">
-              <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-primary-50 text-primary-700">
-                {project.method}
-              </span>
-              {!isAuthenticated && (
+    <div>
+      <div className="grid grid-cols-1 gap-6 sm:grid-cols-2">
+        {projects.map(project => (
+          <div key={project.id} className="card p-6 hover:shadow-lg transition-shadow duration-200 flex flex-col h-full">
+            <div className="flex-1">
+              <h3 className="text-lg font-semibold text-secondary-900 group-hover:text-primary-600 transition-colors">
+                {project.name}
+              </h3>
+              <div className="mt-4 flex flex-wrap gap-2">
+                <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-primary-50 text-primary-700">
+                  {project.method}
+                </span>
+                {!isAuthenticated && (
+                  <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-secondary-100 text-secondary-700">
+                    Guest
+                  </span>
+                )}
                 <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-secondary-100 text-secondary-700">
-                  Guest
+                  {project.timeUnit}
                 </span>
+              </div>
+              {project.activityCount !== undefined && (
+                <p className="text-sm text-secondary-600 mt-4">
+                  {project.activityCount} {project.activityCount === 1 ? 'activity' : 'activities'}
+                  {project.lastDuration != null && ` · ${project.lastDuration} ${project.timeUnit}`}
+                </p>
               )}
-              <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-secondary-100 text-secondary-700">
-                {project.timeUnit}
-              </span>
+              <p className="text-xs text-secondary-400 mt-4">
+                Created {new Date(project.createdAt).toLocaleDateString()}
+              </p>
             </div>
-            <p className="text-xs text-secondary-400 mt-4">
-              Created {new Date(project.createdAt).toLocaleDateString()}
-            </p>
-          </div>
 
-          <div className="mt-6 flex gap-3 pt-4 border-t border-secondary-100">
-            <Link
-              to={`/project/${project.id}`}
-              className="flex-1 inline-flex justify-center items-center px-3 py-2 border border-secondary-300 shadow-sm text-sm leading-4 font-medium rounded-md text-secondary-700 bg-white hover:bg-secondary-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-primary-500"
-            >
-              Edit
-            </Link>
-            <Link
-              to={`/project/${project.id}/analysis`}
-              className="flex-1 inline-flex justify-center items-center px-3 py-2 border border-transparent shadow-sm text-sm leading-4 font-medium rounded-md text-white bg-primary-600 hover:bg-primary-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-primary-500"
-            >
-              Analyze
-            </Link>
-            <button
-              onClick={() => handleDelete(project.id)}
-              className="inline-flex justify-center items-center p-2 border border-transparent text-sm font-medium rounded-md text-danger-700 bg-danger-50 hover:bg-danger-100 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-danger-500"
-              title="Delete Project"
-            >
-              <svg xmlns="http://www.w3.org/2000/svg" className="h-4 w-4" viewBox="0 0 20 20" fill="currentColor">
-                <path fillRule="evenodd" d="M9 2a1 1 0 00-.894.553L7.382 4H4a1 1 0 000 2v10a2 2 0 002 2h8a2 2 0 002-2V6a1 1 0 100-2h-3.382l-.724-1.447A1 1 0 0011 2H9zM7 8a1 1 0 012 0v6a1 1 0 11-2 0V8zm5-1a1 1 0 00-1 1v6a1 1 0 102 0V8a1 1 0 00-1-1z" clipRule="evenodd" />
-              </svg>
-            </button>
+            <div className="mt-6 flex gap-3 pt-4 border-t border-secondary-100">
+              <Link
+                to={`/project/${project.id}`}
+                className="flex-1 inline-flex justify-center items-center px-3 py-2 border border-secondary-300 shadow-sm text-sm leading-4 font-medium rounded-md text-secondary-700 bg-white hover:bg-secondary-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-primary-500"
+              >
+                Edit
+              </Link>
+              <Link
+                to={`/project/${project.id}/analysis`}
+                className="flex-1 inline-flex justify-center items-center px-3 py-2 border border-transparent shadow-sm text-sm leading-4 font-medium rounded-md text-white bg-primary-600 hover:bg-primary-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-primary-500"
+              >
+                Analyze
+              </Link>
+              <button
+                onClick={() => handleDelete(project.id)}
+                className="inline-flex justify-center items-center p-2 border border-transparent text-sm font-medium rounded-md text-danger-700 bg-danger-50 hover:bg-danger-100 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-danger-500"
+                title="Delete Project"
+              >
+                <svg xmlns="http://www.w3.org/2000/svg" className="h-4 w-4" viewBox="0 0 20 20" fill="currentColor">
+                  <path fillRule="evenodd" d="M9 2a1 1 0 00-.894.553L7.382 4H4a1 1 0 000 2v10a2 2 0 002 2h8a2 2 0 002-2V6a1 1 0 100-2h-3.382l-.724-1.447A1 1 0 0011 2H9zM7 8a1 1 0 012 0v6a1 1 0 11-2 0V8zm5-1a1 1 0 00-1 1v6a1 1 0 102 0V8a1 1 0 00-1-1z" clipRule="evenodd" />
+                </svg>
+              </button>
+            </div>
           </div>
+        ))}
+      </div>
+      {nextCursor && (
+        <div className="mt-6 flex justify-center">
+          <button
+            onClick={fetchMoreProjects}
+            disabled={loadingMore}
+            className="inline-flex items-center px-4 py-2 border border-secondary-300 shadow-sm text-sm font-medium rounded-md text-secondary-700 bg-white hover:bg-secondary-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
         </div>
-      ))}
+      )}
     </div>
   )
 }
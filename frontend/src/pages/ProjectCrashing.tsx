@@ -1038,7 +1038,7 @@ export default function ProjectCrashing() {
                             <thead className="bg-gray-100">
                               <tr>
                                 <th className="px-4 py-2 text-center">Step</th>
-                                <th className="px-4 py-2 text-left">Activity Crashed</th>
+                                <th className="px-4 py-2 text-left">Activities Crashed</th>
                                 <th className="px-4 py-2 text-center">Amount Crashed</th>
                                 <th className="px-4 py-2 text-right">Crash Slope ({costUnit}/{timeUnit})</th>
                                 <th className="px-4 py-2 text-right">Cost Increase ({costUnit})</th>
@@ -1062,7 +1062,7 @@ export default function ProjectCrashing() {
                           </table>
                         </div>
                         <p className="text-sm text-gray-600 mt-3">
-                          ℹ️ Activities are crashed iteratively, always choosing the activity with the lowest crash slope (most cost-effective).
+                          ℹ️ Each step crashes the cheapest set of activities that shortens every critical path at once, until another path becomes critical.
                         </p>
                       </div>
                     ) : (